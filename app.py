@@ -1,35 +1,60 @@
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles # Import StaticFiles
 import os # Ensure os is imported
 import uvicorn
 import torch
-import torch.nn as nn
-import joblib
 import numpy as np
-import pandas as pd
 import shap
 import warnings
 import pickle
 import socket
+import threading
+import time
 from dotenv import load_dotenv
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 # Load Environment First
 load_dotenv()
 
 # NLP Imports
-from transformers import pipeline
+from bert_serving import ClinicalBertServer
 from genai_report import generate_medical_report, generate_chat_response
 
 # Import models/schemas
-from model_utils import CardioNN
-from schemas import CardioInput, CardioPrediction, DiabetesInput, CBCInput, IdiopathicInput, TextAnalysisInput, ChatInput, ReportInput
+from prediction_cache import PredictionCache, RequestLog, artifact_fingerprint, canonical_features
+from http_cache import PayloadStore, body_digest, etag_matches, input_hash, make_etag
+from prefetch import SpeculativePrefetcher
+from nn_attributions import cardio_nn_attributions
+from whatif import minimal_change
+from trajectory import project
+from population_insights import load_insights
+from percentile_index import PercentileIndex, PercentileIndexStore
+from similar_patients import SimilarPatientIndex
+from idiopathic_table import load_idiopathic_table
+from screening import derive_shared, model_inputs, run_concurrently
+from routing import BackendRouter
+from ensemble import CardioEnsemble, parse_weights
+from shadow import ShadowEvaluator
+from artifact_bundle import BUNDLE_PATH, ArtifactBundle, label_encoders
+from model_registry import REGISTRY_DIR, HotSwapper, ModelRegistry, RegistryError
+from drift_monitor import DriftMonitor, build_reference, load_or_build_reference
+from json_responses import FastJSONResponse, dumps, json_response, response_options, shaped
+from columnar import CARDIO_CODES, CARDIO_RANGES, FORMATS, STREAM_FORMATS, ColumnarError, CSVRowChunker, PayloadTooLarge, detect_format, format_stream_chunk, maybe_decompress, read_columns, validate_columns, write_results
+from batch_scoring import CARDIO_ARTIFACTS, CARDIO_NN_ORDER, CARDIO_XGB_ORDER, CardioNNNumpy, cardio_matrix, load_cardio_nn, load_cardio_xgb, mc_summary, predict_cardio_nn_batch, predict_cardio_nn_grid, predict_cardio_nn_mc, predict_cardio_xgb_batch
+from starlette.concurrency import run_in_threadpool
+from schemas import CardioInput, CardioPrediction, DiabetesInput, CBCInput, IdiopathicInput, TextAnalysisInput, TextBatchAnalysisInput, ChatInput, ReportInput, ScreenInput, TrajectoryInput, WhatIfInput
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
-app = FastAPI(title="FedHealth Comprehensive AI API", description="Unified API for Cardiovascular, Diabetes, CBC, IPF, and Medical NLP")
+app = FastAPI(
+    title="FedHealth Comprehensive AI API",
+    description="Unified API for Cardiovascular, Diabetes, CBC, IPF, and Medical NLP",
+    default_response_class=FastJSONResponse,
+    dependencies=[Depends(response_options)],  # ?fields= / ?compact= on every JSON response
+)
 
 # Enable CORS
 app.add_middleware(
@@ -40,9 +65,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large bodies (bulk results, explanations) for clients sending Accept-Encoding: gzip.
+# Incremental streams are passed through untouched: a gzip frame would hold their output back.
+class StreamAwareGZip(GZipMiddleware):
+    def __init__(self, app, exclude_paths=(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            return await self.app(scope, receive, send)
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(StreamAwareGZip, minimum_size=int(os.getenv("GZIP_MIN_BYTES", "1024")),
+                   exclude_paths=["/predict/cardiovascular/stream"])
+
 # Global Exception Handler
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -60,6 +101,25 @@ async def validation_exception_handler(request, exc):
         content={"detail": str(exc), "body": str(exc.body)}
     )
 
+# In-flight request counter (used to back off speculative work under load). Plain ASGI rather than
+# @app.middleware("http"): it passes receive/send through untouched, so streamed bodies are not buffered.
+active_requests = 0
+
+class CountActiveRequests:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global active_requests
+        if scope["type"] != "http": return await self.app(scope, receive, send)
+        active_requests += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            active_requests -= 1
+
+app.add_middleware(CountActiveRequests)
+
 # --- Serve Static Files (Frontend) ---
 if os.path.exists("frontend/dist"):
     app.mount("/assets", StaticFiles(directory="frontend/dist/assets"), name="assets")
@@ -68,35 +128,148 @@ if os.path.exists("frontend/dist"):
 # We will define the catch-all at the very end of the file to capture non-API routes.
 
 
-# --- Model Classes ---
-class IdiopathicNN(nn.Module):
-    def __init__(self, input_dim):
-        super(IdiopathicNN, self).__init__()
-        self.layer1 = nn.Linear(input_dim, 16)
-        self.relu = nn.ReLU()
-        self.layer2 = nn.Linear(16, 8)
-        self.output = nn.Linear(8, 1)
-        self.sigmoid = nn.Sigmoid()
-
-    def forward(self, x):
-        x = self.relu(self.layer1(x))
-        x = self.relu(self.layer2(x))
-        x = self.sigmoid(self.output(x))
-        return x
-
 # --- Global Artifacts ---
 artifacts = {
     "cardio_nn": {"model": None, "scaler": None},
     "cardio_xgb": {"model": None, "explainer": None},
+    "cardio_numpy": {"model": None},  # NumPy copy of the Cardio NN (cheap single-row backend)
+    "cardio_candidate": {"model": None, "scaler": None},  # retrained NN under shadow/canary evaluation
     "diabetes_xgb": {"model": None, "encoders": None, "features": None, "explainer": None},
     "idiopathic": {"model": None, "scaler": None, "encoders": None},
     "nlp_bert": None
 }
 
+# Artifact files behind each model; their fingerprint versions the prediction cache
+ARTIFACT_FILES = {
+    **CARDIO_ARTIFACTS,
+    "diabetes_xgb": ["diabetes_xgboost_model.pkl", "diabetes_label_encoders.pkl", "diabetes_feature_info.pkl"],
+    "idiopathic": ["idiopathic_model.pth", "idiopathic_scaler.pkl", "idiopathic_encoders.pkl"],
+}
+
+# --- Prediction Memo Cache ---
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("PREDICTION_CACHE_ENTRIES", "50000")),
+    max_bytes=int(os.getenv("PREDICTION_CACHE_MB", "32")) * 1024 * 1024,
+)
+request_log = RequestLog(os.getenv("REQUEST_LOG_PATH", "requests.jsonl"), enabled=os.getenv("REQUEST_LOG_ENABLED", "0") == "1")
+
+# --- HTTP Caching (ETag / Cache-Control) ---
+# Models whose version determines each deterministic endpoint's response
+ENDPOINT_MODELS = {
+    "/predict": ["cardio_nn"],
+    "/predict/cardiovascular/result": ["cardio_xgb", "cardio_nn"],
+    "/predict/cardiovascular/explanation": ["cardio_xgb", "cardio_nn"],  # TreeSHAP, else NN attributions
+    "/predict/diabetes": ["diabetes_xgb"],
+    "/predict/idiopathic": ["idiopathic"],
+}
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "3600"))
+payload_store = PayloadStore(max_entries=int(os.getenv("PAYLOAD_STORE_ENTRIES", "100000")))
+
+# Settings that change an endpoint's answer without changing any model file
+ENDPOINT_SETTINGS = {
+    "/predict/cardiovascular/explanation": lambda: f"attribution={CARDIO_NN_ATTRIBUTION}:{CARDIO_NN_IG_STEPS}",
+}
+
+def served_version(model: str) -> Optional[str]:
+    # Cardio entries carry the version they were installed with; the other models use the artifact fingerprint
+    return artifacts[model].get("version") or prediction_cache.version(model)
+
+def endpoint_model_version(endpoint: str) -> str:
+    parts = [f"{name}={served_version(name) if artifacts[name]['model'] else 'unloaded'}" for name in ENDPOINT_MODELS[endpoint]]
+    if endpoint in ENDPOINT_SETTINGS: parts.append(ENDPOINT_SETTINGS[endpoint]())
+    return ";".join(parts)
+
+def prediction_cache_headers(endpoint: str, payload_hash: str, result: Any, shared: bool = True, replayable: bool = True) -> Dict[str, str]:
+    """
+    The ETag covers the body actually served as well as the model versions. Content-Location is only
+    sent when the GET twin replays this same answer.
+    """
+    headers = {
+        "ETag": make_etag(endpoint, payload_hash, endpoint_model_version(endpoint), body_digest(dumps(shaped(result)))),
+        # While the rank is missing, caches must revalidate: the ETag changes once the index is ready
+        "Cache-Control": "no-cache" if percentile_pending(result) else f"{'public' if shared else 'private'}, max-age={HTTP_CACHE_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if replayable: headers["Content-Location"] = f"{endpoint}/{payload_hash}"
+    return headers
+
+# --- Speculative Prefetch ---
+# A served cardio result is usually followed by its explanation and a report for the same payload
+prefetcher = SpeculativePrefetcher(
+    max_workers=int(os.getenv("PREFETCH_WORKERS", "2")),
+    max_pending=int(os.getenv("PREFETCH_MAX_PENDING", "8")),
+    ttl=float(os.getenv("PREFETCH_TTL", "60")),
+    max_load=int(os.getenv("PREFETCH_MAX_ACTIVE_REQUESTS", "8")),
+    load_fn=lambda: active_requests,
+)
+# Reports call the external Gemini API with patient data, so they are only prefetched on request
+PREFETCH_REPORTS = os.getenv("PREFETCH_REPORTS", "0") == "1"
+
+# Live input/prediction drift against a cardio_train.csv profile (created at startup)
+DRIFT_REFERENCE_PATH = os.getenv("DRIFT_REFERENCE_PATH", "cardio_drift_reference.json")
+drift_monitor: Optional[DriftMonitor] = None
+
+def build_cardio_drift_reference() -> Dict[str, Any]:
+    with open("cardio_train.csv", "rb") as f:
+        columns = read_columns(f.read(), "csv")
+    valid = validate_columns(columns)
+    columns = {c: v[valid] for c, v in columns.items()}
+    predictions = {f"cardio_{b}": score_cardio_columns(columns, b) for b in ("nn", "xgb") if artifacts[f"cardio_{b}"]["model"]}
+    return build_reference(columns, list(CARDIO_RANGES), list(CARDIO_CODES), predictions)
+
+# Population percentile ranks ("higher than 82% of patients your age and sex"), one index per model version
+PERCENTILE_BAND_YEARS = int(os.getenv("PERCENTILE_BAND_YEARS", "5"))
+PERCENTILE_RETRY_SECONDS = float(os.getenv("PERCENTILE_RETRY_SECONDS", "300"))
+
+def cardio_percentile_path(model: str) -> str:
+    # Stored next to the model artifact
+    return os.path.join(os.path.dirname(CARDIO_ARTIFACTS[model][0]), f"{model}_percentiles.npz")
+
+def build_cardio_percentile_index(model: str, version: str) -> PercentileIndex:
+    with open("cardio_train.csv", "rb") as f:
+        columns = read_columns(f.read(), "csv")
+    valid = validate_columns(columns)
+    columns = {c: v[valid] for c, v in columns.items()}
+    probs = score_cardio_columns(columns, model.split("_", 1)[1])
+    return PercentileIndex.build(columns["age"], columns["gender"], probs, version, PERCENTILE_BAND_YEARS)
+
+percentile_indexes = PercentileIndexStore(cardio_percentile_path, build_cardio_percentile_index, retry_after=PERCENTILE_RETRY_SECONDS)
+
+# k-nearest historical patients in the NN scaler space (KD-tree over cardio_train.csv, created at startup)
+SIMILAR_MAX_K = int(os.getenv("SIMILAR_MAX_K", "100"))
+similar_patients: Optional[SimilarPatientIndex] = None
+
+def cardio_percentile(model: str, prob: float, input_data: CardioInput) -> Optional[Dict[str, Any]]:
+    index = percentile_indexes.get(model, served_version(model))
+    return index.rank(prob, input_data.age, input_data.gender) if index else None
+
+def percentile_pending(result: Any) -> bool:
+    # The rank is omitted while the index for the current model version is rebuilt (the ensemble has none)
+    return isinstance(result, dict) and "percentile" in result and result["percentile"] is None and result.get("backend") != "cardio_ensemble"
+
+def observe_cardio_drift(input_data: CardioInput, predictions: Dict[str, float]):
+    if drift_monitor: drift_monitor.observe(input_data.model_dump(), predictions)
+
+def observe_cardio_drift_batch(columns: Dict[str, np.ndarray], valid: np.ndarray, predictions: Dict[str, np.ndarray]):
+    if drift_monitor and valid.any():
+        drift_monitor.observe_batch({c: v[valid] for c, v in columns.items()}, {m: p[valid] for m, p in predictions.items()})
+
+def set_cache_headers(response: Optional[Response], endpoint: str, input_data, result: Any, replayable: bool = True):
+    # Called once the result is known; POST responses point at their cacheable GET twin via Content-Location
+    if response is None: return
+    payload_hash = payload_store.put(input_data.model_dump())
+    response.headers.update(prediction_cache_headers(endpoint, payload_hash, result, shared=False, replayable=replayable))
+
+def set_no_store(response: Optional[Response]):
+    if response is not None: response.headers["Cache-Control"] = "no-store"
+
 # --- Helper Functions ---
+RISK_CATEGORIES = ['Low', 'Medium', 'High']
+RISK_THRESHOLDS = [0.3, 0.7]
+
 def get_risk_category(probability: float) -> str:
-    if probability < 0.3: return 'Low'
-    elif probability < 0.7: return 'Medium'
+    if probability < RISK_THRESHOLDS[0]: return 'Low'
+    elif probability < RISK_THRESHOLDS[1]: return 'Medium'
     else: return 'High'
 
 def format_shap_explanation(shap_values, feature_names, feature_values):
@@ -115,9 +288,105 @@ def format_shap_explanation(shap_values, feature_names, feature_values):
     explanations.sort(key=lambda x: x['importance'], reverse=True)
     return {'explanations': explanations, 'top_factors': explanations[:5]}
 
+# --- Feature Builders ---
+CARDIO_NN_FEATURES = ['gender', 'height', 'weight', 'ap_hi', 'ap_lo', 'cholesterol', 'gluc', 'smoke', 'alco', 'active', 'age']
+CARDIO_XGB_FEATURES = ['age', 'gender', 'height', 'weight', 'ap_hi', 'ap_lo', 'cholesterol', 'gluc', 'smoke', 'alco', 'active']
+
+def cardio_nn_features(input_data: CardioInput) -> np.ndarray:
+    # NN Feature Order (scaler.pkl): gender, height, weight, ap_hi, ap_lo, cholesterol, gluc, smoke, alco, active, age (years)
+    return np.array([[input_data.gender, input_data.height, input_data.weight, input_data.ap_hi, input_data.ap_lo, input_data.cholesterol, input_data.gluc, input_data.smoke, input_data.alco, input_data.active, input_data.age / 365.25]])
+
+def cardio_xgb_features(input_data: CardioInput) -> np.ndarray:
+    # XGB Feature Order: age (years), gender, height, weight, ap_hi, ap_lo, cholesterol, gluc, smoke, alco, active
+    return np.array([[input_data.age / 365.25, input_data.gender, input_data.height, input_data.weight, input_data.ap_hi, input_data.ap_lo, input_data.cholesterol, input_data.gluc, input_data.smoke, input_data.alco, input_data.active]])
+
+def cardio_nn_torch_prob(entry: Dict[str, Any], features: np.ndarray) -> float:
+    scaled = entry["scaler"].transform(features)
+    with torch.no_grad():
+        return torch.sigmoid(entry["model"](torch.FloatTensor(scaled))).item()
+
+# Cardio backends, best first: name -> (uncached single-row prediction from an artifacts entry, feature builder)
+CARDIO_BACKENDS = {
+    "cardio_xgb": (lambda entry, features: float(entry["model"].predict_proba(features)[0][1]), cardio_xgb_features),
+    "cardio_nn": (cardio_nn_torch_prob, cardio_nn_features),
+    "cardio_numpy": (lambda entry, features: float(entry["model"].predict(features)[0]), cardio_nn_features),
+}
+cardio_router = BackendRouter(
+    list(CARDIO_BACKENDS),
+    available=lambda backend: artifacts[backend]["model"] is not None,
+    policy=os.getenv("CARDIO_ROUTING_POLICY", "quality"),
+    max_load=int(os.getenv("ROUTING_MAX_ACTIVE_REQUESTS", "8")),
+    load_fn=lambda: active_requests,
+)
+
+def cardio_model_family(backend: str) -> str:
+    # The NumPy backend is the NN's own weights: it shares the NN's cache entries, percentiles and drift stream
+    return "cardio_xgb" if backend == "cardio_xgb" else "cardio_nn"
+
+def predict_cardio_prob(backend: str, features: np.ndarray) -> float:
+    # One read of the entry: a hot swap can't pair the new model with the old cache version, or vice versa
+    entry = artifacts[backend]
+    compute = cardio_router.timed(backend, lambda: CARDIO_BACKENDS[backend][0](entry, features))
+    return prediction_cache.memoize(cardio_model_family(backend), canonical_features(features[0]), compute, version=entry.get("version"))
+
+# Shadow / canary evaluation of a candidate NN (CARDIO_CANDIDATE_MODEL) on live traffic
+cardio_shadow = ShadowEvaluator(
+    sample_rate=float(os.getenv("SHADOW_SAMPLE_RATE", "0.1")),
+    canary_rate=float(os.getenv("CANARY_PERCENT", "0")) / 100,
+    max_pending=int(os.getenv("SHADOW_MAX_PENDING", "32")),
+    thresholds=RISK_THRESHOLDS,
+)
+
+def cardio_candidate_prob(features: np.ndarray) -> float:
+    return float(predict_cardio_nn_batch(artifacts["cardio_candidate"]["model"], artifacts["cardio_candidate"]["scaler"], features)[0])
+
+def serve_cardio_prob(nn_features: np.ndarray, backend: str, features: np.ndarray, response: Optional[Response]) -> Tuple[float, bool]:
+    """
+    (probability, served by the canary). Only live requests are compared; the non-serving model runs in shadow.
+    The candidate is a retrained NN, so it only stands in for (and is compared with) answers of the NN family:
+    requests routed to XGBoost are neither sampled nor canaried, and the stats are never a mix of primaries.
+    The primary answer is memoized but the candidate's is not, so the primary's side of a latency pair is
+    always an uncached forward pass, timed off the response path; a repeated payload can't make it look free.
+    """
+    primary = lambda: predict_cardio_prob(backend, features)
+    if response is None or cardio_model_family(backend) != "cardio_nn" or artifacts["cardio_candidate"]["model"] is None: return primary(), False
+    entry = artifacts[backend]
+    primary_forward = lambda: CARDIO_BACKENDS[backend][0](entry, features)
+    route = cardio_shadow.route()
+    if route == "canary":
+        started = time.perf_counter()
+        prob = cardio_candidate_prob(nn_features)
+        cardio_shadow.submit(prob, "candidate", (time.perf_counter() - started) * 1000, primary_forward)
+        # Canary answers must not be cached as the primary model's answer for this payload
+        response.headers["Cache-Control"] = "no-store"
+        response.headers["X-Model-Backend"] = "cardio_candidate"
+        return prob, True
+    prob = primary()
+    if route == "shadow": cardio_shadow.submit(prob, "primary", None, lambda: cardio_candidate_prob(nn_features), served_forward=primary_forward)
+    return prob, False
+
+# MC-dropout uncertainty (opt-in per request via ?uncertainty=true&passes=K)
+MC_DROPOUT_MAX_PASSES = int(os.getenv("MC_DROPOUT_MAX_PASSES", "200"))
+MC_DROPOUT_LEVEL = float(os.getenv("MC_DROPOUT_LEVEL", "0.9"))
+
+def cardio_nn_uncertainty(features: np.ndarray, passes: int) -> Dict[str, Any]:
+    if not 2 <= passes <= MC_DROPOUT_MAX_PASSES: raise HTTPException(400, f"passes must be between 2 and {MC_DROPOUT_MAX_PASSES}")
+    entry = artifacts["cardio_nn"]
+    def compute():
+        summary = mc_summary(predict_cardio_nn_mc(entry["model"], entry["scaler"], features, passes), MC_DROPOUT_LEVEL)
+        return {"model": "cardio_nn", "passes": passes, "mean": float(summary["mean"][0]), "std": float(summary["std"][0]),
+                "level": MC_DROPOUT_LEVEL, "interval": [float(summary["lower"][0]), float(summary["upper"][0])]}
+    # Masks are seeded, so the estimate is deterministic and can be memoized like a point prediction
+    return prediction_cache.memoize("cardio_nn", canonical_features(features[0]) + ("mc", passes, MC_DROPOUT_LEVEL), compute, version=entry.get("version"))
+
+def predict_cardio_xgb_prob(features: np.ndarray) -> float:
+    return predict_cardio_prob("cardio_xgb", features)
+
 # Gemini Report Generation
 @app.post("/generate_report")
 def generate_report_endpoint(input_data: ReportInput):
+    prefetched = prefetcher.get(("report", input_hash(input_data.model_dump())))
+    if prefetched is not None: return prefetched
     try:
         report = generate_medical_report(input_data.prediction, input_data.symptoms)
         return {"report": report}
@@ -159,119 +428,476 @@ def startup_event():
     print(f" Docs URL:    http://{local_ip}:8004/docs")
     print("="*50 + "\n")
 
+    # One memory-mapped bundle (python artifact_bundle.py build) replaces the per-model files it covers
+    if os.path.exists(BUNDLE_PATH):
+        try:
+            bundle = ArtifactBundle(BUNDLE_PATH)
+            mapped = []
+            for name in bundle.models:
+                stale = bundle.stale(name)
+                if stale:
+                    print(f"Artifact Bundle: {name} files changed since it was built ({', '.join(stale)}); serving them until it is rebuilt.")
+                    continue
+                ARTIFACT_FILES[name] = [BUNDLE_PATH]
+                mapped.append(name)
+            print(f"Artifact Bundle {bundle.version} Mapped ({', '.join(mapped) or 'no current sections'}).")
+        except Exception as e: print(f"Artifact Bundle Failed, using separate files: {e}")
+
+    for name, paths in ARTIFACT_FILES.items():
+        prediction_cache.register(name, paths)
+
     # 1. Cardio NN
     try:
-        artifacts["cardio_nn"]["scaler"] = joblib.load("scaler.pkl")
-        model = CardioNN(11)
-        model.load_state_dict(torch.load("cardio_model.pth"))
-        model.eval()
-        artifacts["cardio_nn"]["model"] = model
+        model, scaler = load_cardio_nn(*ARTIFACT_FILES["cardio_nn"])
+        version = prediction_cache.version("cardio_nn")
+        artifacts["cardio_numpy"] = {"model": CardioNNNumpy(model, scaler), "version": version}
+        artifacts["cardio_nn"] = {"model": model, "scaler": scaler, "version": version}
         print("Cardio NN Loaded.")
     except Exception as e: print(f"Cardio NN Failed: {e}")
 
-    # 2. Cardio XGB
+    # Candidate NN for shadow/canary evaluation (same scaler unless CARDIO_CANDIDATE_SCALER is set)
+    candidate_path = os.getenv("CARDIO_CANDIDATE_MODEL")
+    if candidate_path:
+        try:
+            artifacts["cardio_candidate"]["model"], artifacts["cardio_candidate"]["scaler"] = load_cardio_nn(candidate_path, os.getenv("CARDIO_CANDIDATE_SCALER", "scaler.pkl"))
+            print(f"Cardio Candidate Loaded ({candidate_path}; shadow {cardio_shadow.sample_rate:.0%}, canary {cardio_shadow.canary_rate:.0%}).")
+        except Exception as e: print(f"Cardio Candidate Failed: {e}")
+
+    # 2. Cardio XGB (off unless CARDIO_XGB_ENABLED=1; it has crashed at load on some machines)
     try:
-        # artifacts["cardio_xgb"]["model"] = joblib.load("xgboost_model.pkl")
-        # try: artifacts["cardio_xgb"]["explainer"] = shap.TreeExplainer(artifacts["cardio_xgb"]["model"])
-        # except: pass
-        print("Cardio XGB Skipped (Crash).")
+        if os.getenv("CARDIO_XGB_ENABLED", "0") == "1":
+            model = load_cardio_xgb(*ARTIFACT_FILES["cardio_xgb"])
+            try: explainer = shap.TreeExplainer(model)
+            except: explainer = None
+            artifacts["cardio_xgb"] = {"model": model, "explainer": explainer, "version": prediction_cache.version("cardio_xgb")}
+            print("Cardio XGB Loaded.")
+        else:
+            print("Cardio XGB Skipped (Crash).")
     except Exception as e: print(f"Cardio XGB Failed: {e}")
 
+    # Measure every loaded cardio backend once, so latency routing works from the first request
+    try:
+        example = CardioInput(**CardioInput.model_config["json_schema_extra"]["example"])
+        cardio_router.calibrate({b: (lambda b=b: CARDIO_BACKENDS[b][0](artifacts[b], CARDIO_BACKENDS[b][1](example)))
+                                 for b in CARDIO_BACKENDS if artifacts[b]["model"] is not None})
+        print(f"Cardio Routing Ready ({cardio_router.policy}: " + ", ".join(f"{b} {v['ewma_ms']}ms" for b, v in cardio_router.stats()["backends"].items() if v["ewma_ms"] is not None) + ").")
+    except Exception as e: print(f"Cardio Routing Calibration Failed: {e}")
+
     # 3. Diabetes
     try:
         # artifacts["diabetes_xgb"]["model"] = joblib.load("diabetes_xgboost_model.pkl")
-        with open("diabetes_label_encoders.pkl", "rb") as f: artifacts["diabetes_xgb"]["encoders"] = pickle.load(f)
-        with open("diabetes_feature_info.pkl", "rb") as f: artifacts["diabetes_xgb"]["features"] = pickle.load(f)
+        if ARTIFACT_FILES["diabetes_xgb"] == [BUNDLE_PATH]:
+            meta = ArtifactBundle(BUNDLE_PATH).metadata("diabetes_xgb")
+            artifacts["diabetes_xgb"]["encoders"], artifacts["diabetes_xgb"]["features"] = label_encoders(meta["encoders"]), meta["feature_info"]
+        else:
+            with open("diabetes_label_encoders.pkl", "rb") as f: artifacts["diabetes_xgb"]["encoders"] = pickle.load(f)
+            with open("diabetes_feature_info.pkl", "rb") as f: artifacts["diabetes_xgb"]["features"] = pickle.load(f)
         # try: artifacts["diabetes_xgb"]["explainer"] = shap.TreeExplainer(artifacts["diabetes_xgb"]["model"])
         # except: pass
         print("Diabetes Skipped (Crash).")
     except Exception as e: print(f"Diabetes Failed: {e}")
 
-    # 4. Idiopathic
+    # 4. Idiopathic: precomputed over every valid input, so requests never touch torch
     try:
-        model_ipf = IdiopathicNN(input_dim=3)
-        # model_ipf.load_state_dict(torch.load("idiopathic_model.pth"))
-        # model_ipf.eval()
-        artifacts["idiopathic"]["model"] = None # model_ipf
-        # artifacts["idiopathic"]["scaler"] = joblib.load("idiopathic_scaler.pkl")
-        # artifacts["idiopathic"]["encoders"] = joblib.load("idiopathic_encoders.pkl")
-        print("Idiopathic Skipped (Stability).")
+        artifacts["idiopathic"]["model"] = load_idiopathic_table(*ARTIFACT_FILES["idiopathic"], version=prediction_cache.version("idiopathic"))
+        print(f"Idiopathic Lookup Table Ready ({artifacts['idiopathic']['model'].risk.size} inputs).")
     except Exception as e: print(f"Idiopathic Failed: {e}")
 
-    # 5. NLP - ClinicalBERT
-    # 5. NLP - ClinicalBERT
+    # Serve the registry's current versions where there are any (replacing the root files above) and follow them
+    try:
+        model_hot_swapper.sync_all()
+        if model_registry.models() and MODEL_REGISTRY_POLL > 0: model_hot_swapper.start()
+        print(f"Model Registry: {model_hot_swapper.loaded or 'no registered versions'}.")
+    except Exception as e: print(f"Model Registry Failed: {e}")
+
+    # 5. NLP - ClinicalBERT (weights are fetched on the first request, not at startup)
     try:
-        print("Loading ClinicalBERT...")
-        # artifacts["nlp_bert"] = pipeline("fill-mask", model="medicalai/ClinicalBERT")
-        print("ClinicalBERT Skipped (Stability).")
+        artifacts["nlp_bert"] = ClinicalBertServer(
+            model_name=os.getenv("CLINICAL_BERT_MODEL", "medicalai/ClinicalBERT"),
+            quantize=os.getenv("CLINICAL_BERT_QUANTIZE", "1") == "1",
+            max_batch=int(os.getenv("CLINICAL_BERT_MAX_BATCH", "16")),
+            window_stride=int(os.getenv("CLINICAL_BERT_WINDOW_STRIDE", "0")) or None,
+            vocab_file=os.getenv("CLINICAL_BERT_VOCAB_FILE"),
+        )
+        print("ClinicalBERT Registered (Lazy Load).")
     except Exception as e: print(f"ClinicalBERT Failed: {e}")
 
+    # 6. Percentile index for the served model (cached next to the artifact, rebuilt when the model changes)
+    if artifacts["cardio_nn"]["model"]:
+        try:
+            index = percentile_indexes.load_or_build("cardio_nn", prediction_cache.version("cardio_nn"))
+            print(f"Percentile Index Ready ({len(index.overall)} reference rows).")
+        except Exception as e: print(f"Percentile Index Failed: {e}")
+
+    # 7. Similar-patient index (needs the NN scaler)
+    global similar_patients
+    if artifacts["cardio_nn"]["scaler"] is not None:
+        try:
+            similar_patients = SimilarPatientIndex.from_csv("cardio_train.csv", artifacts["cardio_nn"]["scaler"])
+            print(f"Similar Patients Index Ready ({len(similar_patients)} rows).")
+        except Exception as e: print(f"Similar Patients Index Failed: {e}")
+
+    # 8. Drift monitor reference profile (cached on disk, rebuilt when the data or model changes)
+    global drift_monitor
+    if os.getenv("DRIFT_MONITOR_ENABLED", "1") == "1":
+        try:
+            reference = load_or_build_reference(DRIFT_REFERENCE_PATH, ["cardio_train.csv"] + ARTIFACT_FILES["cardio_nn"], build_cardio_drift_reference)
+            drift_monitor = DriftMonitor(reference, min_samples=int(os.getenv("DRIFT_MIN_SAMPLES", "100")))
+            print(f"Drift Monitor Ready ({reference['rows']} reference rows).")
+        except Exception as e: print(f"Drift Monitor Failed: {e}")
+
+    # 9. Population insights for the served model (if the offline job has been run for this version)
+    try:
+        version, payloads = cardio_insights_payloads("cardio_nn")
+        print(f"Population Insights {'Loaded' if payloads else 'Missing'} (cardio_nn {version}).")
+    except Exception as e: print(f"Population Insights Failed: {e}")
+
+    # 10. Warm the prediction cache with the most frequent logged payloads
+    try:
+        warm_prediction_cache(int(os.getenv("PREDICTION_CACHE_WARMUP", "1000")))
+    except Exception as e: print(f"Prediction Cache Warmup Failed: {e}")
+
 
 # --- Endpoints ---
 
 @app.get("/health")
 def health():
-    return {
-        "status": "online", 
-        "models": {k: (v if k=='nlp_bert' else v['model']) is not None for k,v in artifacts.items()}
-    }
+    bert = artifacts["nlp_bert"]
+    models = {k: v['model'] is not None for k, v in artifacts.items() if k != 'nlp_bert'}
+    models["nlp_bert"] = bool(bert and bert.loaded)  # loaded lazily, on the first fill-mask request
+    status = {"status": "online", "models": models}
+    if bert and bert.load_error: status["load_errors"] = {"nlp_bert": bert.load_error}
+    return status
 
 # Cardio NN
-@app.post("/predict", response_model=CardioPrediction)
-def predict_original(input_data: CardioInput):
+@app.post("/predict", response_model=CardioPrediction, response_model_exclude_none=True)
+def predict_original(input_data: CardioInput, response: Response = None, uncertainty: bool = False, passes: int = 50):
     if not artifacts["cardio_nn"]["model"]: raise HTTPException(503, "Model not loaded")
-    age_years = input_data.age / 365.25
-    features = np.array([[input_data.gender, input_data.height, input_data.weight, input_data.ap_hi, input_data.ap_lo, input_data.cholesterol, input_data.gluc, input_data.smoke, input_data.alco, input_data.active, age_years]])
-    scaled = artifacts["cardio_nn"]["scaler"].transform(features)
-    with torch.no_grad():
-        prob = torch.sigmoid(artifacts["cardio_nn"]["model"](torch.FloatTensor(scaled))).item()
-    return {"probability": prob, "prediction": 1 if prob > 0.5 else 0, "message": "High risk" if prob > 0.5 else "Low risk"}
+    request_log.record("/predict", input_data.model_dump())
+    features = cardio_nn_features(input_data)
+    prob, canary = serve_cardio_prob(features, "cardio_nn", features, response)
+    if response is not None: observe_cardio_drift(input_data, {"cardio_candidate" if canary else "cardio_nn": prob})
+    result = {"probability": prob, "prediction": 1 if prob > 0.5 else 0, "message": "High risk" if prob > 0.5 else "Low risk",
+              "percentile": cardio_percentile("cardio_nn", prob, input_data)}
+    # The GET twin serves the plain prediction, so uncertainty responses carry no cache headers
+    if uncertainty: result["uncertainty"] = cardio_nn_uncertainty(cardio_nn_features(input_data), passes)
+    elif canary: set_no_store(response)  # the candidate's answer is not what the GET twin replays
+    else: set_cache_headers(response, "/predict", input_data, result)
+    return result
 
 # Cardio XGB
 @app.post("/predict/cardiovascular/result")
-def predict_cardio_xgb1(input_data: CardioInput):
-    # Try XGBoost
-    if artifacts["cardio_xgb"]["model"]: 
-        age_years = input_data.age / 365.25
-        height_m = input_data.height / 100
-        # XGB Feature Order: age, gender, height, weight, ap_hi, ap_lo, cholesterol, gluc, smoke, alco, active
-        features = np.array([[age_years, input_data.gender, input_data.height, input_data.weight, input_data.ap_hi, input_data.ap_lo, input_data.cholesterol, input_data.gluc, input_data.smoke, input_data.alco, input_data.active]])
-        model = artifacts["cardio_xgb"]["model"]
-        prob = float(model.predict_proba(features)[0][1])
-        return {"risk_probability": prob, "risk_category": get_risk_category(prob)}
-    
-    # Fallback to NN if available
-    if artifacts["cardio_nn"]["model"]:
-        print("WARNING: XGBoost model not loaded. Falling back to Neural Network.")
-        age_years = input_data.age / 365.25
-        # NN Feature Order: gender, height, weight, ap_hi, ap_lo, cholesterol, gluc, smoke, alco, active, age
-        features = np.array([[input_data.gender, input_data.height, input_data.weight, input_data.ap_hi, input_data.ap_lo, input_data.cholesterol, input_data.gluc, input_data.smoke, input_data.alco, input_data.active, age_years]])
-        scaled = artifacts["cardio_nn"]["scaler"].transform(features)
-        with torch.no_grad():
-            prob = torch.sigmoid(artifacts["cardio_nn"]["model"](torch.FloatTensor(scaled))).item()
-        return {"risk_probability": prob, "risk_category": get_risk_category(prob)}
-        
-    raise HTTPException(503, "Model not loaded")
+def predict_cardio_xgb1(input_data: CardioInput, response: Response = None, request: Request = None, uncertainty: bool = False, passes: int = 50,
+                        model: str = "auto"):
+    if model not in ("auto", "ensemble"): raise HTTPException(400, f"Unknown model '{model}' (use auto or ensemble)")
+    request_log.record("/predict/cardiovascular/result", input_data.model_dump())
+    slo = request.headers.get("x-latency-slo-ms") if request is not None else None
+    if model == "ensemble":
+        cardio_batch_backend(model)
+        scored = cardio_ensemble.score({m: (lambda m=m: predict_cardio_prob(m, CARDIO_BACKENDS[m][1](input_data))) for m in cardio_ensemble.weights})
+        backend, degraded, canary, prob = "cardio_ensemble", False, False, float(scored["risk_probability"])
+        predictions = {m: float(p) for m, p in scored["members"].items()}
+        result = {"risk_probability": prob, "risk_category": get_risk_category(prob), "percentile": None, "backend": backend,
+                  "members": predictions, "disagreement": float(scored["disagreement"])}
+    else:
+        # Route to XGBoost, the NN or its NumPy copy (latency SLO header, policy and load)
+        try:
+            backend, degraded = cardio_router.choose(float(slo) if slo else None)
+        except ValueError: raise HTTPException(400, "X-Latency-SLO-Ms must be a number")
+        except LookupError: raise HTTPException(503, "Model not loaded")
+        family = cardio_model_family(backend)
+        features = CARDIO_BACKENDS[backend][1](input_data)
+        prob, canary = serve_cardio_prob(cardio_nn_features(input_data), backend, features, response)
+        if canary: backend, family = "cardio_candidate", "cardio_nn"
+        predictions = {backend if canary else family: prob}
+        result = {"risk_probability": prob, "risk_category": get_risk_category(prob), "percentile": cardio_percentile(family, prob, input_data), "backend": backend}
+    if degraded: result["degraded"] = True
+    if uncertainty:
+        if not artifacts["cardio_nn"]["model"]: raise HTTPException(503, "Uncertainty requires the Cardio NN model")
+        result["uncertainty"] = cardio_nn_uncertainty(cardio_nn_features(input_data), passes)
+    # The GET twin replays the policy route, so only that answer is cacheable (not one picked by SLO or load)
+    elif degraded or slo or canary: set_no_store(response)
+    # The GET twin has no ?model=, so ensemble answers keep their ETag but get no Content-Location
+    else: set_cache_headers(response, "/predict/cardiovascular/result", input_data, result, replayable=model != "ensemble")
+
+    # Only for live requests (response is None for cache warmup and GET-by-hash replays)
+    if response is not None:
+        response.headers["X-Model-Backend"] = backend
+        observe_cardio_drift(input_data, predictions)
+        if not degraded: prefetch_cardio_followups(input_data, result)
+    return result
+
+def cardio_explanation_key(input_data: CardioInput) -> Tuple[str, str, str]:
+    # Versioned, so an explanation prefetched before a model swap is never served after it
+    return ("explanation", input_hash(input_data.model_dump()), endpoint_model_version("/predict/cardiovascular/explanation"))
+
+def prefetch_cardio_followups(input_data: CardioInput, result: Dict[str, Any]):
+    if artifacts["cardio_xgb"]["explainer"] or artifacts["cardio_nn"]["model"]:
+        prefetcher.schedule(cardio_explanation_key(input_data), lambda: compute_cardio_explanation(input_data))
+    if PREFETCH_REPORTS:
+        # Same body the dashboard sends: {"prediction": <result>, "symptoms": []}
+        report_input = ReportInput(prediction=result, symptoms=[])
+        prefetcher.schedule(("report", input_hash(report_input.model_dump())),
+                            lambda: {"report": generate_medical_report(report_input.prediction, report_input.symptoms)})
 
 @app.post("/predict/cardiovascular/explanation")
-def predict_cardio_xgb2(input_data: CardioInput):
-    # Explanations only if XGB explainer is available
+def predict_cardio_xgb2(input_data: CardioInput, response: Response = None):
+    result = prefetcher.get(cardio_explanation_key(input_data))
+    if result is None: result = compute_cardio_explanation(input_data)
+    set_cache_headers(response, "/predict/cardiovascular/explanation", input_data, result)
+    return result
+
+CARDIO_NN_ATTRIBUTION = os.getenv("CARDIO_NN_ATTRIBUTION", "integrated_gradients")
+CARDIO_NN_IG_STEPS = int(os.getenv("CARDIO_NN_IG_STEPS", "16"))
+
+def compute_cardio_explanation(input_data: CardioInput) -> Dict[str, Any]:
+    # TreeSHAP when the XGB explainer is available
     if artifacts["cardio_xgb"]["model"] and artifacts["cardio_xgb"]["explainer"]:
-        age_years = input_data.age / 365.25
-        features = np.array([[age_years, input_data.gender, input_data.height, input_data.weight, input_data.ap_hi, input_data.ap_lo, input_data.cholesterol, input_data.gluc, input_data.smoke, input_data.alco, input_data.active]])
+        features = cardio_xgb_features(input_data)
         shap_vals = artifacts["cardio_xgb"]["explainer"].shap_values(features)
-        feature_names = ['age', 'gender', 'height', 'weight', 'ap_hi', 'ap_lo', 'cholesterol', 'gluc', 'smoke', 'alco', 'active']
-        expl = format_shap_explanation(shap_vals, feature_names, features)
+        expl = format_shap_explanation(shap_vals, CARDIO_XGB_FEATURES, features)
         return {"explanations": expl}
-    
+    # NN fallback: integrated-gradients attributions (log-odds vs. the average training patient)
+    if artifacts["cardio_nn"]["model"]:
+        features = cardio_nn_features(input_data)
+        attributions = cardio_nn_attributions(artifacts["cardio_nn"]["model"], artifacts["cardio_nn"]["scaler"], features,
+                                              method=CARDIO_NN_ATTRIBUTION, steps=CARDIO_NN_IG_STEPS)
+        return {"explanations": format_shap_explanation(attributions, CARDIO_NN_FEATURES, features), "method": CARDIO_NN_ATTRIBUTION}
+
     return {"explanations": None, "message": "No explanations available (Model missing or fallback used)"}
 
+# Cardio Bulk (columnar)
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_MB", "256")) * 1024 * 1024
+BULK_MAX_DECOMPRESSED_BYTES = int(os.getenv("BULK_MAX_DECOMPRESSED_MB", "1024")) * 1024 * 1024
+
+@app.post("/predict/cardiovascular/bulk")
+async def predict_cardio_bulk(request: Request, model: str = "auto", format: Optional[str] = None):
+    """
+    Scores a columnar payload: CSV (cardio_train.csv layout), .npy, .npz or Arrow IPC, optionally
+    gzip-compressed. Results come back in the same format.
+    """
+    too_large = HTTPException(413, f"Bulk payload exceeds {BULK_MAX_BYTES // (1024 * 1024)} MB")
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > BULK_MAX_BYTES: raise too_large
+    parts, size = [], 0
+    async for data in request.stream():
+        size += len(data)
+        if size > BULK_MAX_BYTES: raise too_large
+        parts.append(data)
+    return await run_in_threadpool(score_cardio_bulk, b"".join(parts), request.headers.get("content-type"), model, format)
+
+# NN + XGB ensemble: both members scored concurrently, combined with CARDIO_ENSEMBLE_WEIGHTS
+cardio_ensemble = CardioEnsemble(parse_weights(os.getenv("CARDIO_ENSEMBLE_WEIGHTS", "nn=0.5,xgb=0.5")))
+
+def cardio_batch_backend(model: str) -> str:
+    if model == "auto": model = "xgb" if artifacts["cardio_xgb"]["model"] else "nn"
+    if model == "ensemble":
+        missing = [m for m in cardio_ensemble.weights if not artifacts[m]["model"]]
+        if missing: raise HTTPException(503, f"Ensemble needs {', '.join(missing)} (not loaded)")
+        return model
+    if model not in ("nn", "xgb"): raise HTTPException(400, f"Unknown model '{model}' (use auto, nn, xgb or ensemble)")
+    if not artifacts[f"cardio_{model}"]["model"]: raise HTTPException(503, f"Cardio {model.upper()} model not loaded")
+    return model
+
+def score_cardio_ensemble(columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    return cardio_ensemble.score({m: (lambda m=m: score_cardio_columns(columns, m.split("_", 1)[1])) for m in cardio_ensemble.weights})
+
+def score_cardio_columns(columns: Dict[str, np.ndarray], backend: str) -> np.ndarray:
+    if backend == "ensemble":
+        return score_cardio_ensemble(columns)["risk_probability"].astype(np.float32)
+    if backend == "xgb":
+        return predict_cardio_xgb_batch(artifacts["cardio_xgb"]["model"], cardio_matrix(columns, CARDIO_XGB_ORDER))
+    return predict_cardio_nn_batch(artifacts["cardio_nn"]["model"], artifacts["cardio_nn"]["scaler"], cardio_matrix(columns, CARDIO_NN_ORDER))
+
+def score_valid_rows(columns: Dict[str, np.ndarray], valid: np.ndarray, backend: str) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """(output columns, per-model probabilities for drift). Invalid rows are NaN; the ensemble adds disagreement and member columns."""
+    nan = lambda: np.full(len(valid), np.nan, dtype=np.float32)
+    if backend != "ensemble":
+        probs = nan()
+        if valid.any(): probs[valid] = score_cardio_columns({c: v[valid] for c, v in columns.items()}, backend)
+        return {"risk_probability": probs}, {f"cardio_{backend}": probs}
+    names = ["risk_probability", "disagreement"] + [f"risk_probability_{m.split('_', 1)[1]}" for m in cardio_ensemble.weights]
+    out = {name: nan() for name in names}
+    members = {m: out[f"risk_probability_{m.split('_', 1)[1]}"] for m in cardio_ensemble.weights}
+    if valid.any():
+        scored = score_cardio_ensemble({c: v[valid] for c, v in columns.items()})
+        out["risk_probability"][valid], out["disagreement"][valid] = scored["risk_probability"], scored["disagreement"]
+        for m, probs in scored["members"].items(): members[m][valid] = probs
+    return out, members
+
+def score_cardio_bulk(body: bytes, content_type: Optional[str], model: str, fmt: Optional[str]) -> Response:
+    backend = cardio_batch_backend(model)
+    try:
+        body, _ = maybe_decompress(body, BULK_MAX_DECOMPRESSED_BYTES)
+        fmt = fmt or detect_format(body, content_type)
+        if fmt not in FORMATS: raise ColumnarError(f"Unsupported format '{fmt}' (use {', '.join(FORMATS)})")
+        columns = read_columns(body, fmt)
+        valid = validate_columns(columns)
+    except PayloadTooLarge as e:
+        raise HTTPException(413, f"Invalid bulk payload: {e}")
+    except (ColumnarError, ValueError, OSError) as e:
+        raise HTTPException(400, f"Invalid bulk payload: {e}")
+
+    scored, predictions = score_valid_rows(columns, valid, backend)
+    observe_cardio_drift_batch(columns, valid, predictions)
+    results = {"id": columns["id"]} if "id" in columns else {}
+    results.update({**scored, "valid": valid.astype(np.int8)})
+    headers = {"X-Rows": str(len(valid)), "X-Invalid-Rows": str(int((~valid).sum())), "X-Model": backend}
+    return Response(content=write_results(fmt, results), media_type=FORMATS[fmt], headers=headers)
+
+# Streaming cardio scoring: results are written back chunk by chunk while the body is still uploading.
+# The body is pulled only as fast as results are sent, so a slow reader throttles the upload.
+# This is a raw ASGI endpoint: it alone reads receive, so body messages are never consumed by a
+# disconnect listener, and every chunk is sent as soon as it is scored. It is excluded from gzip,
+# which would hold the output back until a frame filled.
+STREAM_PATH = "/predict/cardiovascular/stream"
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "4096"))
+
+class CardioStreamEndpoint:
+    async def __call__(self, scope, receive, send):
+        request = Request(scope)
+        params, headers = request.query_params, request.headers
+        try:
+            backend = cardio_batch_backend(params.get("model", "auto"))
+            output = params.get("output", "ndjson")
+            if output not in STREAM_FORMATS: raise HTTPException(400, f"Unsupported output '{output}' (use {', '.join(STREAM_FORMATS)})")
+            try:
+                chunk_rows = min(max(int(params.get("chunk_rows") or STREAM_CHUNK_ROWS), 1), 65536)
+            except ValueError:
+                raise HTTPException(400, "chunk_rows must be an integer")
+        except HTTPException as e:
+            return await JSONResponse({"detail": e.detail}, status_code=e.status_code)(scope, receive, send)
+        chunker = CSVRowChunker(chunk_rows=chunk_rows, gzip=headers.get("content-encoding", "").lower() == "gzip")
+
+        started, row, more_body = False, 0, True
+
+        async def emit(chunks):
+            nonlocal started, row
+            for columns in chunks:
+                if not started: started = await self._start(send, backend, chunk_rows, output)
+                await send({"type": "http.response.body", "body": await run_in_threadpool(score_stream_chunk, columns, backend, output, row), "more_body": True})
+                row += len(columns["age"])
+
+        try:
+            while more_body:
+                message = await receive()
+                if message["type"] == "http.disconnect": return
+                more_body = message.get("more_body", False)
+                await emit(chunker.feed_iter(message.get("body", b"")))
+                if not more_body: await emit(chunker.close())
+                # Headers go out as soon as the header line is accepted, even before the first chunk is full
+                if not started and chunker.header is not None: started = await self._start(send, backend, chunk_rows, output)
+            if not started:
+                raise ColumnarError("missing header line")
+        except ColumnarError as e:
+            # Before the status is sent a bad payload is a 400; after it, report the failure in-band and stop
+            if not started:
+                return await JSONResponse({"detail": f"Invalid stream payload: {e}"}, status_code=400)(scope, receive, send)
+            print(f"Streaming score aborted after {row} rows: {e}")
+            await send({"type": "http.response.body", "more_body": True, "body": format_stream_chunk(
+                "ndjson", {"error": np.array([str(e)], dtype=object), "rows_scored": np.array([row])}) if output == "ndjson"
+                else f"# error after {row} rows: {e}\n".encode("utf-8")})
+        except OSError:  # client went away mid-response
+            return
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _start(send, backend: str, chunk_rows: int, output: str) -> bool:
+        headers = {"content-type": STREAM_FORMATS[output], "x-model": backend, "x-chunk-rows": str(chunk_rows)}
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]})
+        return True
+
+app.add_route(STREAM_PATH, CardioStreamEndpoint(), methods=["POST"])
+
+def score_stream_chunk(columns: Dict[str, np.ndarray], backend: str, output: str, start: int) -> bytes:
+    valid = validate_columns(columns)
+    scored, predictions = score_valid_rows(columns, valid, backend)
+    observe_cardio_drift_batch(columns, valid, predictions)
+    results = {"row": np.arange(start, start + len(valid))}
+    if "id" in columns: results["id"] = columns["id"]
+    results.update({**scored, "valid": valid.astype(np.int8)})
+    return format_stream_chunk(output, results, header=start == 0)
+
+# What-if sweep: risk surface over one or two feature grids around a base patient
+WHATIF_MAX_CELLS = int(os.getenv("WHATIF_MAX_CELLS", "250000"))
+
+@app.post("/predict/cardiovascular/whatif")
+def predict_cardio_whatif(input_data: WhatIfInput):
+    backend = cardio_batch_backend(input_data.model)
+    features = [g.feature for g in input_data.grids]
+    unknown = [f for f in features if f not in CARDIO_NN_ORDER]
+    if unknown or len(set(features)) != len(features):
+        raise HTTPException(400, f"Grid features must be distinct CardioInput fields, got {features}")
+    values = [np.asarray(g.values, dtype=np.float64) for g in input_data.grids]
+    if int(np.prod([len(v) for v in values])) > WHATIF_MAX_CELLS: raise HTTPException(400, f"Grid exceeds {WHATIF_MAX_CELLS} cells")
+
+    base = input_data.base.model_dump()
+    if backend == "nn":
+        model, scaler = artifacts["cardio_nn"]["model"], artifacts["cardio_nn"]["scaler"]
+        base_row = cardio_matrix({c: np.array([v]) for c, v in base.items()}, CARDIO_NN_ORDER)[0]
+        to_model = lambda f, v: v / 365.25 if f == "age" else v
+        probs = predict_cardio_nn_grid(model, scaler, base_row, [(CARDIO_NN_ORDER.index(f), to_model(f, v)) for f, v in zip(features, values)])
+        base_prob = float(predict_cardio_nn_batch(model, scaler, base_row[None, :])[0])
+    else:
+        mesh = np.meshgrid(*values, indexing="ij")
+        columns = {c: np.full(mesh[0].size, v, dtype=np.float64) for c, v in base.items()}
+        columns.update({f: m.ravel() for f, m in zip(features, mesh)})
+        probs = score_cardio_columns(columns, backend).reshape(mesh[0].shape)
+        base_prob = float(score_cardio_columns({c: np.array([v], dtype=np.float64) for c, v in base.items()}, backend)[0])
+
+    # Distances are measured in training standard deviations (scaler.pkl, age converted back to days)
+    scaler = artifacts["cardio_nn"]["scaler"]
+    scales = {f: scaler.scale_[CARDIO_NN_ORDER.index(f)] * (365.25 if f == "age" else 1) for f in features} if scaler is not None \
+        else {f: max(float(np.std(v)), 1.0) for f, v in zip(features, values)}
+    change = minimal_change(probs, features, values, {**base, "probability": base_prob}, scales, RISK_THRESHOLDS, RISK_CATEGORIES)
+    # Arrays go straight to orjson instead of through jsonable_encoder
+    return json_response({
+        "model": f"cardio_{backend}",
+        "base": {"risk_probability": base_prob, "risk_category": get_risk_category(base_prob)},
+        "features": features,
+        "values": values,
+        "risk_probability": probs,
+        "minimal_change": change,
+    })
+
+# Risk trajectory: Monte Carlo projection of the patient's risk under intervention scenarios
+# Latency budget: samples x (years + 1) x scenarios rows, each scored once per model
+TRAJECTORY_MAX_EVALS = int(os.getenv("TRAJECTORY_MAX_EVALS", "250000"))
+
+@app.post("/predict/cardiovascular/trajectory")
+def predict_cardio_trajectory(input_data: TrajectoryInput):
+    backend = cardio_batch_backend(input_data.model)
+    evals_per_sample = (input_data.years + 1) * len(input_data.scenarios) * (len(cardio_ensemble.weights) if backend == "ensemble" else 1)
+    samples = min(input_data.samples, max(TRAJECTORY_MAX_EVALS // evals_per_sample, 1))  # fewer samples rather than a slow request
+    try:
+        scenarios = project(input_data.base.model_dump(), input_data.years, samples, input_data.scenarios,
+                            lambda columns: score_cardio_columns(columns, backend), seed=input_data.seed, high_threshold=RISK_THRESHOLDS[1])
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return json_response({
+        "model": f"cardio_{backend}",
+        "years": list(range(input_data.years + 1)),
+        "samples": samples,
+        "samples_requested": input_data.samples,
+        "seed": input_data.seed,
+        "scenarios": scenarios,
+    })
+
+# Similar patients: the k closest cardio_train.csv rows and their outcomes
+@app.post("/predict/cardiovascular/similar")
+def similar_cardio_patients(input_data: CardioInput, k: int = 10):
+    if not similar_patients: raise HTTPException(503, "Similar patients index not available")
+    if not 1 <= k <= SIMILAR_MAX_K: raise HTTPException(400, f"k must be between 1 and {SIMILAR_MAX_K}")
+    return similar_patients.query(input_data.model_dump(), k)
+
 # Diabetes
 @app.post("/predict/diabetes")
-def predict_diabetes(input_data: DiabetesInput):
+def predict_diabetes(input_data: DiabetesInput, response: Response = None):
     if not artifacts["diabetes_xgb"]["model"]: 
         print("WARNING: Diabetes model not loaded. Returning mock response.")
         return {"risk_probability": 0.1, "risk_category": "Low (Mock)"}
+    request_log.record("/predict/diabetes", input_data.model_dump())
     encs = artifacts["diabetes_xgb"]["encoders"]
     try:
         gen = encs['gender_encoder'].transform([input_data.gender])[0]
@@ -279,8 +905,10 @@ def predict_diabetes(input_data: DiabetesInput):
     except: raise HTTPException(400, "Invalid categorical input")
     features = np.array([[input_data.age, input_data.hypertension, input_data.heart_disease, input_data.bmi, input_data.HbA1c_level, input_data.blood_glucose_level, gen, chk]])
     model = artifacts["diabetes_xgb"]["model"]
-    prob = float(model.predict_proba(features)[0][1])
-    return {"risk_probability": prob, "risk_category": get_risk_category(prob)}
+    prob = prediction_cache.memoize("diabetes_xgb", canonical_features(features[0]), lambda: float(model.predict_proba(features)[0][1]))
+    result = {"risk_probability": prob, "risk_category": get_risk_category(prob)}
+    set_cache_headers(response, "/predict/diabetes", input_data, result)
+    return result
 
 # CBC
 @app.post("/analyze_cbc")
@@ -291,35 +919,193 @@ def analyze_cbc(input_data: CBCInput):
     return {"summary": "Anemia suspected" if findings else "Normal", "findings": findings}
 
 # Idiopathic
+idiopathic_table_lock = threading.Lock()
+
+def current_idiopathic_table():
+    """The lookup table, regenerated (a ~500-row forward pass) if the model, scaler or encoders changed on disk."""
+    table, version = artifacts["idiopathic"]["model"], prediction_cache.version("idiopathic")
+    if table.version != version:
+        with idiopathic_table_lock:
+            table = artifacts["idiopathic"]["model"]
+            if table.version != version:
+                table = artifacts["idiopathic"]["model"] = load_idiopathic_table(*ARTIFACT_FILES["idiopathic"], version=version)
+                print(f"Idiopathic lookup table regenerated ({version}).")
+    return table
+
+# --- Model Registry (versioned artifacts, hot reload without restart) ---
+MODEL_REGISTRY_POLL = float(os.getenv("MODEL_REGISTRY_POLL", "5"))
+model_registry = ModelRegistry(REGISTRY_DIR)
+
+def registry_example() -> CardioInput:
+    return CardioInput(**CardioInput.model_config["json_schema_extra"]["example"])
+
+def use_registry_paths(model: str, paths: List[str]):
+    ARTIFACT_FILES[model] = paths
+    prediction_cache.register(model, paths)
+    prediction_cache.invalidate(model)
+
+def load_registry_cardio_nn(paths: List[str]) -> Dict[str, Any]:
+    model, scaler = load_cardio_nn(*paths)
+    loaded = {"model": model, "scaler": scaler, "numpy": CardioNNNumpy(model, scaler)}
+    # The similar-patients index measures distance with the NN scaler, so it moves with it
+    if similar_patients is not None:
+        loaded["similar"] = SimilarPatientIndex(similar_patients.features, similar_patients.ids, similar_patients.outcomes, scaler)
+    return loaded
+
+def warmup_cardio_nn(loaded: Dict[str, Any]):
+    features = cardio_nn_features(registry_example())
+    prob = predict_cardio_nn_batch(loaded["model"], loaded["scaler"], features)[0]
+    if not np.isfinite(prob) or abs(prob - loaded["numpy"].predict(features)[0]) > 1e-4: raise ValueError(f"warmup prediction {prob} is invalid")
+
+def install_cardio_nn(version: str, paths: List[str], loaded: Dict[str, Any]):
+    # Each entry is swapped whole, with the cache version it is served under
+    global similar_patients
+    fingerprint = artifact_fingerprint(paths)
+    artifacts["cardio_numpy"] = {"model": loaded["numpy"], "version": fingerprint}
+    artifacts["cardio_nn"] = {"model": loaded["model"], "scaler": loaded["scaler"], "version": fingerprint}
+    if "similar" in loaded: similar_patients = loaded["similar"]
+    use_registry_paths("cardio_nn", paths)
+
+def load_registry_cardio_xgb(paths: List[str]) -> Dict[str, Any]:
+    model = load_cardio_xgb(paths[0])
+    try: explainer = shap.TreeExplainer(model)
+    except Exception: explainer = None
+    return {"model": model, "explainer": explainer}
+
+def warmup_cardio_xgb(loaded: Dict[str, Any]):
+    prob = loaded["model"].predict_proba(cardio_xgb_features(registry_example()))[0][1]
+    if not np.isfinite(prob): raise ValueError(f"warmup prediction {prob} is invalid")
+
+def install_cardio_xgb(version: str, paths: List[str], loaded: Dict[str, Any]):
+    artifacts["cardio_xgb"] = {**loaded, "version": artifact_fingerprint(paths)}
+    use_registry_paths("cardio_xgb", paths)
+
+def install_idiopathic(version: str, paths: List[str], table):
+    use_registry_paths("idiopathic", paths)
+    artifacts["idiopathic"]["model"] = table
+
+model_hot_swapper = HotSwapper(model_registry, {
+    # model: (load, warmup, install)
+    "cardio_nn": (load_registry_cardio_nn, warmup_cardio_nn, install_cardio_nn),
+    "cardio_xgb": (load_registry_cardio_xgb, warmup_cardio_xgb, install_cardio_xgb),
+    "idiopathic": (lambda paths: load_idiopathic_table(*paths, version=artifact_fingerprint(paths)),
+                   lambda table: table.lookup(65, "male", "Ever"), install_idiopathic),
+}, interval=MODEL_REGISTRY_POLL)
+
+@app.get("/models")
+def list_models():
+    status = model_hot_swapper.status()
+    for model, info in status.items():
+        info["manifest"] = model_registry.manifest(model, info["served"]) if info["served"] else None
+    return status
+
+@app.post("/models/{model}/activate")
+def activate_model(model: str, version: str):
+    if model not in model_hot_swapper.specs: raise HTTPException(404, f"Unknown model '{model}'")
+    try:
+        model_registry.activate(model, version)
+    except RegistryError as e: raise HTTPException(400, str(e))
+    try:
+        model_hot_swapper.sync(model)
+    except Exception as e:
+        # Keep serving the old version and point the registry back at it
+        served = model_hot_swapper.loaded.get(model)
+        if served and model_registry.state(model)["history"][-1:] == [served]: model_registry.rollback(model)
+        raise HTTPException(409, f"{model} {version} failed to load and was rolled back: {e}")
+    return model_hot_swapper.status()[model]
+
+@app.post("/models/{model}/rollback")
+def rollback_model(model: str):
+    if model not in model_hot_swapper.specs: raise HTTPException(404, f"Unknown model '{model}'")
+    try:
+        model_registry.rollback(model)
+        model_hot_swapper.sync(model)
+    except RegistryError as e: raise HTTPException(400, str(e))
+    except Exception as e: raise HTTPException(409, f"Rollback of {model} failed to load: {e}")
+    return model_hot_swapper.status()[model]
+
 @app.post("/predict/idiopathic")
-def predict_idiopathic(input_data: IdiopathicInput):
+def predict_idiopathic(input_data: IdiopathicInput, response: Response = None):
     if not artifacts["idiopathic"]["model"]: 
         print("WARNING: Idiopathic model not loaded. Returning mock response.")
         return {"prediction": "Normal (Mock)", "risk_probability": 0.05}
+    request_log.record("/predict/idiopathic", input_data.model_dump())
     try:
-        encs = artifacts["idiopathic"]["encoders"]
-        scaler = artifacts["idiopathic"]["scaler"]
-        # Robust input handling
-        sex = encs['sex'].transform([input_data.gender.strip().lower()])[0]
-        smoke = encs['smoking'].transform([input_data.smoking_history.strip().title()])[0]
-        age = scaler.transform([[input_data.age]])[0][0]
-        
-        with torch.no_grad():
-            prob = artifacts["idiopathic"]["model"](torch.FloatTensor([[age, sex, smoke]])).item()
-        
-        risk = 1.0 - prob # Assuming 0=IPF
-        return {"prediction": "IPF" if risk > 0.5 else "Normal", "risk_probability": risk}
-    except Exception as e: raise HTTPException(400, f"Error: {e}")
+        result = current_idiopathic_table().lookup(input_data.age, input_data.gender, input_data.smoking_history)
+    except (KeyError, IndexError) as e: raise HTTPException(400, f"Error: {e}")
+    result = {"prediction": "IPF" if result["risk_probability"] > 0.5 else "Normal", **result}
+    set_cache_headers(response, "/predict/idiopathic", input_data, result)
+    return result
+
+# Screening: one intake form, every available model at once
+SCREEN_TIMEOUT_MS = int(os.getenv("SCREEN_TIMEOUT_MS", "2000"))
+SCREEN_MODELS = {
+    # name: (input schema, handler, availability check)
+    "cardiovascular": (CardioInput, predict_cardio_xgb1, lambda: artifacts["cardio_xgb"]["model"] or artifacts["cardio_nn"]["model"]),
+    "diabetes": (DiabetesInput, predict_diabetes, lambda: artifacts["diabetes_xgb"]["model"]),
+    "idiopathic": (IdiopathicInput, predict_idiopathic, lambda: artifacts["idiopathic"]["model"]),
+    "cbc": (CBCInput, analyze_cbc, lambda: True),
+}
+
+@app.post("/screen")
+async def screen(input_data: ScreenInput):
+    data = input_data.model_dump()
+    try:
+        shared = derive_shared(data)
+    except ValueError as e: raise HTTPException(400, str(e))
+    unknown = set(input_data.models or []) - set(SCREEN_MODELS)
+    if unknown: raise HTTPException(400, f"Unknown models: {sorted(unknown)}")
+    payloads, skipped = model_inputs(data, shared)
+    results = {name: {"status": "skipped", "reason": reason} for name, reason in skipped.items()}
+    calls = {}
+    for name, payload in payloads.items():
+        schema, handler, available = SCREEN_MODELS[name]
+        if input_data.models and name not in input_data.models:
+            results[name] = {"status": "skipped", "reason": "not requested"}
+        elif not available():
+            results[name] = {"status": "unavailable"}
+        else:
+            try:
+                model_input = schema(**payload)
+            except ValidationError as e:
+                results[name] = {"status": "error", "error": str(e)}
+                continue
+            calls[name] = lambda handler=handler, model_input=model_input: handler(model_input)
+    results.update(await run_concurrently(calls, (input_data.timeout_ms or SCREEN_TIMEOUT_MS) / 1000))
+    return json_response({"derived": shared, "results": {name: results[name] for name in SCREEN_MODELS}})
 
 # NLP: ClinicalBERT
+def resolve_bert_vocab(input_data):
+    try:
+        return artifacts["nlp_bert"].resolve_vocab(input_data.candidates, input_data.full_vocabulary)
+    except ValueError as e: raise HTTPException(400, str(e))
+
 @app.post("/analyze/clinical_bert")
 def analyze_text_bert(input_data: TextAnalysisInput):
-    if not artifacts["nlp_bert"]: 
+    if not artifacts["nlp_bert"] or not artifacts["nlp_bert"].ensure_loaded():
         print("WARNING: ClinicalBERT not loaded. Returning mock response.")
         # Return a dummy completion
         return [{"sequence": input_data.text.replace("[MASK]", "heart"), "score": 0.99, "token": 123, "token_str": "heart"}]
     if "[MASK]" not in input_data.text: return {"error": "Text must contain [MASK] token"}
-    return artifacts["nlp_bert"](input_data.text)
+    vocab = resolve_bert_vocab(input_data)
+    # Notes past the 512-token limit go through the sliding-window path instead of being truncated
+    return artifacts["nlp_bert"].fill_mask_auto([input_data.text], top_k=input_data.top_k, vocab=vocab)[0]
+
+@app.post("/analyze/clinical_bert/long")
+def analyze_text_bert_long(input_data: TextAnalysisInput):
+    if "[MASK]" not in input_data.text: raise HTTPException(400, "Text must contain [MASK] token")
+    if not artifacts["nlp_bert"] or not artifacts["nlp_bert"].ensure_loaded():
+        raise HTTPException(503, "ClinicalBERT not loaded")
+    return artifacts["nlp_bert"].fill_mask_long(input_data.text, top_k=input_data.top_k, vocab=resolve_bert_vocab(input_data))
+
+@app.post("/analyze/clinical_bert/batch")
+def analyze_text_bert_batch(input_data: TextBatchAnalysisInput):
+    if any("[MASK]" not in text for text in input_data.texts):
+        raise HTTPException(400, "Every text must contain a [MASK] token")
+    if not artifacts["nlp_bert"] or not artifacts["nlp_bert"].ensure_loaded():
+        raise HTTPException(503, "ClinicalBERT not loaded")
+    # Texts past the 512-token limit come back in the /long format rather than losing masks to truncation
+    return {"results": artifacts["nlp_bert"].fill_mask_auto(input_data.texts, top_k=input_data.top_k, vocab=resolve_bert_vocab(input_data))}
 
 # NLP: Chat (Meditron)
 @app.post("/chat/meditron")
@@ -334,6 +1120,109 @@ def chat_meditron(input_data: ChatInput):
         raise HTTPException(503, f"Chat service unavailable: {e}")
 
 
+# --- Prediction Cache ---
+PREDICTION_ENDPOINTS = {
+    "/predict": (CardioInput, predict_original),
+    "/predict/cardiovascular/result": (CardioInput, predict_cardio_xgb1),
+    "/predict/cardiovascular/explanation": (CardioInput, predict_cardio_xgb2),
+    "/predict/diabetes": (DiabetesInput, predict_diabetes),
+    "/predict/idiopathic": (IdiopathicInput, predict_idiopathic),
+}
+
+def warm_prediction_cache(limit: int):
+    warmed, logging_enabled = 0, request_log.enabled
+    request_log.enabled = False  # replayed payloads must not be logged again
+    try:
+        for endpoint, payload, _ in request_log.most_frequent(limit):
+            if endpoint not in PREDICTION_ENDPOINTS: continue
+            schema, handler = PREDICTION_ENDPOINTS[endpoint]
+            try:
+                handler(schema(**payload))
+                warmed += 1
+            except Exception: continue
+    finally:
+        request_log.enabled = logging_enabled
+    print(f"Prediction cache warmed with {warmed} payloads from {request_log.path}.")
+
+# Population insights (PD/ICE curves, global importance) precomputed by population_insights.py.
+# Payloads are serialized once per model version, so a request is a dict lookup.
+insights_cache: Dict[str, Any] = {}  # model -> (version, {feature or None: JSON bytes})
+
+def cardio_insights_payloads(model: str):
+    version = served_version(model)  # the job (population_insights.py) fingerprints the same served files
+    cached = insights_cache.get(model)
+    if cached and cached[0] == version: return cached
+    data = load_insights(model, version)
+    if data is None: return version, None
+    meta = {k: v for k, v in data.items() if k != "features"}
+    payloads = {None: dumps(data)}
+    payloads.update({f: dumps({**meta, "features": {f: curves}}) for f, curves in data["features"].items()})
+    insights_cache[model] = (version, payloads)
+    return version, payloads
+
+@app.get("/insights/cardio")
+def cardio_insights(request: Request, model: str = "nn", feature: Optional[str] = None):
+    key = f"cardio_{model}"
+    if key not in CARDIO_ARTIFACTS: raise HTTPException(400, f"Unknown model '{model}' (use nn or xgb)")
+    version, payloads = cardio_insights_payloads(key)
+    if payloads is None:
+        raise HTTPException(404, f"No insights for {key} version {version}. Run: python population_insights.py --models {model}")
+    if feature not in payloads: raise HTTPException(400, f"Unknown feature '{feature}'")
+    headers = {"ETag": f'"{version}-{feature or "all"}"', "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payloads[feature], media_type="application/json", headers=headers)
+
+@app.get("/routing/stats")
+def routing_stats():
+    return {"cardiovascular": cardio_router.stats()}
+
+@app.get("/shadow/stats")
+def shadow_stats():
+    return {"candidate": os.getenv("CARDIO_CANDIDATE_MODEL"), "loaded": artifacts["cardio_candidate"]["model"] is not None, **cardio_shadow.stats()}
+
+@app.post("/shadow/reset")
+def shadow_reset():
+    cardio_shadow.reset()
+    return {"status": "reset"}
+
+@app.get("/monitor/drift")
+def monitor_drift():
+    if not drift_monitor: raise HTTPException(503, "Drift monitor not available")
+    return drift_monitor.report()
+
+@app.post("/monitor/drift/reset")
+def monitor_drift_reset():
+    if not drift_monitor: raise HTTPException(503, "Drift monitor not available")
+    drift_monitor.reset()
+    return {"status": "reset"}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {**prediction_cache.stats(), "prefetch": prefetcher.snapshot()}
+
+# GET twins of the prediction endpoints: GET <endpoint>/<input hash> (hash from the POST's Content-Location)
+def register_cached_lookup(endpoint: str, schema, handler):
+    def lookup(input_hash: str, request: Request):
+        payload = payload_store.get(input_hash)
+        if payload is None: raise HTTPException(404, "Unknown input hash. POST the payload to the endpoint first.")
+        # Never publish a mock answer as cacheable
+        if not any(artifacts[name]["model"] for name in ENDPOINT_MODELS[endpoint]): raise HTTPException(503, "Model not loaded")
+        try: input_data = schema(**payload)
+        except ValidationError: raise HTTPException(404, f"Input hash does not refer to a {schema.__name__} payload")
+        # Replayed first (predictions are memoized): the ETag depends on the body served
+        result = handler(input_data)
+        if result.get("degraded"): return json_response(result, headers={"Cache-Control": "no-store"})  # shed load, not the usual answer
+        headers = prediction_cache_headers(endpoint, input_hash, result)
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return json_response(result, headers=headers)
+    app.add_api_route(f"{endpoint}/{{input_hash}}", lookup, methods=["GET"], name=f"{handler.__name__}_by_hash")
+
+for _endpoint, (_schema, _handler) in PREDICTION_ENDPOINTS.items():
+    register_cached_lookup(_endpoint, _schema, _handler)
+
+
 # --- SPA Catch-all Route ---
 @app.get("/{full_path:path}")
 async def serve_react_app(full_path: str):
@@ -0,0 +1,240 @@
+"""
+Single-file, memory-mappable artifact bundle.
+
+    python artifact_bundle.py build                  # packs the root artifacts into artifacts.bundle
+    python artifact_bundle.py inspect artifacts.bundle
+
+Layout: 8-byte magic, little-endian uint64 header length, JSON header (padded so the data starts on a
+64-byte boundary), then the raw arrays, each 64-byte aligned. The header lists, per model, its arrays
+(dtype, shape, offset), its metadata (feature order, encoder classes, ...) and a content version.
+
+Arrays are numpy views into a copy-on-write mapping of the file: loading reads no data up front, and
+every worker process maps the same page-cache pages. Rebuild with `build`, which replaces the file
+atomically; never edit a bundle in place while servers have it mapped.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List
+
+import numpy as np
+
+MAGIC = b"CDXBNDL\x00"
+FORMAT = 1
+ALIGN = 64
+BUNDLE_PATH = os.getenv("ARTIFACT_BUNDLE", "artifacts.bundle")
+
+
+def is_bundle(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+
+def section_version(section: Dict[str, Any]) -> str:
+    h = hashlib.sha256(json.dumps(section["metadata"], sort_keys=True).encode())
+    for name in sorted(section["arrays"]):
+        arr = np.ascontiguousarray(section["arrays"][name])
+        h.update(f"{name}:{arr.dtype.str}:{arr.shape}".encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()[:16]
+
+
+def write_bundle(path: str, sections: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """sections: model -> {"arrays": {name: ndarray}, "metadata": {...}}. Returns the header."""
+    models, offset = {}, 0
+    for model, section in sections.items():
+        entries = {}
+        for name, arr in section["arrays"].items():
+            arr = np.ascontiguousarray(arr)
+            entries[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset += arr.nbytes + _pad(arr.nbytes)
+        models[model] = {"version": section_version(section), "metadata": section["metadata"], "arrays": entries}
+    header = {"format": FORMAT, "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+              "version": hashlib.sha256("".join(m["version"] for m in models.values()).encode()).hexdigest()[:16],
+              "models": models}
+    raw = json.dumps(header).encode()
+    raw += b" " * _pad(len(MAGIC) + 8 + len(raw))
+
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(raw)) + raw)
+        for section in sections.values():
+            for arr in section["arrays"].values():
+                data = np.ascontiguousarray(arr).tobytes()
+                f.write(data + b"\0" * _pad(len(data)))
+    os.replace(tmp, path)
+    return header
+
+
+class ArtifactBundle:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC: raise ValueError(f"{path} is not an artifact bundle")
+            size, = struct.unpack("<Q", f.read(8))
+            self.header = json.loads(f.read(size))
+            if self.header["format"] != FORMAT: raise ValueError(f"{path}: unsupported bundle format {self.header['format']}")
+            self._start = len(MAGIC) + 8 + size
+            # Copy-on-write: clean pages stay shared with every other process mapping the file
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.models: List[str] = list(self.header["models"])
+        self.version: str = self.header["version"]
+
+    def metadata(self, model: str) -> Dict[str, Any]:
+        return self._section(model)["metadata"]
+
+    def model_version(self, model: str) -> str:
+        return self._section(model)["version"]
+
+    def stale(self, model: str) -> List[str]:
+        """Source files changed since the bundle was built. Serve those instead of the section until it is rebuilt."""
+        built = os.path.getmtime(self.path)
+        return [f for f in self.metadata(model).get("sources", []) if os.path.exists(f) and os.path.getmtime(f) > built]
+
+    def arrays(self, model: str) -> Dict[str, np.ndarray]:
+        """Views into the mapping (no copy)."""
+        out = {}
+        for name, entry in self._section(model)["arrays"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            out[name] = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=self._start + entry["offset"]).reshape(entry["shape"])
+        return out
+
+    def _section(self, model: str) -> Dict[str, Any]:
+        if model not in self.header["models"]: raise KeyError(f"{self.path} has no '{model}' section")
+        return self.header["models"][model]
+
+
+# --- sklearn / torch / XGBoost (de)serialization helpers ---
+def state_dict_arrays(state_dict, prefix: str = "model.") -> Dict[str, np.ndarray]:
+    return {prefix + k: v.detach().cpu().numpy() for k, v in state_dict.items()}
+
+
+def load_state_dict(module, arrays: Dict[str, np.ndarray], prefix: str = "model."):
+    """Points the module's parameters at the mapped arrays (assign=True), instead of copying into them."""
+    import torch
+    module.load_state_dict({k[len(prefix):]: torch.from_numpy(v) for k, v in arrays.items() if k.startswith(prefix)}, assign=True)
+    module.eval()
+    return module
+
+
+def scaler_section(scaler, prefix: str = "scaler.") -> Dict[str, Any]:
+    arrays = {prefix + "mean": scaler.mean_, prefix + "scale": scaler.scale_, prefix + "var": scaler.var_}
+    names = getattr(scaler, "feature_names_in_", None)
+    return {"arrays": arrays, "metadata": {"n_samples_seen": float(scaler.n_samples_seen_),
+                                           "feature_names": None if names is None else [str(n) for n in names]}}
+
+
+def scaler_from(arrays: Dict[str, np.ndarray], meta: Dict[str, Any], prefix: str = "scaler."):
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    scaler.mean_, scaler.scale_, scaler.var_ = arrays[prefix + "mean"], arrays[prefix + "scale"], arrays[prefix + "var"]
+    scaler.n_features_in_ = len(scaler.mean_)
+    scaler.n_samples_seen_ = np.float64(meta["n_samples_seen"])
+    if meta.get("feature_names") is not None: scaler.feature_names_in_ = np.array(meta["feature_names"], dtype=object)
+    return scaler
+
+
+def encoder_classes(encoders: Dict[str, Any]) -> Dict[str, List]:
+    return {name: [c.item() if hasattr(c, "item") else c for c in enc.classes_] for name, enc in encoders.items()}
+
+
+def label_encoders(classes: Dict[str, List]) -> Dict[str, Any]:
+    from sklearn.preprocessing import LabelEncoder
+    encoders = {}
+    for name, values in classes.items():
+        enc = encoders[name] = LabelEncoder()
+        enc.classes_ = np.array(values, dtype=object if isinstance(values[0], str) else None)
+    return encoders
+
+
+def xgb_array(model) -> np.ndarray:
+    """The model in XGBoost's own UBJSON format (keeps the sklearn wrapper attributes; no pickle)."""
+    path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4().hex}.ubj")
+    try:
+        model.save_model(path)
+        with open(path, "rb") as f:
+            return np.frombuffer(f.read(), dtype=np.uint8)
+    finally:
+        if os.path.exists(path): os.remove(path)
+
+
+def xgb_classifier(array: np.ndarray):
+    import xgboost
+    model = xgboost.XGBClassifier()
+    model.load_model(bytearray(array))
+    return model
+
+
+def _load_pickle(path: str):
+    import joblib
+    return joblib.load(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the memory-mappable artifact bundle.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Pack the per-model artifact files into one bundle")
+    build.add_argument("--output", default=BUNDLE_PATH)
+    build.add_argument("--dir", default=".", help="Directory holding the artifact files")
+    build.add_argument("--models", nargs="*", help="Subset of models (default: every one whose files exist)")
+    inspect = sub.add_parser("inspect")
+    inspect.add_argument("path", nargs="?", default=BUNDLE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "inspect":
+        bundle = ArtifactBundle(args.path)
+        print(f"{args.path}: version {bundle.version}, created {bundle.header['created']}")
+        for model in bundle.models:
+            arrays = bundle.arrays(model)
+            print(f"  {model} {bundle.model_version(model)}: {len(arrays)} arrays, {sum(a.nbytes for a in arrays.values())} bytes, "
+                  f"metadata keys {sorted(bundle.metadata(model))}")
+        return
+
+    from batch_scoring import bundle_cardio_nn, bundle_cardio_xgb
+    from idiopathic_table import bundle_idiopathic
+
+    def bundle_diabetes(model_path, encoders_path, features_path):
+        info = _load_pickle(features_path)
+        return {"arrays": {"booster": xgb_array(_load_pickle(model_path))},
+                "metadata": {"encoders": encoder_classes(_load_pickle(encoders_path)),
+                             "feature_info": {"feature_names": list(info["feature_names"]),
+                                              "feature_importance": {k: float(v) for k, v in info["feature_importance"].items()}}}}
+
+    builders = {
+        "cardio_nn": (bundle_cardio_nn, ["cardio_model.pth", "scaler.pkl"]),
+        "cardio_xgb": (bundle_cardio_xgb, ["xgboost_model.pkl"]),
+        "diabetes_xgb": (bundle_diabetes, ["diabetes_xgboost_model.pkl", "diabetes_label_encoders.pkl", "diabetes_feature_info.pkl"]),
+        "idiopathic": (bundle_idiopathic, ["idiopathic_model.pth", "idiopathic_scaler.pkl", "idiopathic_encoders.pkl"]),
+    }
+    sections = {}
+    for model in args.models or builders:
+        build_section, files = builders[model]
+        paths = [os.path.join(args.dir, name) for name in files]
+        if not all(os.path.exists(p) for p in paths):
+            print(f"{model}: skipped (missing {', '.join(p for p in paths if not os.path.exists(p))})")
+            continue
+        try:
+            sections[model] = build_section(*paths)
+            sections[model]["metadata"]["sources"] = files
+        except Exception as e: print(f"{model}: failed to pack: {e}")
+    if not sections: raise SystemExit("Nothing to bundle.")
+    header = write_bundle(args.output, sections)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)} bytes, version {header['version']}): {', '.join(sections)}")
+
+
+if __name__ == "__main__":
+    main()
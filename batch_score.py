@@ -0,0 +1,298 @@
+"""
+Offline cardio batch scoring.
+
+    python batch_score.py cardio_train.csv partner.csv --output scores.parquet --workers 8 --shap --model xgb
+
+Inputs (`;`/`,` CSV in the cardio_train.csv layout, or .npy) are split into shards that a process
+pool scores with the same vectorized code as /predict/cardiovascular/bulk. Rows with unparseable or
+out-of-range cells are kept in the output with valid=0 rather than failing the run. Each finished shard is
+written to <output>.parts/ atomically, so an interrupted run picks up where it stopped when started
+again with the same arguments. The merged output (.csv, .npz, .arrow or .parquet) gets a
+<output>.summary.json with rows/sec and per-stage timings.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import torch
+
+from batch_scoring import CARDIO_NN_ORDER, CARDIO_XGB_ORDER, cardio_matrix, load_cardio_nn, load_cardio_xgb, predict_cardio_nn_batch, predict_cardio_xgb_batch
+from nn_attributions import cardio_nn_attributions
+from columnar import ColumnarError, columns_from_array, read_columns, validate_columns, write_results
+from prediction_cache import artifact_fingerprint
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # .arrow / .parquet output is optional
+    pa = None
+
+STAGES = ["read", "validate", "infer", "shap", "write"]
+OUTPUT_FORMATS = (".csv", ".npz", ".arrow", ".parquet")
+PLAN_VERSION = 1
+
+
+# --- Planning ---
+def plan_csv(path: str, shard_rows: int) -> List[Dict[str, Any]]:
+    """Byte ranges of roughly shard_rows lines each, aligned to line starts (header excluded)."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        sample = f.read(1 << 20)
+        lines = max(sample.count(b"\n"), 1)
+        shard_bytes = max(int(len(sample) / lines * shard_rows), 1)
+        shards = []
+        while start < size:
+            f.seek(min(start + shard_bytes, size))
+            if f.tell() < size: f.readline()
+            end = f.tell()
+            shards.append({"kind": "csv", "path": path, "start": start, "end": end})
+            start = end
+    return shards
+
+
+def plan_npy(path: str, shard_rows: int) -> List[Dict[str, Any]]:
+    rows = len(np.load(path, mmap_mode="r", allow_pickle=False))
+    return [{"kind": "npy", "path": path, "start": s, "end": min(s + shard_rows, rows)} for s in range(0, rows, shard_rows)]
+
+
+def make_plan(inputs: List[str], shard_rows: int, model: str, shap_values: bool, artifact_paths: List[str]) -> Dict[str, Any]:
+    shards = []
+    for source, path in enumerate(inputs):
+        planned = plan_npy(path, shard_rows) if path.endswith(".npy") else plan_csv(path, shard_rows)
+        shards += [dict(s, source=source) for s in planned]
+    return {
+        "version": PLAN_VERSION,
+        "inputs": [{"path": os.path.abspath(p), "size": os.path.getsize(p), "mtime_ns": os.stat(p).st_mtime_ns} for p in inputs],
+        "model": model,
+        "shap": shap_values,
+        "artifacts": artifact_fingerprint(artifact_paths),
+        "shard_rows": shard_rows,
+        "shards": shards,
+    }
+
+
+# --- Worker ---
+_worker: Dict[str, Any] = {}
+
+
+def init_worker(model: str, artifacts_dir: str, shap_values: bool, threads: int):
+    started = time.perf_counter()
+    torch.set_num_threads(threads)
+    if model == "xgb":
+        xgb = load_cardio_xgb(os.path.join(artifacts_dir, "xgboost_model.pkl"))
+        try: xgb.set_params(n_jobs=threads)
+        except Exception: pass
+        _worker["model"] = xgb
+        if shap_values:
+            import shap
+            _worker["explainer"] = shap.TreeExplainer(xgb)
+    else:
+        _worker["model"], _worker["scaler"] = load_cardio_nn(os.path.join(artifacts_dir, "cardio_model.pth"), os.path.join(artifacts_dir, "scaler.pkl"))
+    _worker.update({"backend": model, "shap": shap_values, "load_seconds": time.perf_counter() - started})
+
+
+def read_shard(shard: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    if shard["kind"] == "npy":
+        array = np.load(shard["path"], mmap_mode="r", allow_pickle=False)
+        columns = columns_from_array(np.asarray(array[shard["start"]:shard["end"]]))
+    else:
+        with open(shard["path"], "rb") as f:
+            header = f.readline()
+            f.seek(shard["start"])
+            body = f.read(shard["end"] - shard["start"])
+        columns = read_columns(header + body, "csv")
+    # Unparseable cells become NaN, so the row is reported invalid instead of failing the whole run
+    return {c: v if c == "id" else pd.to_numeric(pd.Series(v), errors="coerce").to_numpy(np.float64) for c, v in columns.items()}
+
+
+def score_shard(index: int, shard: Dict[str, Any], part_path: str) -> Dict[str, Any]:
+    timings = dict.fromkeys(STAGES, 0.0)
+    t = time.perf_counter()
+    columns = read_shard(shard)
+    timings["read"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    valid = validate_columns(columns)
+    rows = {c: v[valid] for c, v in columns.items()}
+    timings["validate"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    backend = _worker["backend"]
+    probs = np.full(len(valid), np.nan, dtype=np.float32)
+    if backend == "xgb":
+        X = cardio_matrix(rows, CARDIO_XGB_ORDER)
+        if len(X): probs[valid] = predict_cardio_xgb_batch(_worker["model"], X)
+    else:
+        X = cardio_matrix(rows, CARDIO_NN_ORDER)
+        if len(X): probs[valid] = predict_cardio_nn_batch(_worker["model"], _worker["scaler"], X)
+    timings["infer"] = time.perf_counter() - t
+
+    results = {"id": columns["id"]} if "id" in columns else {}
+    results.update({"risk_probability": probs, "valid": valid.astype(np.int8)})
+    if _worker["shap"]:
+        # TreeSHAP for XGB, integrated gradients for the NN; both in log-odds units
+        t = time.perf_counter()
+        order = CARDIO_XGB_ORDER if backend == "xgb" else CARDIO_NN_ORDER
+        contributions = np.full((len(valid), len(order)), np.nan, dtype=np.float32)
+        if len(X):
+            contributions[valid] = _worker["explainer"].shap_values(X) if backend == "xgb" else \
+                cardio_nn_attributions(_worker["model"], _worker["scaler"], X)
+        for i, feature in enumerate(order):
+            results[f"shap_{feature}"] = contributions[:, i]
+        timings["shap"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    tmp = part_path + ".tmp.npz"
+    np.savez(tmp, **results, _stage_seconds=np.array([timings[s] for s in STAGES]))
+    os.replace(tmp, part_path)  # a part file only ever exists complete
+    timings["write"] = time.perf_counter() - t
+
+    load_seconds = _worker.pop("load_seconds", 0.0)  # reported once per worker
+    return {"index": index, "rows": len(valid), "invalid": int((~valid).sum()), "timings": timings, "load": load_seconds}
+
+
+# --- Merge ---
+def read_part(part_path: str, source: int, row_offset: int, multi_source: bool) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    with np.load(part_path, allow_pickle=False) as archive:
+        stage_seconds = archive["_stage_seconds"]
+        data = {k: archive[k] for k in archive.files if k != "_stage_seconds"}
+    n = len(data["valid"])
+    results = {"source": np.full(n, source, dtype=np.int16)} if multi_source else {}
+    results["row"] = np.arange(row_offset, row_offset + n, dtype=np.int64)
+    results.update(data)
+    return results, stage_seconds
+
+
+def write_merged(output: str, parts: List[Dict[str, np.ndarray]]):
+    """Writes shards in order. CSV/Arrow/Parquet are appended shard by shard; .npz is concatenated."""
+    ext = os.path.splitext(output)[1].lower()
+    tmp = output + ".tmp"
+    if ext == ".npz":
+        merged = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]} if parts else {}
+        with open(tmp, "wb") as f: f.write(write_results("npz", merged))
+    elif ext == ".csv":
+        with open(tmp, "wb") as f:
+            for i, part in enumerate(parts):
+                f.write(pd.DataFrame(part).to_csv(sep=";", index=False, header=i == 0).encode("utf-8"))
+    else:
+        if pa is None: raise SystemExit(f"{ext} output requires pyarrow, which is not installed")
+        writer = None
+        for part in parts:
+            table = pa.table(part)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema) if ext == ".parquet" else pa_ipc.new_file(tmp, table.schema)
+            writer.write_table(table)
+        if writer is not None: writer.close()
+    os.replace(tmp, output)
+
+
+# --- Driver ---
+def run(inputs: List[str], output: str, model: str = "nn", shap_values: bool = False, workers: Optional[int] = None,
+        shard_rows: int = 20000, artifacts_dir: str = ".", restart: bool = False, keep_parts: bool = False) -> Dict[str, Any]:
+    started = time.perf_counter()
+    if not output.lower().endswith(OUTPUT_FORMATS): raise SystemExit(f"Output must end with one of {', '.join(OUTPUT_FORMATS)}")
+    workers = workers or os.cpu_count() or 1
+    artifact_paths = [os.path.join(artifacts_dir, f) for f in (["xgboost_model.pkl"] if model == "xgb" else ["cardio_model.pth", "scaler.pkl"])]
+
+    t = time.perf_counter()
+    plan = make_plan(inputs, shard_rows, model, shap_values, artifact_paths)
+    parts_dir = output + ".parts"
+    plan_path = os.path.join(parts_dir, "plan.json")
+    previous = None
+    if os.path.exists(plan_path) and not restart:
+        with open(plan_path) as f: previous = json.load(f)
+    if previous != plan:
+        if os.path.isdir(parts_dir):
+            print(f"Discarding parts in {parts_dir} ({'--restart' if restart else 'inputs, model or settings changed'}).")
+            shutil.rmtree(parts_dir)
+        os.makedirs(parts_dir)
+        with open(plan_path, "w") as f: json.dump(plan, f)
+    plan_seconds = time.perf_counter() - t
+
+    shards = plan["shards"]
+    part_paths = [os.path.join(parts_dir, f"shard-{i:06d}.npz") for i in range(len(shards))]
+    todo = [i for i, p in enumerate(part_paths) if not os.path.exists(p)]
+    print(f"{len(shards)} shards ({len(shards) - len(todo)} already done), {min(workers, max(len(todo), 1))} workers, model={model}, shap={shap_values}")
+
+    load_seconds = []
+    t = time.perf_counter()
+    if todo:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo)), initializer=init_worker,
+                                 initargs=(model, artifacts_dir, shap_values, threads)) as pool:
+            futures = [pool.submit(score_shard, i, shards[i], part_paths[i]) for i in todo]
+            for n, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                if result["load"]: load_seconds.append(result["load"])
+                print(f"  shard {result['index'] + 1}/{len(shards)}: {result['rows']} rows ({n}/{len(todo)} this run)")
+    score_seconds = time.perf_counter() - t
+
+    t = time.perf_counter()
+    parts, stage_totals, offsets = [], np.zeros(len(STAGES)), {}
+    multi_source = len(inputs) > 1
+    for shard, part_path in zip(shards, part_paths):
+        offset = offsets.get(shard["source"], 0)
+        part, stage_seconds = read_part(part_path, shard["source"], offset, multi_source)
+        offsets[shard["source"]] = offset + len(part["valid"])
+        stage_totals += stage_seconds
+        parts.append(part)
+    write_merged(output, parts)
+    merge_seconds = time.perf_counter() - t
+
+    rows = sum(len(p["valid"]) for p in parts)
+    elapsed = time.perf_counter() - started
+    summary = {
+        "inputs": inputs,
+        "output": output,
+        "model": model,
+        "shap": shap_values,
+        "rows": rows,
+        "invalid_rows": int(sum(int((p["valid"] == 0).sum()) for p in parts)),
+        "shards": len(shards),
+        "shards_resumed": len(shards) - len(todo),
+        "workers": workers,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed else 0.0,
+        "stage_seconds": {
+            "plan": plan_seconds,
+            "load": sum(load_seconds),
+            "score_wall": score_seconds,
+            **{f"shard_{s}": float(v) for s, v in zip(STAGES, stage_totals)},  # summed over workers
+            "merge": merge_seconds,
+        },
+    }
+    with open(output + ".summary.json", "w") as f: json.dump(summary, f, indent=2)
+    if not keep_parts: shutil.rmtree(parts_dir)
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({summary['rows_per_sec']:.0f} rows/sec) -> {output}")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline multi-core cardio batch scoring.")
+    parser.add_argument("inputs", nargs="+", help="CSV (cardio_train.csv layout) or .npy files")
+    parser.add_argument("--output", "-o", required=True, help="Result file: .csv, .npz, .arrow or .parquet")
+    parser.add_argument("--model", choices=["nn", "xgb"], default="nn")
+    parser.add_argument("--shap", action="store_true", help="Add per-feature attribution columns (TreeSHAP for XGB, integrated gradients for NN)")
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: CPU count)")
+    parser.add_argument("--shard-rows", type=int, default=20000)
+    parser.add_argument("--artifacts-dir", default=".")
+    parser.add_argument("--restart", action="store_true", help="Ignore parts left by an interrupted run")
+    parser.add_argument("--keep-parts", action="store_true")
+    args = parser.parse_args(argv)
+    try:
+        run(args.inputs, args.output, args.model, args.shap, args.workers, args.shard_rows, args.artifacts_dir, args.restart, args.keep_parts)
+    except (ColumnarError, OSError) as e:
+        raise SystemExit(f"Batch scoring failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
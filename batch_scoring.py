@@ -0,0 +1,158 @@
+from typing import Dict, List, Tuple
+
+import joblib
+import numpy as np
+import torch
+
+from artifact_bundle import ArtifactBundle, is_bundle, load_state_dict, scaler_from, scaler_section, state_dict_arrays, xgb_array, xgb_classifier
+from model_utils import CardioNN
+
+# Artifact files behind each cardio model (relative paths; their fingerprint is the model version)
+CARDIO_ARTIFACTS = {
+    "cardio_nn": ["cardio_model.pth", "scaler.pkl"],
+    "cardio_xgb": ["xgboost_model.pkl"],
+}
+
+# Model input orders, expressed in raw CardioInput column names ("age" is converted from days to years)
+CARDIO_NN_ORDER = ['gender', 'height', 'weight', 'ap_hi', 'ap_lo', 'cholesterol', 'gluc', 'smoke', 'alco', 'active', 'age']
+CARDIO_XGB_ORDER = ['age', 'gender', 'height', 'weight', 'ap_hi', 'ap_lo', 'cholesterol', 'gluc', 'smoke', 'alco', 'active']
+
+
+def cardio_matrix(columns: Dict[str, np.ndarray], order: List[str]) -> np.ndarray:
+    """Stacks raw columns into a (rows, features) float64 matrix in model order."""
+    X = np.empty((len(columns[order[0]]), len(order)), dtype=np.float64)
+    for i, c in enumerate(order):
+        X[:, i] = columns[c]
+    X[:, order.index('age')] /= 365.25
+    return X
+
+
+def predict_cardio_nn_batch(model, scaler, X: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """Vectorized CardioNN probabilities. Standardization uses the scaler's constants directly."""
+    scaled = ((X - scaler.mean_) / scaler.scale_).astype(np.float32)
+    probs = np.empty(len(X), dtype=np.float32)
+    with torch.inference_mode():
+        for start in range(0, len(X), chunk_size):
+            batch = torch.from_numpy(scaled[start:start + chunk_size])
+            probs[start:start + chunk_size] = torch.sigmoid(model(batch)).numpy().ravel()
+    return probs
+
+
+def predict_cardio_nn_mc(model, scaler, X: np.ndarray, passes: int = 50, seed: int = 0, max_rows: int = 65536) -> np.ndarray:
+    """
+    Monte Carlo dropout: (rows, passes) probabilities from `passes` stochastic forward passes.
+
+    The passes run as one replicated batch per chunk. layer1 comes before the first dropout, so it is
+    computed once per row and only the later layers see the replicas. Dropout masks come from a
+    seeded generator rather than model.train(), so the shared model is never mutated and the same
+    input always gets the same estimate.
+    """
+    scaled = torch.from_numpy(((X - scaler.mean_) / scaler.scale_).astype(np.float32))
+    generator = torch.Generator().manual_seed(seed)
+    p1, p2 = model.dropout1.p, model.dropout2.p
+    samples = np.empty((len(X), passes), dtype=np.float32)
+    chunk = max(max_rows // passes, 1)
+    with torch.inference_mode():
+        for start in range(0, len(X), chunk):
+            h = model.relu1(model.layer1(scaled[start:start + chunk])).repeat_interleave(passes, dim=0)
+            h = h * (torch.rand(h.shape, generator=generator) >= p1) / (1 - p1)
+            h = model.relu2(model.layer2(h))
+            h = h * (torch.rand(h.shape, generator=generator) >= p2) / (1 - p2)
+            logits = model.output(model.relu3(model.layer3(h)))
+            samples[start:start + chunk] = torch.sigmoid(logits).reshape(-1, passes).numpy()
+    return samples
+
+
+def predict_cardio_nn_grid(model, scaler, base: np.ndarray, axes: List[Tuple[int, np.ndarray]]) -> np.ndarray:
+    """
+    Probabilities over the outer product of `axes` ((feature index, values) in NN order, age in
+    years), with every other feature fixed at `base`. Only the swept columns change, so layer1 is
+    evaluated once for the base row and each grid point adds delta * W1[:, j] per swept column
+    (broadcast, no full first-layer matmul). The remaining layers run as one batch.
+    """
+    x0 = torch.from_numpy(((base - scaler.mean_) / scaler.scale_).astype(np.float32))
+    weight = model.layer1.weight
+    shape = [len(values) for _, values in axes]
+    with torch.inference_mode():
+        z = model.layer1(x0).reshape([1] * len(axes) + [-1])
+        for k, (j, values) in enumerate(axes):
+            delta = torch.from_numpy(((np.asarray(values, dtype=np.float64) - base[j]) / scaler.scale_[j]).astype(np.float32))
+            view = [1] * len(axes) + [1]
+            view[k] = len(values)
+            z = z + (delta[:, None] * weight[:, j]).reshape(view[:-1] + [-1])
+        h = model.relu2(model.layer2(model.relu1(z.reshape(-1, z.shape[-1]))))
+        logits = model.output(model.relu3(model.layer3(h)))
+        return torch.sigmoid(logits).reshape(shape).numpy()
+
+
+def mc_summary(samples: np.ndarray, level: float = 0.9) -> Dict[str, np.ndarray]:
+    """Per-row mean, std and central `level` interval of Monte Carlo samples."""
+    low, high = np.quantile(samples, [(1 - level) / 2, (1 + level) / 2], axis=1)
+    return {"mean": samples.mean(axis=1), "std": samples.std(axis=1, ddof=1), "lower": low, "upper": high}
+
+
+def predict_cardio_xgb_batch(model, X: np.ndarray) -> np.ndarray:
+    return model.predict_proba(X)[:, 1].astype(np.float32)
+
+
+
+class CardioNNNumpy:
+    """
+    CardioNN's eval-mode forward pass in float64 NumPy, with the scaler folded into layer 1.
+    Same probabilities as the torch model; for a single row it avoids the scaler and torch dispatch
+    overhead, which makes it the cheap backend for latency-bound requests.
+    """
+
+    def __init__(self, model, scaler):
+        layers = [(l.weight.detach().numpy().astype(np.float64), l.bias.detach().numpy().astype(np.float64))
+                  for l in (model.layer1, model.layer2, model.layer3, model.output)]
+        w1, b1 = layers[0]
+        # layer1((x - mean) / scale) = x @ (W1 / scale).T + (b1 - W1 @ (mean / scale))
+        self.layers = [((w1 / scaler.scale_).T.copy(), b1 - w1 @ (scaler.mean_ / scaler.scale_))]
+        self.layers += [(w.T.copy(), b) for w, b in layers[1:]]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Probabilities for raw rows in CARDIO_NN_ORDER (age in years)."""
+        h = X
+        for i, (w, b) in enumerate(self.layers):
+            h = h @ w + b
+            if i < len(self.layers) - 1: np.maximum(h, 0, out=h)
+        return 1.0 / (1.0 + np.exp(-h[:, 0]))
+
+# --- Artifact loading (shared by app.py startup and the offline batch CLI) ---
+# model_path may instead be an artifact bundle (see artifact_bundle.py); the other paths are then unused.
+def load_cardio_nn(model_path: str = "cardio_model.pth", scaler_path: str = "scaler.pkl"):
+    if is_bundle(model_path):
+        bundle = ArtifactBundle(model_path)
+        arrays, meta = bundle.arrays("cardio_nn"), bundle.metadata("cardio_nn")
+        check_feature_order(model_path, "cardio_nn", meta["features"], CARDIO_NN_ORDER)
+        return load_state_dict(CardioNN(len(meta["features"])), arrays), scaler_from(arrays, meta)
+    scaler = joblib.load(scaler_path)
+    model = CardioNN(11)
+    model.load_state_dict(torch.load(model_path))
+    model.eval()
+    return model, scaler
+
+
+def load_cardio_xgb(model_path: str = "xgboost_model.pkl"):
+    if is_bundle(model_path):
+        bundle = ArtifactBundle(model_path)
+        check_feature_order(model_path, "cardio_xgb", bundle.metadata("cardio_xgb")["features"], CARDIO_XGB_ORDER)
+        return xgb_classifier(bundle.arrays("cardio_xgb")["booster"])
+    return joblib.load(model_path)
+
+
+def check_feature_order(path: str, model: str, found: List[str], expected: List[str]):
+    if list(found) != expected: raise ValueError(f"{path}: {model} was bundled with features {found}, expected {expected}")
+
+
+def bundle_cardio_nn(model_path: str, scaler_path: str) -> Dict:
+    model, scaler = load_cardio_nn(model_path, scaler_path)
+    section = scaler_section(scaler)
+    section["arrays"].update(state_dict_arrays(model.state_dict()))
+    section["metadata"]["features"] = CARDIO_NN_ORDER
+    return section
+
+
+def bundle_cardio_xgb(model_path: str) -> Dict:
+    return {"arrays": {"booster": xgb_array(load_cardio_xgb(model_path))}, "metadata": {"features": CARDIO_XGB_ORDER}}
@@ -0,0 +1,274 @@
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+
+class ClinicalBertServer:
+    """
+    Batched fill-mask serving for ClinicalBERT.
+
+    Weights are only fetched on the first request, optionally converted to
+    int8 dynamic quantization (Linear layers), and a single tokenizer is reused
+    to pad a list of masked sentences into one forward pass.
+    """
+
+    def __init__(self, model_name: str = "medicalai/ClinicalBERT", quantize: bool = True,
+                 model: Optional[nn.Module] = None, tokenizer: Any = None,
+                 top_k: int = 5, max_batch: int = 32, max_length: int = 512,
+                 window_stride: Optional[int] = None, vocab_file: Optional[str] = None):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.top_k = top_k
+        self.max_batch = max_batch
+        self.max_length = max_length
+        # Long notes: windows of max_length - 2 tokens (room for [CLS]/[SEP]), half overlapping by default
+        self.window_stride = window_stride or (max_length - 2) // 2
+        # Optional candidate vocabulary (one term per line) used when a request brings none
+        self.vocab_file = vocab_file
+        self.default_vocab = None
+        self._vocab_cache: "OrderedDict[Tuple[str, ...], Dict[str, Any]]" = OrderedDict()
+        self._vocab_lock = threading.Lock()  # requests resolve vocabularies from threadpool workers
+        self.model = None
+        self.tokenizer = None
+        self.load_error = None
+        self._lock = threading.Lock()
+        if model is not None and tokenizer is not None:
+            self._prepare(model, tokenizer)
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+    def _prepare(self, model, tokenizer):
+        model.eval()
+        if self.quantize:
+            # The output projection stays float: it is tied to the input embeddings (no extra copy)
+            # and restricted-vocabulary scoring slices its rows directly.
+            decoder = model.get_output_embeddings()
+            spec = {name: torch.ao.quantization.default_dynamic_qconfig for name, module in model.named_modules()
+                    if isinstance(module, nn.Linear) and module is not decoder}
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                model = torch.ao.quantization.quantize_dynamic(model, spec, dtype=torch.qint8, inplace=True)
+        self.tokenizer = tokenizer
+        self.model = model
+        if self.vocab_file:
+            with open(self.vocab_file, "r", encoding="utf-8") as f:
+                terms = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+            self.default_vocab = self.candidate_vocab(terms)
+            print(f"ClinicalBERT candidate vocabulary: {len(self.default_vocab['ids'])} tokens from {self.vocab_file}")
+            if self.default_vocab["skipped"]: print(f"WARNING: not single tokens, left out: {self.default_vocab['skipped']}")
+
+    def ensure_loaded(self) -> bool:
+        """Loads the model on first use. Returns False if loading failed."""
+        if self.model is not None: return True
+        if self.load_error is not None: return False
+        with self._lock:
+            if self.model is None and self.load_error is None:
+                try:
+                    from transformers import AutoTokenizer, AutoModelForMaskedLM
+                    print(f"Loading ClinicalBERT ({self.model_name}, quantize={self.quantize})...")
+                    tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                    model = AutoModelForMaskedLM.from_pretrained(self.model_name)
+                    self._prepare(model, tokenizer)
+                    print("ClinicalBERT Loaded.")
+                except Exception as e:
+                    print(f"ClinicalBERT Failed: {e}")
+                    self.load_error = str(e)
+        return self.model is not None
+
+    def _encode(self, texts: List[str]):
+        return self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="pt")
+
+    def _mlm_transform(self, hidden: torch.Tensor) -> torch.Tensor:
+        """MLM head up to (not including) the projection onto the vocabulary."""
+        model = self.model
+        if hasattr(model, "cls"):  # BertForMaskedLM
+            return model.cls.predictions.transform(hidden)
+        # DistilBertForMaskedLM (medicalai/ClinicalBERT)
+        return model.vocab_layer_norm(model.activation(model.vocab_transform(hidden)))
+
+    def candidate_vocab(self, terms: List[str]) -> Dict[str, Any]:
+        """
+        Maps terms to vocabulary ids and slices the matching rows of the output projection.
+        Terms that are not a single (known) token in the model's vocabulary are skipped.
+        """
+        key = tuple(terms)
+        with self._vocab_lock:
+            if key in self._vocab_cache:
+                self._vocab_cache.move_to_end(key)
+                return self._vocab_cache[key]
+        ids, skipped = {}, []
+        for term, tokens in zip(terms, self.tokenizer(list(terms), add_special_tokens=False)["input_ids"]):
+            if len(tokens) == 1 and tokens[0] != self.tokenizer.unk_token_id: ids.setdefault(tokens[0], term)
+            else: skipped.append(term)
+        if not ids: raise ValueError("None of the candidate terms is a single token in the model vocabulary")
+
+        decoder = self.model.get_output_embeddings()
+        index = torch.tensor(list(ids), dtype=torch.long)
+        with torch.inference_mode():
+            weight = decoder.weight[index].clone()
+            bias = decoder.bias[index].clone() if decoder.bias is not None else torch.zeros(len(index))
+        vocab = {"ids": index, "weight": weight, "bias": bias, "skipped": skipped}
+        with self._vocab_lock:
+            self._vocab_cache[key] = vocab
+            while len(self._vocab_cache) > 16: self._vocab_cache.popitem(last=False)
+        return vocab
+
+    def resolve_vocab(self, candidates: Optional[List[str]] = None, full_vocabulary: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Request candidates win over the configured vocabulary; None means score the full vocabulary.
+        Request candidates that are not a single token are rejected rather than silently left out.
+        """
+        if full_vocabulary: return None
+        if not candidates: return self.default_vocab
+        vocab = self.candidate_vocab(candidates)
+        if vocab["skipped"]:
+            raise ValueError(f"Candidates are not single tokens in the model vocabulary: {vocab['skipped']}")
+        return vocab
+
+    def _hidden_at(self, encoded, positions: torch.Tensor) -> torch.Tensor:
+        """Runs the encoder and keeps only the hidden states at the (row, col) positions given."""
+        with torch.inference_mode():
+            hidden = self.model.base_model(**encoded).last_hidden_state
+            return hidden[positions[:, 0], positions[:, 1]]
+
+    def _top_k(self, hidden: torch.Tensor, top_k: int, vocab: Optional[Dict[str, Any]] = None) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Top-k (probabilities, token ids) per row. With a vocab, only its rows of the projection are computed."""
+        with torch.inference_mode():
+            hidden = self._mlm_transform(hidden)
+            if vocab is None:
+                probs = self.model.get_output_embeddings()(hidden).softmax(dim=-1)
+                return probs.topk(min(top_k, probs.shape[-1]), dim=-1)
+            probs = (hidden @ vocab["weight"].T + vocab["bias"]).softmax(dim=-1)
+            scores, index = probs.topk(min(top_k, probs.shape[-1]), dim=-1)
+            return scores, vocab["ids"][index]
+
+    def _format(self, input_ids: torch.Tensor, position: int, scores: torch.Tensor, token_ids: torch.Tensor) -> List[Dict[str, Any]]:
+        # Same record layout as transformers' fill-mask pipeline
+        results = []
+        for score, token_id in zip(scores.tolist(), token_ids.tolist()):
+            filled = input_ids.clone()
+            filled[position] = token_id
+            results.append({
+                "score": score,
+                "token": token_id,
+                "token_str": self.tokenizer.decode([token_id]).strip(),
+                "sequence": self.tokenizer.decode(filled, skip_special_tokens=True),
+            })
+        return results
+
+    def fill_mask(self, texts: List[str], top_k: Optional[int] = None, vocab: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Fills every [MASK] in each sentence. A sentence with a single mask yields a list
+        of candidates (like the pipeline), one with several masks yields a list per mask.
+        With a vocab (see candidate_vocab), scores are renormalized over its tokens only.
+        """
+        if not self.ensure_loaded():
+            raise RuntimeError(f"ClinicalBERT unavailable: {self.load_error}")
+        top_k = top_k or self.top_k
+        outputs = []
+        for start in range(0, len(texts), self.max_batch):
+            outputs.extend(self._fill_encoded(self._encode(texts[start:start + self.max_batch]), top_k, vocab))
+        return outputs
+
+    def _fill_encoded(self, encoded, top_k: int, vocab: Optional[Dict[str, Any]] = None) -> List[Any]:
+        positions = (encoded["input_ids"] == self.tokenizer.mask_token_id).nonzero()
+        scores, token_ids = self._top_k(self._hidden_at(encoded, positions), top_k, vocab)
+
+        per_text = [[] for _ in range(encoded["input_ids"].shape[0])]
+        for (row, col), s, t in zip(positions.tolist(), scores, token_ids):
+            ids = encoded["input_ids"][row][encoded["attention_mask"][row].bool()]
+            per_text[row].append(self._format(ids, col, s, t))
+        return [masks[0] if len(masks) == 1 else masks for masks in per_text]
+
+    def fill_mask_auto(self, texts: List[str], top_k: Optional[int] = None, vocab: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        fill_mask for the texts that fit in one window; longer ones go through fill_mask_long
+        instead of being truncated. Each text is tokenized once, for both the routing and the scoring.
+        """
+        if not self.ensure_loaded():
+            raise RuntimeError(f"ClinicalBERT unavailable: {self.load_error}")
+        top_k = top_k or self.top_k
+        tok = self.tokenizer
+        token_ids = self._token_ids(texts)
+        long = {i for i, ids in enumerate(token_ids) if len(ids) > self.max_length - 2}
+        short = [i for i in range(len(texts)) if i not in long]
+        outputs: List[Any] = [None] * len(texts)
+        for start in range(0, len(short), self.max_batch):
+            chunk = short[start:start + self.max_batch]
+            encoded = self._pad([[tok.cls_token_id] + token_ids[i] + [tok.sep_token_id] for i in chunk])
+            for i, result in zip(chunk, self._fill_encoded(encoded, top_k, vocab)):
+                outputs[i] = result
+        for i in sorted(long):
+            outputs[i] = self.fill_mask_long(texts[i], top_k, vocab, ids=token_ids[i])
+        return outputs
+
+    def _token_ids(self, texts: List[str]) -> List[List[int]]:
+        return self.tokenizer(list(texts), add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+
+    def _pad(self, rows: List[List[int]]) -> Dict[str, torch.Tensor]:
+        longest = max(len(r) for r in rows)
+        input_ids = torch.full((len(rows), longest), self.tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), longest), dtype=torch.long)
+        for i, r in enumerate(rows):
+            input_ids[i, :len(r)] = torch.tensor(r)
+            attention_mask[i, :len(r)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+    def is_long(self, text: str) -> bool:
+        """True if the text does not fit in a single window."""
+        return len(self._token_ids([text])[0]) > self.max_length - 2
+
+    def _windows(self, n_tokens: int) -> List[int]:
+        width = self.max_length - 2
+        starts = list(range(0, max(n_tokens - width, 0) + 1, self.window_stride))
+        if starts[-1] + width < n_tokens: starts.append(n_tokens - width)
+        return starts
+
+    def fill_mask_long(self, text: str, top_k: Optional[int] = None, vocab: Optional[Dict[str, Any]] = None,
+                       ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Fill-mask for notes longer than the model's context. The note is tokenized once and cut
+        into overlapping windows; each [MASK] is predicted by the window in which it has the most
+        context on both sides. Only windows owning a mask are run, at most max_batch at a time.
+        ids, if given, is the note already tokenized without special tokens.
+        """
+        if not self.ensure_loaded():
+            raise RuntimeError(f"ClinicalBERT unavailable: {self.load_error}")
+        top_k = top_k or self.top_k
+        tok = self.tokenizer
+        if ids is None: ids = self._token_ids([text])[0]
+        width = self.max_length - 2
+        starts = self._windows(len(ids))
+        mask_positions = [i for i, t in enumerate(ids) if t == tok.mask_token_id]
+
+        # window index -> [(mask ordinal, token position)]
+        owned: Dict[int, List[Tuple[int, int]]] = {}
+        for ordinal, pos in enumerate(mask_positions):
+            best = max((w for w, start in enumerate(starts) if start <= pos < start + width),
+                       key=lambda w: min(pos - starts[w], starts[w] + width - 1 - pos))
+            owned.setdefault(best, []).append((ordinal, pos))
+
+        masks: List[Optional[Dict[str, Any]]] = [None] * len(mask_positions)
+        windows = sorted(owned)
+        for chunk_start in range(0, len(windows), self.max_batch):
+            chunk = windows[chunk_start:chunk_start + self.max_batch]
+            rows = [[tok.cls_token_id] + ids[starts[w]:starts[w] + width] + [tok.sep_token_id] for w in chunk]
+            targets = [(i, ordinal, pos - starts[w] + 1) for i, w in enumerate(chunk) for ordinal, pos in owned[w]]
+            positions = torch.tensor([[i, col] for i, _, col in targets], dtype=torch.long)
+            hidden = self._hidden_at(self._pad(rows), positions)
+            scores, token_ids = self._top_k(hidden, top_k, vocab)
+
+            for (_, ordinal, _), s, t in zip(targets, scores.tolist(), token_ids.tolist()):
+                masks[ordinal] = {
+                    "mask_index": ordinal,
+                    "token_position": mask_positions[ordinal],
+                    "candidates": [{"score": score, "token": token_id, "token_str": tok.decode([token_id]).strip()}
+                                   for score, token_id in zip(s, t)],
+                }
+        return {"n_tokens": len(ids), "n_windows": len(starts), "windows_scored": len(windows), "masks": masks}
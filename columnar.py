@@ -0,0 +1,264 @@
+import gzip
+import io
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from json_responses import dumps
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # Arrow IPC support is optional
+    pa = None
+    pa_ipc = None
+
+# Raw CardioInput columns, in cardio_train.csv order ("id" and "cardio" are optional extras)
+CARDIO_COLUMNS = ['age', 'gender', 'height', 'weight', 'ap_hi', 'ap_lo', 'cholesterol', 'gluc', 'smoke', 'alco', 'active']
+
+# Vectorized validation: (low, high) inclusive bounds, or the set of allowed codes
+CARDIO_RANGES = {
+    'age': (1, 120 * 365.25),
+    'height': (50, 250),
+    'weight': (10, 300),
+    'ap_hi': (40, 300),
+    'ap_lo': (20, 200),
+}
+CARDIO_CODES = {
+    'gender': (1, 2),
+    'cholesterol': (1, 2, 3),
+    'gluc': (1, 2, 3),
+    'smoke': (0, 1),
+    'alco': (0, 1),
+    'active': (0, 1),
+}
+
+FORMATS = {
+    "csv": "text/csv",
+    "npy": "application/x-npy",
+    "npz": "application/x-npz",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class ColumnarError(ValueError):
+    pass
+
+
+class PayloadTooLarge(ColumnarError):
+    pass
+
+
+def detect_format(body: bytes, content_type: Optional[str] = None) -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    for fmt, media_type in FORMATS.items():
+        if content_type == media_type: return fmt
+    if content_type == "application/vnd.apache.arrow.file": return "arrow"
+    if body.startswith(b"\x93NUMPY"): return "npy"
+    if body.startswith(b"PK\x03\x04"): return "npz"
+    if body.startswith(b"ARROW1") or body.startswith(b"\xff\xff\xff\xff"): return "arrow"
+    return "csv"
+
+
+def maybe_decompress(body: bytes, max_bytes: Optional[int] = None) -> Tuple[bytes, bool]:
+    """Inflates a gzip body; raises PayloadTooLarge as soon as it would exceed max_bytes."""
+    if body[:2] != b"\x1f\x8b": return body, False
+    if max_bytes is None: return gzip.decompress(body), True
+    parts, size, rest = [], 0, body
+    while rest:  # one pass per gzip member
+        inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            part = inflate.decompress(rest, max_bytes - size + 1)
+        except zlib.error as e:
+            raise ColumnarError(f"Invalid gzip body: {e}")
+        size += len(part)
+        if size > max_bytes: raise PayloadTooLarge(f"Decompressed body exceeds {max_bytes} bytes")
+        if not inflate.eof: raise ColumnarError("Invalid gzip body: truncated stream")
+        parts.append(part)
+        rest = inflate.unused_data
+    return b"".join(parts), True
+
+
+def read_columns(body: bytes, fmt: str) -> Dict[str, np.ndarray]:
+    """Parses a columnar payload into {column: 1-D array}. Only known columns are kept."""
+    wanted = CARDIO_COLUMNS + ['id']
+    if fmt == "csv":
+        header = body[:body.find(b"\n")] if b"\n" in body else body
+        sep = ";" if b";" in header else ","
+        frame = pd.read_csv(io.BytesIO(body), sep=sep, usecols=lambda c: c in wanted, engine="c")
+        # A non-numeric cell invalidates its row (NaN), not the whole payload
+        return {c: frame[c].to_numpy() if c == 'id' else pd.to_numeric(frame[c], errors="coerce").to_numpy(np.float64)
+                for c in frame.columns}
+    if fmt == "npy":
+        return columns_from_array(np.load(io.BytesIO(body), allow_pickle=False))
+    if fmt == "npz":
+        with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+            return {c: archive[c] for c in archive.files if c in wanted}
+    if fmt == "arrow":
+        if pa is None: raise ColumnarError("Arrow IPC requires pyarrow, which is not installed")
+        reader = pa_ipc.open_file(pa.BufferReader(body)) if body.startswith(b"ARROW1") else pa_ipc.open_stream(body)
+        table = reader.read_all()
+        return {c: table.column(c).to_numpy() for c in table.column_names if c in wanted}
+    raise ColumnarError(f"Unsupported format: {fmt}")
+
+
+def columns_from_array(array: np.ndarray) -> Dict[str, np.ndarray]:
+    """Columns of a structured array, or of a (rows, 11) matrix in CARDIO_COLUMNS order."""
+    if array.dtype.names:
+        return {c: np.asarray(array[c]) for c in array.dtype.names if c in CARDIO_COLUMNS + ['id']}
+    if array.ndim != 2 or array.shape[1] != len(CARDIO_COLUMNS):
+        raise ColumnarError(f".npy payload must be (rows, {len(CARDIO_COLUMNS)}) in column order {CARDIO_COLUMNS}")
+    return {c: np.asarray(array[:, i]) for i, c in enumerate(CARDIO_COLUMNS)}
+
+
+def validate_columns(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Returns a boolean mask of rows passing the range/code checks (all vectorized)."""
+    missing = [c for c in CARDIO_COLUMNS if c not in columns]
+    if missing: raise ColumnarError(f"Missing columns: {missing}")
+    lengths = {len(columns[c]) for c in CARDIO_COLUMNS}
+    if len(lengths) != 1: raise ColumnarError("Columns have different lengths")
+
+    valid = np.ones(lengths.pop(), dtype=bool)
+    for c in CARDIO_COLUMNS:
+        col = np.asarray(columns[c], dtype=np.float64)
+        valid &= np.isfinite(col)
+        if c in CARDIO_RANGES:
+            low, high = CARDIO_RANGES[c]
+            valid &= (col >= low) & (col <= high)
+        else:
+            valid &= np.isin(col, CARDIO_CODES[c])
+    return valid
+
+
+def write_results(fmt: str, results: Dict[str, np.ndarray]) -> bytes:
+    """Serializes result columns in the same format as the request."""
+    if fmt == "csv":
+        return pd.DataFrame(results).to_csv(sep=";", index=False).encode("utf-8")
+    if fmt == "npy":
+        # One structured array, a field per result column
+        columns = {name: np.asarray(col) for name, col in results.items()}
+        columns = {name: col.astype(str) if col.dtype == object else col for name, col in columns.items()}
+        array = np.empty(len(next(iter(columns.values()))), dtype=[(name, col.dtype) for name, col in columns.items()])
+        for name, col in columns.items(): array[name] = col
+        buf = io.BytesIO()
+        np.save(buf, array, allow_pickle=False)
+        return buf.getvalue()
+    if fmt == "npz":
+        buf = io.BytesIO()
+        np.savez(buf, **results)
+        return buf.getvalue()
+    if fmt == "arrow":
+        table = pa.table(results)
+        sink = pa.BufferOutputStream()
+        with pa_ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    raise ColumnarError(f"Unsupported format: {fmt}")
+
+
+# --- Incremental CSV (streaming endpoint) ---
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class CSVRowChunker:
+    """
+    Incremental parser for `;`/`,`-separated CSV arriving in arbitrary byte pieces.
+
+    feed() buffers complete lines and returns a parsed {column: array} chunk each time
+    chunk_rows lines are available; close() flushes the tail. Only one chunk of lines plus
+    the current partial line is ever held, so memory is independent of the payload size.
+    A gzip body (gzip=True) is inflated incrementally as it arrives, at most
+    max_inflate_bytes at a time: a small, highly compressed piece cannot expand in memory
+    all at once (use feed_iter() to consume each chunk before the next piece is inflated).
+    """
+
+    def __init__(self, chunk_rows: int = 4096, max_line_bytes: int = 64 * 1024, gzip: bool = False,
+                 max_inflate_bytes: int = 1 << 20):
+        self.chunk_rows = chunk_rows
+        self.max_line_bytes = max_line_bytes
+        self.max_inflate_bytes = max_inflate_bytes
+        self.header: Optional[List[str]] = None
+        self.sep = ";"
+        self.rows = 0
+        self._partial = b""
+        self._lines: List[bytes] = []
+        self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzip else None
+
+    def feed(self, data: bytes) -> List[Dict[str, np.ndarray]]:
+        return list(self.feed_iter(data))
+
+    def feed_iter(self, data: bytes) -> Iterator[Dict[str, np.ndarray]]:
+        if self._inflate is None:
+            yield from self._split(data)
+            return
+        while data:
+            try:
+                piece = self._inflate.decompress(data, self.max_inflate_bytes)
+            except zlib.error as e:
+                raise ColumnarError(f"Invalid gzip stream: {e}")
+            data = self._inflate.unconsumed_tail
+            if self._inflate.eof:  # concatenated gzip members
+                data, self._inflate = self._inflate.unused_data, zlib.decompressobj(16 + zlib.MAX_WBITS)
+            yield from self._split(piece)
+
+    def _split(self, data: bytes) -> List[Dict[str, np.ndarray]]:
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        if len(self._partial) > self.max_line_bytes:
+            raise ColumnarError(f"Line exceeds {self.max_line_bytes} bytes")
+        return self._add(lines)
+
+    def close(self) -> List[Dict[str, np.ndarray]]:
+        lines = [self._partial] if self._partial.strip() else []
+        self._partial = b""
+        chunks = self._add(lines)
+        if self._lines: chunks.append(self._parse())
+        return chunks
+
+    def _add(self, lines: List[bytes]) -> List[Dict[str, np.ndarray]]:
+        chunks = []
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if not line.strip(): continue
+            if self.header is None:
+                self._read_header(line)
+                continue
+            self._lines.append(line)
+            if len(self._lines) >= self.chunk_rows:
+                chunks.append(self._parse())
+        return chunks
+
+    def _read_header(self, line: bytes):
+        text = line.decode("utf-8-sig")
+        self.sep = ";" if ";" in text else ","
+        self.header = [c.strip().strip('"') for c in text.split(self.sep)]
+        missing = [c for c in CARDIO_COLUMNS if c not in self.header]
+        if missing: raise ColumnarError(f"Missing columns: {missing}")
+
+    def _parse(self) -> Dict[str, np.ndarray]:
+        wanted = CARDIO_COLUMNS + ['id']
+        body = b"\n".join(self._lines)
+        self._lines = []
+        try:
+            frame = pd.read_csv(io.BytesIO(body), sep=self.sep, header=None, names=self.header,
+                                usecols=lambda c: c in wanted, engine="c")
+        except (ValueError, pd.errors.ParserError) as e:
+            raise ColumnarError(f"Malformed rows after line {self.rows + 1}: {e}")
+        self.rows += len(frame)
+        # Unparseable cells become NaN, so the row fails validation instead of the whole stream
+        return {c: frame[c].to_numpy() if c == 'id' else pd.to_numeric(frame[c], errors="coerce").to_numpy(np.float64)
+                for c in frame.columns}
+
+
+def format_stream_chunk(fmt: str, results: Dict[str, np.ndarray], header: bool = False) -> bytes:
+    """One chunk of streamed results: NDJSON lines, or CSV rows (with the header on the first chunk)."""
+    if fmt == "csv":
+        return pd.DataFrame(results).to_csv(sep=";", index=False, header=header, na_rep="").encode("utf-8")
+    if fmt == "ndjson":
+        names = list(results)
+        columns = [[None if v != v else v for v in results[n].tolist()] for n in names]  # NaN -> null
+        return b"".join(dumps(dict(zip(names, row))) + b"\n" for row in zip(*columns))
+    raise ColumnarError(f"Unsupported stream format: {fmt}")
+
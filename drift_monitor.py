@@ -0,0 +1,228 @@
+import json
+import math
+import os
+import threading
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from prediction_cache import artifact_fingerprint
+
+# Reference deciles give 10 bins per numeric feature: the live histogram over them is both the
+# quantile sketch and the PSI distribution, so memory per feature is fixed.
+REFERENCE_QUANTILES = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+REPORT_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+PREDICTION_BINS = 10
+PSI_EPSILON = 1e-4
+# Conventional PSI bands: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 significant shift
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+
+def psi(reference: List[float], counts: List[int]) -> Optional[float]:
+    """Population stability index of live counts against reference proportions."""
+    total = sum(counts)
+    if not total: return None
+    score = 0.0
+    for r, c in zip(reference, counts):
+        r, l = max(r, PSI_EPSILON), max(c / total, PSI_EPSILON)
+        score += (l - r) * math.log(l / r)
+    return score
+
+
+def drift_status(score: Optional[float]) -> str:
+    if score is None: return "no_data"
+    if score >= PSI_SIGNIFICANT: return "significant"
+    if score >= PSI_MODERATE: return "moderate"
+    return "stable"
+
+
+class NumericStats:
+    """Welford mean/variance, min/max and a fixed-bin histogram (bins from the reference deciles)."""
+    __slots__ = ("edges", "counts", "n", "mean", "m2", "min", "max")
+
+    def __init__(self, edges: List[float]):
+        self.edges = list(edges)
+        self.counts = [0] * (len(self.edges) + 1)
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+        self.min, self.max = math.inf, -math.inf
+
+    def add(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min: self.min = x
+        if x > self.max: self.max = x
+        self.counts[bisect_right(self.edges, x)] += 1
+
+    def add_many(self, xs: np.ndarray):
+        if not len(xs): return
+        n, mean = len(xs), float(xs.mean())
+        m2 = float(((xs - mean) ** 2).sum())
+        # Chan et al. parallel merge of (n, mean, M2)
+        total = self.n + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.mean += delta * n / total
+        self.n = total
+        self.min, self.max = min(self.min, float(xs.min())), max(self.max, float(xs.max()))
+        binned = np.bincount(np.searchsorted(self.edges, xs, side="right"), minlength=len(self.counts))
+        self.counts = [a + int(b) for a, b in zip(self.counts, binned)]
+
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile, interpolated linearly within the histogram bin."""
+        if not self.n: return None
+        bounds = [self.min] + self.edges + [self.max]
+        target, seen = q * self.n, 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                low, high = max(bounds[i], self.min), min(bounds[i + 1], self.max)
+                return low + (high - low) * (target - seen) / c
+            seen += c
+        return self.max
+
+
+class DriftMonitor:
+    """
+    Streaming comparison of live cardio inputs and predictions against a reference profile
+    (see build_reference). Updates are O(features) with no per-request allocation beyond the
+    input dict; report() computes PSI / mean shift on demand.
+    """
+
+    def __init__(self, reference: Dict[str, Any], min_samples: int = 100):
+        self.reference = reference
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.numeric = {f: NumericStats(ref["edges"]) for f, ref in self.reference["numeric"].items()}
+            self.categorical = {f: {} for f in self.reference["categorical"]}
+            self.predictions: Dict[str, List[int]] = {}
+            self.observed = 0
+
+    def observe(self, features: Dict[str, Any], predictions: Optional[Dict[str, float]] = None):
+        with self._lock:
+            self.observed += 1
+            for f, stats in self.numeric.items():
+                stats.add(float(features[f]))
+            for f, counts in self.categorical.items():
+                key = str(int(features[f]))
+                counts[key] = counts.get(key, 0) + 1
+            for model, p in (predictions or {}).items():
+                hist = self.predictions.setdefault(model, [0] * PREDICTION_BINS)
+                hist[min(int(p * PREDICTION_BINS), PREDICTION_BINS - 1)] += 1
+
+    def observe_batch(self, columns: Dict[str, np.ndarray], predictions: Optional[Dict[str, np.ndarray]] = None):
+        """Vectorized update for bulk endpoints (rows must already be validated)."""
+        with self._lock:
+            self.observed += len(next(iter(columns.values())))
+            for f, stats in self.numeric.items():
+                stats.add_many(np.asarray(columns[f], dtype=np.float64))
+            for f, counts in self.categorical.items():
+                values, n = np.unique(np.asarray(columns[f]).astype(np.int64), return_counts=True)
+                for v, c in zip(values.tolist(), n.tolist()):
+                    counts[str(v)] = counts.get(str(v), 0) + c
+            for model, probs in (predictions or {}).items():
+                hist = self.predictions.setdefault(model, [0] * PREDICTION_BINS)
+                binned = np.bincount(np.clip((np.asarray(probs) * PREDICTION_BINS).astype(np.int64), 0, PREDICTION_BINS - 1),
+                                     minlength=PREDICTION_BINS)
+                for i, c in enumerate(binned.tolist()): hist[i] += c
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            features, scores = {}, {}
+            for f, stats in self.numeric.items():
+                ref = self.reference["numeric"][f]
+                score = psi(ref["proportions"], stats.counts)
+                features[f] = {
+                    "psi": score,
+                    "status": drift_status(score),
+                    "mean": stats.mean if stats.n else None,
+                    "std": stats.std() if stats.n else None,
+                    "reference_mean": ref["mean"],
+                    "reference_std": ref["std"],
+                    "mean_shift_std": (stats.mean - ref["mean"]) / ref["std"] if stats.n and ref["std"] else None,
+                    "quantiles": {str(q): stats.quantile(q) for q in REPORT_QUANTILES},
+                    "reference_quantiles": ref["quantiles"],
+                }
+                scores[f] = score
+            for f, counts in self.categorical.items():
+                ref = self.reference["categorical"][f]
+                categories = sorted(set(ref) | set(counts))
+                score = psi([ref.get(c, 0.0) for c in categories], [counts.get(c, 0) for c in categories])
+                total = sum(counts.values())
+                features[f] = {
+                    "psi": score,
+                    "status": drift_status(score),
+                    "frequencies": {c: counts.get(c, 0) / total for c in categories} if total else {},
+                    "reference_frequencies": ref,
+                }
+                scores[f] = score
+            models = {}
+            for model, hist in self.predictions.items():
+                ref = self.reference["predictions"].get(model)
+                score = psi(ref, hist) if ref else None
+                models[model] = {"psi": score, "status": drift_status(score), "histogram": list(hist), "reference_histogram": ref}
+                scores[f"prediction:{model}"] = score
+
+        known = {k: v for k, v in scores.items() if v is not None}
+        worst = max(known, key=known.get) if known else None
+        enough = self.observed >= self.min_samples
+        return {
+            "observed": self.observed,
+            "min_samples": self.min_samples,
+            "status": drift_status(known[worst]) if enough and worst else "insufficient_data",
+            "max_psi": known[worst] if worst else None,
+            "max_psi_feature": worst,
+            "features": features,
+            "predictions": models,
+            "reference": {"rows": self.reference["rows"], "source": self.reference["source"]},
+        }
+
+
+def build_reference(columns: Dict[str, np.ndarray], numeric: List[str], categorical: List[str],
+                    predictions: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+    """Reference profile from a (validated) training set: decile bins, moments and frequencies."""
+    profile = {"rows": len(columns[numeric[0]]), "numeric": {}, "categorical": {}, "predictions": {}}
+    for f in numeric:
+        x = np.asarray(columns[f], dtype=np.float64)
+        edges = np.unique(np.quantile(x, REFERENCE_QUANTILES)).tolist()
+        counts = np.bincount(np.searchsorted(edges, x, side="right"), minlength=len(edges) + 1)
+        profile["numeric"][f] = {
+            "mean": float(x.mean()),
+            "std": float(x.std(ddof=1)),
+            "edges": edges,
+            "proportions": (counts / len(x)).tolist(),
+            "quantiles": {str(q): float(v) for q, v in zip(REPORT_QUANTILES, np.quantile(x, REPORT_QUANTILES))},
+        }
+    for f in categorical:
+        values, counts = np.unique(np.asarray(columns[f]).astype(np.int64), return_counts=True)
+        profile["categorical"][f] = {str(v): c / counts.sum() for v, c in zip(values.tolist(), counts.tolist())}
+    for model, probs in (predictions or {}).items():
+        binned = np.bincount(np.clip((probs * PREDICTION_BINS).astype(np.int64), 0, PREDICTION_BINS - 1), minlength=PREDICTION_BINS)
+        profile["predictions"][model] = (binned / len(probs)).tolist()
+    return profile
+
+
+def load_or_build_reference(path: str, source_paths: List[str], build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Cached reference profile, rebuilt when any of source_paths changes."""
+    source = artifact_fingerprint(source_paths)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                reference = json.load(f)
+            if reference.get("source") == source: return reference
+        except (OSError, ValueError):
+            pass
+    reference = build()
+    reference["source"] = source
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(reference, f)
+    return reference
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+
+MEMBERS = ("cardio_nn", "cardio_xgb")
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """'nn=0.6,xgb=0.4' -> {'cardio_nn': 0.6, 'cardio_xgb': 0.4}, normalized to sum to 1."""
+    weights = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        member = f"cardio_{name.strip()}"
+        if member not in MEMBERS: raise ValueError(f"Unknown ensemble member '{name.strip()}' in '{spec}' (use nn or xgb)")
+        weights[member] = float(value)
+    total = sum(weights.values())
+    if not weights or total <= 0 or min(weights.values()) < 0: raise ValueError(f"Invalid ensemble weights '{spec}'")
+    return {name: w / total for name, w in weights.items()}
+
+
+class CardioEnsemble:
+    """
+    Weighted average of the member models' probabilities. Members are scored concurrently on a small
+    thread pool; torch and XGBoost both release the GIL while computing, so wall-clock time is close
+    to the slower member when there are cores to spare.
+    """
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = weights
+        self._executor = ThreadPoolExecutor(max_workers=len(weights), thread_name_prefix="ensemble")
+
+    def score(self, members: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """members: name -> call returning probabilities (array or float). Disagreement is max - min per row."""
+        futures = {name: self._executor.submit(members[name]) for name in self.weights}
+        probs = {name: np.asarray(f.result(), dtype=np.float64) for name, f in futures.items()}
+        stacked = np.stack(list(probs.values()))
+        combined = sum(self.weights[name] * p for name, p in probs.items())
+        return {"risk_probability": combined, "disagreement": stacked.max(axis=0) - stacked.min(axis=0), "members": probs}
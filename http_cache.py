@@ -0,0 +1,60 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def input_hash(payload: Dict[str, Any]) -> str:
+    """Stable hash of a validated request payload (key order and whitespace don't matter)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def body_digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def make_etag(endpoint: str, payload_hash: str, model_version: str, body: str = "") -> str:
+    """
+    Weak ETag: identical for the same endpoint, input, model version and served body (body_digest).
+    Weak because GZipMiddleware may or may not compress the same representation.
+    """
+    digest = hashlib.sha256(f"{endpoint}|{payload_hash}|{model_version}|{body}".encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    if not if_none_match: return False
+    if if_none_match.strip() == "*": return True
+    return _opaque(etag) in [_opaque(tag) for tag in if_none_match.split(",")]
+
+
+class PayloadStore:
+    """Bounded LRU of input hash -> payload so a POSTed input can later be fetched by GET."""
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._payloads: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, payload: Dict[str, Any]) -> str:
+        key = input_hash(payload)
+        with self._lock:
+            self._payloads[key] = payload
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
+        return key
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None: self._payloads.move_to_end(key)
+            return payload
@@ -0,0 +1,100 @@
+import itertools
+import math
+from typing import Any, Dict, Tuple
+
+import joblib
+import numpy as np
+import torch
+
+from artifact_bundle import ArtifactBundle, encoder_classes, is_bundle, label_encoders, load_state_dict, scaler_from, scaler_section, state_dict_arrays
+from model_utils import IdiopathicNN
+
+FEATURES = ("age", "gender", "smoking_history")
+AGE_RANGE = (0, 120)  # IdiopathicInput bounds; the table covers every integer age in between
+
+
+class IdiopathicTable:
+    """
+    IdiopathicNN evaluated once over its whole input space (integer age x sex code x smoking code),
+    so a prediction is an array lookup with no scaler, encoder or torch call.
+
+    Attributions are exact Shapley values of the IPF risk, read from the table: with three features
+    there are only eight coalitions. Features left out of a coalition take the reference value, which is
+    the training mean age and an even mix of the sex / smoking codes.
+    """
+
+    def __init__(self, risk: np.ndarray, attributions: np.ndarray, base_value: float, sexes: Dict[str, int],
+                 smoking: Dict[str, int], min_age: int, version: str):
+        self.risk = risk                  # (ages, sexes, smoking)
+        self.attributions = attributions  # (ages, sexes, smoking, 3)
+        self.base_value = base_value
+        self.sexes = sexes
+        self.smoking = smoking
+        self.min_age = min_age
+        self.version = version
+
+    @classmethod
+    def build(cls, model, scaler, encoders, version: str, age_range: Tuple[int, int] = AGE_RANGE) -> "IdiopathicTable":
+        ages = np.arange(age_range[0], age_range[1] + 1)
+        sexes, smoking = len(encoders["sex"].classes_), len(encoders["smoking"].classes_)
+        grid = np.array(list(itertools.product(scaler.transform(ages.reshape(-1, 1))[:, 0], range(sexes), range(smoking))), dtype=np.float32)
+        with torch.no_grad():
+            prob = model(torch.from_numpy(grid)).numpy().reshape(len(ages), sexes, smoking)
+        risk = (1.0 - prob).astype(np.float64)  # the model outputs P(normal); 0 = IPF
+        reference_age = int(np.clip(round(float(scaler.mean_[0])), *age_range)) - age_range[0]
+        attributions, base_value = cls._shapley(risk, reference_age)
+        return cls(risk, attributions, base_value, {c: i for i, c in enumerate(encoders["sex"].classes_)},
+                   {c: i for i, c in enumerate(encoders["smoking"].classes_)}, age_range[0], version)
+
+    @staticmethod
+    def _shapley(risk: np.ndarray, reference_age: int) -> Tuple[np.ndarray, float]:
+        def value(coalition):
+            v = risk if 0 in coalition else risk[reference_age:reference_age + 1]
+            for axis in (1, 2):
+                if axis not in coalition: v = v.mean(axis=axis, keepdims=True)
+            return np.broadcast_to(v, risk.shape)
+
+        n = risk.ndim
+        phi = np.zeros(risk.shape + (n,))
+        for i in range(n):
+            others = [j for j in range(n) if j != i]
+            for size in range(n):
+                weight = math.factorial(size) * math.factorial(n - size - 1) / math.factorial(n)
+                for coalition in itertools.combinations(others, size):
+                    phi[..., i] += weight * (value(set(coalition) | {i}) - value(set(coalition)))
+        return phi, float(value(set())[0, 0, 0])
+
+    def lookup(self, age: int, gender: str, smoking_history: str) -> Dict[str, Any]:
+        """KeyError for an unknown category, IndexError for an age outside the table."""
+        i = age - self.min_age
+        if not 0 <= i < len(self.risk): raise IndexError(f"age {age} outside {self.min_age}-{self.min_age + len(self.risk) - 1}")
+        cell = (i, self.sexes[gender.strip().lower()], self.smoking[smoking_history.strip().title()])
+        return {
+            "risk_probability": float(self.risk[cell]),
+            "attributions": dict(zip(FEATURES, self.attributions[cell].tolist())),
+            "base_value": self.base_value,
+        }
+
+
+def load_idiopathic(model_path: str, scaler_path: str = "idiopathic_scaler.pkl", encoders_path: str = "idiopathic_encoders.pkl"):
+    """(model, scaler, encoders) from the three files, or from an artifact bundle passed as model_path."""
+    if is_bundle(model_path):
+        bundle = ArtifactBundle(model_path)
+        arrays, meta = bundle.arrays("idiopathic"), bundle.metadata("idiopathic")
+        return load_state_dict(IdiopathicNN(input_dim=len(FEATURES)), arrays), scaler_from(arrays, meta), label_encoders(meta["encoders"])
+    model = IdiopathicNN(input_dim=3)
+    model.load_state_dict(torch.load(model_path))
+    model.eval()
+    return model, joblib.load(scaler_path), joblib.load(encoders_path)
+
+
+def load_idiopathic_table(*paths: str, version: str) -> IdiopathicTable:
+    return IdiopathicTable.build(*load_idiopathic(*paths), version)
+
+
+def bundle_idiopathic(model_path: str, scaler_path: str, encoders_path: str) -> Dict[str, Any]:
+    model, scaler, encoders = load_idiopathic(model_path, scaler_path, encoders_path)
+    section = scaler_section(scaler)
+    section["arrays"].update(state_dict_arrays(model.state_dict()))
+    section["metadata"].update(features=list(FEATURES), encoders=encoder_classes(encoders))
+    return section
@@ -0,0 +1,106 @@
+import contextvars
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import Query, Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+# Keys dropped in compact mode: request echoes, and full per-feature explanation lists
+# (the ranked "top_factors" next to them are kept)
+COMPACT_DROP_KEYS = {"input_data"}
+COMPACT_DROP_LIST_KEYS = {"explanations"}
+
+# Per-request shaping options, set by the response_options dependency
+_shape: contextvars.ContextVar = contextvars.ContextVar("response_shape", default=None)
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, np.generic): return obj.item()
+    if isinstance(obj, np.ndarray): return obj.tolist()
+    if hasattr(obj, "model_dump"): return obj.model_dump()
+    if hasattr(obj, "tolist"): return obj.tolist()  # torch tensors
+    if isinstance(obj, (set, tuple)): return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def _compact(content: Any) -> Any:
+    if isinstance(content, dict):
+        return {k: _compact(v) for k, v in content.items()
+                if k not in COMPACT_DROP_KEYS and not (k in COMPACT_DROP_LIST_KEYS and isinstance(v, list))}
+    if isinstance(content, list):
+        return [_compact(v) for v in content]
+    return content
+
+
+def _select(content: Any, fields: List[List[str]]) -> Any:
+    """Keeps only the given (dotted) paths; lists are filtered element-wise."""
+    if isinstance(content, list):
+        return [_select(v, fields) for v in content]
+    if not isinstance(content, dict):
+        return content
+    selected: Dict[str, Any] = {}
+    for path in fields:
+        head, rest = path[0], path[1:]
+        if head not in content: continue
+        if rest:
+            sub = _select(content[head], [rest])
+            if isinstance(selected.get(head), dict) and isinstance(sub, dict): selected[head].update(sub)
+            else: selected[head] = sub
+        else:
+            selected[head] = content[head]
+    return selected
+
+
+def shape_content(content: Any, fields: Optional[str] = None, compact: bool = False) -> Any:
+    if compact: content = _compact(content)
+    if fields:
+        content = _select(content, [f.strip().split(".") for f in fields.split(",") if f.strip()])
+    return content
+
+
+def shaped(content: Any) -> Any:
+    """content as this request's ?fields=/?compact= options will render it (part of its ETag)."""
+    shape = _shape.get()
+    return shape_content(content, *shape) if shape else content
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (NumPy scalars/arrays serialized natively), honouring ?fields=/?compact=."""
+
+    def render(self, content: Any) -> bytes:
+        shape = _shape.get()
+        if shape and self.status_code < 400:
+            content = shape_content(content, *shape)
+        return dumps(content)
+
+
+async def response_options(
+    fields: Optional[str] = Query(None, description="Comma-separated (dotted) keys to return, e.g. risk_probability,explanations.top_factors"),
+    compact: bool = Query(False, description="Drop input echoes and full per-feature explanation lists"),
+):
+    # Async so the context variable is set in the task that renders the response
+    _shape.set((fields, compact) if fields or compact else None)
+
+
+def json_response(content: Any, response: Optional[Response] = None, status_code: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """
+    Returns content without FastAPI's jsonable_encoder pass (NumPy-heavy payloads), keeping any
+    headers already set on the injected Response.
+    """
+    merged = dict(response.headers) if response is not None else {}
+    merged.pop("content-length", None)
+    merged.update(headers or {})
+    return FastJSONResponse(content, status_code=status_code, headers=merged)
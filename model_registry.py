@@ -0,0 +1,235 @@
+"""
+Versioned model registry.
+
+    model_registry/<model>/<version>/manifest.json   file hashes, feature schema, metrics
+    model_registry/<model>/<version>/<artifact files>
+    model_registry/<model>/state.json                current version and activation history
+
+    python model_registry.py publish cardio_nn cardio_model.pth scaler.pkl --metric auc=0.79 --activate
+    python model_registry.py list
+    python model_registry.py activate cardio_nn v2
+    python model_registry.py rollback cardio_nn
+
+The server follows each model's current version (see HotSwapper), so activating or rolling back
+a version needs no restart.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "model_registry")
+
+
+class RegistryError(Exception):
+    pass
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    def __init__(self, root: str = REGISTRY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def models(self) -> List[str]:
+        if not os.path.isdir(self.root): return []
+        return sorted(m for m in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, m)))
+
+    def versions(self, model: str) -> List[str]:
+        directory = os.path.join(self.root, model)
+        if not os.path.isdir(directory): return []
+        found = [v for v in os.listdir(directory) if v.startswith("v") and v[1:].isdigit()]
+        return sorted(found, key=lambda v: int(v[1:]))
+
+    def manifest(self, model: str, version: str) -> Dict[str, Any]:
+        path = os.path.join(self.root, model, version, "manifest.json")
+        if not os.path.exists(path): raise RegistryError(f"Unknown version {model}/{version}")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def paths(self, model: str, version: str) -> List[str]:
+        """Artifact paths in publish order (the order the model's loader expects)."""
+        return [os.path.join(self.root, model, version, name) for name in self.manifest(model, version)["files"]]
+
+    def verify(self, model: str, version: str):
+        for name, digest in self.manifest(model, version)["files"].items():
+            path = os.path.join(self.root, model, version, name)
+            if not os.path.exists(path) or sha256_file(path) != digest:
+                raise RegistryError(f"{model}/{version}: {name} is missing or does not match its manifest hash")
+
+    def state(self, model: str) -> Dict[str, Any]:
+        path = os.path.join(self.root, model, "state.json")
+        if not os.path.exists(path): return {"current": None, "history": []}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def current(self, model: str) -> Optional[str]:
+        return self.state(model)["current"]
+
+    def publish(self, model: str, files: List[str], feature_schema: Optional[List[str]] = None,
+                metrics: Optional[Dict[str, Any]] = None, activate: bool = False) -> str:
+        """Copies the files into a new version directory (renamed into place once complete)."""
+        directory = os.path.join(self.root, model)
+        os.makedirs(directory, exist_ok=True)
+        staging = os.path.join(directory, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+        try:
+            hashes = {}
+            for src in files:
+                name = os.path.basename(src)
+                shutil.copy2(src, os.path.join(staging, name))
+                hashes[name] = sha256_file(os.path.join(staging, name))
+            with self._lock:
+                existing = self.versions(model)
+                version = f"v{int(existing[-1][1:]) + 1 if existing else 1}"
+                _write_json(os.path.join(staging, "manifest.json"), {
+                    "model": model, "version": version, "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "files": hashes, "feature_schema": feature_schema, "metrics": metrics or {},
+                })
+                os.rename(staging, os.path.join(directory, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if activate: self.activate(model, version)
+        return version
+
+    def activate(self, model: str, version: str):
+        self.verify(model, version)
+        with self._lock:
+            state = self.state(model)
+            if state["current"] == version: return
+            history = state["history"] + ([state["current"]] if state["current"] else [])
+            _write_json(os.path.join(self.root, model, "state.json"), {"current": version, "history": history[-20:]})
+
+    def rollback(self, model: str) -> str:
+        """Re-activates the previously current version."""
+        with self._lock:
+            state = self.state(model)
+            if not state["history"]: raise RegistryError(f"No earlier version of {model} to roll back to")
+            version = state["history"][-1]
+            _write_json(os.path.join(self.root, model, "state.json"), {"current": version, "history": state["history"][:-1]})
+        return version
+
+
+class HotSwapper:
+    """
+    Keeps served models on the registry's current versions without a restart.
+
+    A new version is verified, loaded and warmed up while the old one keeps serving, then installed
+    with a single reference swap, so in-flight requests finish on the version they started with.
+    A failed load or warmup leaves the old version in place. Reloads are serialized, so at most one
+    model is held in memory twice at any time.
+
+    specs: model -> (load(paths) -> loaded, warmup(loaded), install(version, paths, loaded))
+    """
+
+    def __init__(self, registry: ModelRegistry, specs: Dict[str, Tuple[Callable, Callable, Callable]], interval: float = 5.0):
+        self.registry = registry
+        self.specs = specs
+        self.interval = interval
+        self.loaded: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def sync(self, model: str) -> Optional[str]:
+        """Installs the registry's current version of model if it is not the one being served."""
+        with self._reload_lock:
+            version = self.registry.current(model)
+            if version is None or version == self.loaded.get(model): return self.loaded.get(model)
+            load, warmup, install = self.specs[model]
+            try:
+                self.registry.verify(model, version)
+                paths = self.registry.paths(model, version)
+                loaded = load(paths)
+                warmup(loaded)
+            except Exception as e:
+                self.errors[model] = f"{version}: {e}"
+                print(f"Model registry: {model} {version} failed to load, keeping {self.loaded.get(model)}: {e}")
+                raise
+            install(version, paths, loaded)
+            self.loaded[model] = version
+            self.errors.pop(model, None)
+            print(f"Model registry: {model} {version} is live.")
+            return version
+
+    def sync_all(self):
+        for model in self.specs:
+            # A version that failed is not retried by polling (activate it again to retry)
+            if (self.errors.get(model) or "").startswith(f"{self.registry.current(model)}:"): continue
+            try: self.sync(model)
+            except Exception: pass
+
+    def start(self):
+        def poll():
+            while not self._stop.wait(self.interval): self.sync_all()
+        threading.Thread(target=poll, daemon=True, name="model-registry").start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            model: {"served": self.loaded.get(model), "current": self.registry.current(model), "versions": self.registry.versions(model),
+                    "error": self.errors.get(model)}
+            for model in self.specs
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Versioned model registry.")
+    parser.add_argument("--root", default=REGISTRY_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    publish = sub.add_parser("publish", help="Add a new version from artifact files")
+    publish.add_argument("model")
+    publish.add_argument("files", nargs="+", help="Artifact files, in the order the loader expects")
+    publish.add_argument("--features", nargs="*", help="Feature schema (input column order)")
+    publish.add_argument("--metric", action="append", default=[], help="name=value, repeatable")
+    publish.add_argument("--activate", action="store_true")
+    sub.add_parser("list")
+    activate = sub.add_parser("activate")
+    activate.add_argument("model")
+    activate.add_argument("version")
+    rollback = sub.add_parser("rollback")
+    rollback.add_argument("model")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    if args.command == "publish":
+        metrics = {k: float(v) for k, _, v in (m.partition("=") for m in args.metric)}
+        version = registry.publish(args.model, args.files, args.features, metrics, args.activate)
+        print(f"Published {args.model} {version}{' (active)' if args.activate else ''}")
+    elif args.command == "list":
+        for model in registry.models():
+            current = registry.current(model)
+            for version in registry.versions(model):
+                manifest = registry.manifest(model, version)
+                print(f"{model} {version}{' *' if version == current else ''}  {manifest['created']}  {manifest['metrics']}")
+    elif args.command == "activate":
+        registry.activate(args.model, args.version)
+        print(f"{args.model}: {args.version} is current")
+    else:
+        print(f"{args.model}: rolled back to {registry.rollback(args.model)}")
+
+
+if __name__ == "__main__":
+    main()
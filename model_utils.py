@@ -22,3 +22,19 @@ class CardioNN(nn.Module):
         x = self.relu3(self.layer3(x))
         x = self.output(x) # return logits
         return x
+
+
+class IdiopathicNN(nn.Module):
+    def __init__(self, input_dim):
+        super(IdiopathicNN, self).__init__()
+        self.layer1 = nn.Linear(input_dim, 16)
+        self.relu = nn.ReLU()
+        self.layer2 = nn.Linear(16, 8)
+        self.output = nn.Linear(8, 1)
+        self.sigmoid = nn.Sigmoid()
+
+    def forward(self, x):
+        x = self.relu(self.layer1(x))
+        x = self.relu(self.layer2(x))
+        x = self.sigmoid(self.output(x))
+        return x
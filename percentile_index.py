@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+GENDERS = (1, 2)
+
+
+class PercentileIndex:
+    """
+    Sorted reference risks per (age band, gender) stratum, stored CSR-style: one float32 array
+    sorted within each stratum plus offsets, so a lookup is a binary search on a slice.
+    Small strata (< min_stratum rows) fall back to the whole population.
+    """
+
+    def __init__(self, risks: np.ndarray, offsets: np.ndarray, overall: np.ndarray, band_min: int, band_years: int,
+                 version: str, min_stratum: int = 30):
+        self.risks = risks
+        self.offsets = offsets
+        self.overall = overall
+        self.band_min = band_min
+        self.band_years = band_years
+        self.version = version
+        self.min_stratum = min_stratum
+
+    @classmethod
+    def build(cls, age_days: np.ndarray, gender: np.ndarray, probs: np.ndarray, version: str, band_years: int = 5) -> "PercentileIndex":
+        bands = (age_days / 365.25 // band_years).astype(np.int64)
+        band_min = int(bands.min())
+        strata = (bands - band_min) * len(GENDERS) + (gender.astype(np.int64) - 1)
+        order = np.lexsort((probs, strata))  # by stratum, then risk
+        counts = np.bincount(strata, minlength=(int(bands.max()) - band_min + 1) * len(GENDERS))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return cls(probs[order].astype(np.float32), offsets, np.sort(probs).astype(np.float32), band_min * band_years, band_years, version)
+
+    def save(self, path: str):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, risks=self.risks, offsets=self.offsets, overall=self.overall, band_min=self.band_min,
+                 band_years=self.band_years, version=np.array(self.version))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PercentileIndex":
+        with np.load(path, allow_pickle=False) as a:
+            return cls(a["risks"], a["offsets"], a["overall"], int(a["band_min"]), int(a["band_years"]), str(a["version"]))
+
+    def rank(self, prob: float, age_days: float, gender: int) -> Dict[str, Any]:
+        """Share of reference patients (in %) with a lower risk, within the age band / gender stratum."""
+        band = int(age_days / 365.25 // self.band_years) * self.band_years
+        stratum = (band - self.band_min) // self.band_years * len(GENDERS) + (int(gender) - 1)
+        prob = np.float32(prob)  # same dtype as the arrays, so searchsorted does not upcast (copy) them
+        population = float(np.searchsorted(self.overall, prob, side="left")) / len(self.overall) * 100
+        result = {"population_percentile": population, "age_band": f"{band}-{band + self.band_years - 1}", "gender": int(gender)}
+        if 0 <= stratum < len(self.offsets) - 1 and int(gender) in GENDERS:
+            start, end = int(self.offsets[stratum]), int(self.offsets[stratum + 1])
+            if end - start >= self.min_stratum:
+                below = np.searchsorted(self.risks[start:end], prob, side="left")
+                return {**result, "percentile": float(below) / (end - start) * 100, "stratum_size": end - start, "stratum": "age_band_gender"}
+        return {**result, "percentile": population, "stratum_size": len(self.overall), "stratum": "all"}
+
+
+class PercentileIndexStore:
+    """
+    One index per model, kept in sync with the model version. A stale or missing index is loaded
+    from disk if a file for the current version exists, otherwise rebuilt on a background thread
+    (get() returns None until it is ready, so requests never wait for a rebuild). A failed build
+    is retried after retry_after seconds, or at once when the model version changes.
+    """
+
+    def __init__(self, path_fn: Callable[[str], str], build_fn: Callable[[str, str], PercentileIndex], retry_after: float = 300.0):
+        self.path_fn = path_fn
+        self.build_fn = build_fn
+        self.retry_after = retry_after
+        self._indexes: Dict[str, PercentileIndex] = {}
+        self._building = set()
+        self._failed: Dict[str, Tuple[Optional[str], float]] = {}  # model -> (version, monotonic time of the failure)
+        self._lock = threading.Lock()
+
+    def load_or_build(self, model: str, version: str) -> PercentileIndex:
+        path = self.path_fn(model)
+        if os.path.exists(path):
+            try:
+                index = PercentileIndex.load(path)
+                if index.version == version:
+                    self._indexes[model] = index
+                    return index
+            except (OSError, ValueError, KeyError):
+                pass
+        index = self.build_fn(model, version)
+        index.save(path)
+        self._indexes[model] = index
+        return index
+
+    def get(self, model: str, version: Optional[str]) -> Optional[PercentileIndex]:
+        index = self._indexes.get(model)
+        if index is not None and index.version == version: return index
+        with self._lock:
+            if model in self._building: return None
+            failed = self._failed.get(model)
+            if failed and failed[0] == version and time.monotonic() - failed[1] < self.retry_after: return None
+            self._building.add(model)
+        threading.Thread(target=self._rebuild, args=(model, version), daemon=True).start()
+        return None
+
+    def _rebuild(self, model: str, version: str):
+        try:
+            self.load_or_build(model, version)
+            print(f"Percentile index for {model} rebuilt ({version}).")
+            with self._lock:
+                self._failed.pop(model, None)
+        except Exception as e:
+            print(f"Percentile index for {model} failed, retrying in {self.retry_after:.0f}s: {e}")
+            with self._lock:
+                self._failed[model] = (version, time.monotonic())
+        finally:
+            with self._lock:
+                self._building.discard(model)
@@ -0,0 +1,206 @@
+"""
+Offline population views for the cardio models: partial dependence (PD) and ICE curves per
+feature and global attribution importance, computed over cardio_train.csv.
+
+    python population_insights.py --models nn xgb --workers 8
+
+Work is split into per-feature PD/ICE tasks and row-shard attribution tasks on a process pool.
+Results are written to INSIGHTS_DIR/<model>-<version>.npz, where the version is the artifact
+fingerprint also used by the prediction cache, so each model version keeps its own file. The
+models are loaded from the files the server serves: the registry's current version, else the
+artifact bundle, else the root files (--registry-dir / --bundle default to the server's settings).
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+from artifact_bundle import BUNDLE_PATH, ArtifactBundle, is_bundle
+from batch_scoring import (CARDIO_ARTIFACTS, CARDIO_NN_ORDER, CARDIO_XGB_ORDER, cardio_matrix, load_cardio_nn, load_cardio_xgb,
+                           predict_cardio_nn_batch, predict_cardio_xgb_batch)
+from columnar import CARDIO_CODES, CARDIO_COLUMNS, read_columns, validate_columns
+from model_registry import REGISTRY_DIR, ModelRegistry
+from nn_attributions import cardio_nn_attributions
+from prediction_cache import artifact_fingerprint
+
+INSIGHTS_DIR = os.getenv("INSIGHTS_DIR", "insights")
+SHARD_ROWS = 5000
+
+
+def insights_path(model: str, version: str, out_dir: str = INSIGHTS_DIR) -> str:
+    return os.path.join(out_dir, f"{model}-{version}.npz")
+
+
+def served_artifacts(model: str, registry_dir: str = REGISTRY_DIR, bundle_path: str = BUNDLE_PATH) -> List[str]:
+    """The files the server loads `model` from, in the same order of precedence."""
+    registry = ModelRegistry(registry_dir)
+    current = registry.current(model) if model in registry.models() else None
+    if current: return registry.paths(model, current)
+    if is_bundle(bundle_path):
+        bundle = ArtifactBundle(bundle_path)
+        if model in bundle.models and not bundle.stale(model): return [bundle_path]
+    return CARDIO_ARTIFACTS[model]
+
+
+def model_version(model: str, paths: Optional[List[str]] = None) -> str:
+    """Same fingerprint as the server's cache version for the model loaded from these paths."""
+    return artifact_fingerprint(paths or served_artifacts(model))
+
+
+def feature_grid(values: np.ndarray, feature: str, points: int) -> np.ndarray:
+    """Observed codes for categorical features, evenly spaced quantiles (2nd-98th) otherwise."""
+    if feature in CARDIO_CODES: return np.unique(values).astype(np.float64)
+    return np.unique(np.quantile(values, np.linspace(0.02, 0.98, points)))
+
+
+# --- Worker ---
+_state: Dict[str, Any] = {}
+
+
+def init_worker(model: str, paths: List[str], csv_path: str, pd_rows: int, ice_rows: int, seed: int):
+    torch.set_num_threads(1)
+    if model == "cardio_xgb":
+        _state["model"] = load_cardio_xgb(paths[0])
+        try: _state["model"].set_params(n_jobs=1)
+        except Exception: pass
+    else:
+        _state["model"], _state["scaler"] = load_cardio_nn(*paths)
+    with open(csv_path, "rb") as f:
+        columns = read_columns(f.read(), "csv")
+    valid = validate_columns(columns)
+    columns = {c: np.asarray(columns[c][valid], dtype=np.float64) for c in CARDIO_COLUMNS}
+    rng = np.random.default_rng(seed)
+    n = len(columns["age"])
+    pd_idx = np.sort(rng.choice(n, pd_rows, replace=False)) if pd_rows and pd_rows < n else np.arange(n)
+    _state.update({
+        "backend": model,
+        "columns": columns,
+        "pd_idx": pd_idx,
+        "ice_pos": np.sort(rng.choice(len(pd_idx), min(ice_rows, len(pd_idx)), replace=False)),  # positions within pd_idx
+    })
+
+
+def _score(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    if _state["backend"] == "cardio_xgb":
+        return predict_cardio_xgb_batch(_state["model"], cardio_matrix(columns, CARDIO_XGB_ORDER))
+    return predict_cardio_nn_batch(_state["model"], _state["scaler"], cardio_matrix(columns, CARDIO_NN_ORDER))
+
+
+def pd_task(feature: str, grid: np.ndarray) -> Dict[str, Any]:
+    """PD (mean over pd rows) and ICE (sampled rows) for one feature over its grid."""
+    rows = {c: v[_state["pd_idx"]] for c, v in _state["columns"].items()}
+    pd_curve = np.empty(len(grid), dtype=np.float32)
+    ice = np.empty((len(_state["ice_pos"]), len(grid)), dtype=np.float32)
+    for k, value in enumerate(grid):
+        probs = _score({**rows, feature: np.full(len(rows[feature]), value)})
+        pd_curve[k] = probs.mean()
+        ice[:, k] = probs[_state["ice_pos"]]
+    return {"feature": feature, "pd": pd_curve, "ice": ice}
+
+
+def attribution_task(start: int, end: int) -> Dict[str, np.ndarray]:
+    """Sums of |attribution| and attribution per feature (CARDIO_COLUMNS order) over a row shard."""
+    rows = {c: v[start:end] for c, v in _state["columns"].items()}
+    if _state["backend"] == "cardio_xgb":
+        if "explainer" not in _state:
+            import shap
+            _state["explainer"] = shap.TreeExplainer(_state["model"])
+        order, values = CARDIO_XGB_ORDER, _state["explainer"].shap_values(cardio_matrix(rows, CARDIO_XGB_ORDER))
+    else:
+        order = CARDIO_NN_ORDER
+        values = cardio_nn_attributions(_state["model"], _state["scaler"], cardio_matrix(rows, CARDIO_NN_ORDER))
+    values = np.asarray(values, dtype=np.float64)[:, [order.index(c) for c in CARDIO_COLUMNS]]
+    return {"abs": np.abs(values).sum(axis=0), "signed": values.sum(axis=0), "rows": end - start}
+
+
+# --- Driver ---
+def run(models: List[str], csv_path: str = "cardio_train.csv", workers: Optional[int] = None, pd_rows: int = 0,
+        ice_rows: int = 200, grid_points: int = 20, seed: int = 0, out_dir: str = INSIGHTS_DIR,
+        registry_dir: str = REGISTRY_DIR, bundle_path: str = BUNDLE_PATH) -> List[str]:
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok=True)
+    with open(csv_path, "rb") as f:
+        columns = read_columns(f.read(), "csv")
+    valid = validate_columns(columns)
+    columns = {c: np.asarray(columns[c][valid], dtype=np.float64) for c in CARDIO_COLUMNS}
+    n = len(columns["age"])
+    grids = {f: feature_grid(columns[f], f, grid_points) for f in CARDIO_COLUMNS}
+
+    written = []
+    for model in models:
+        started = time.perf_counter()
+        paths = served_artifacts(model, registry_dir, bundle_path)
+        version = model_version(model, paths)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model, paths, csv_path, pd_rows, ice_rows, seed)) as pool:
+            curves = [pool.submit(pd_task, f, grids[f]) for f in CARDIO_COLUMNS]
+            shards = [pool.submit(attribution_task, s, min(s + SHARD_ROWS, n)) for s in range(0, n, SHARD_ROWS)]
+            curves = {r["feature"]: r for r in (c.result() for c in curves)}
+            shards = [s.result() for s in shards]
+
+        arrays = {
+            "model": np.array(model),
+            "version": np.array(version),
+            "features": np.array(CARDIO_COLUMNS),
+            "rows": np.array(n),
+            "pd_rows": np.array(min(pd_rows, n) if pd_rows else n),
+            "attribution_method": np.array("tree_shap" if model == "cardio_xgb" else "integrated_gradients"),
+            "importance": (sum(s["abs"] for s in shards) / n).astype(np.float32),
+            "mean_attribution": (sum(s["signed"] for s in shards) / n).astype(np.float32),
+        }
+        for f in CARDIO_COLUMNS:
+            arrays[f"grid_{f}"] = grids[f].astype(np.float32)
+            arrays[f"pd_{f}"] = curves[f]["pd"]
+            arrays[f"ice_{f}"] = curves[f]["ice"].astype(np.float16)  # ICE only needs display precision
+        path = insights_path(model, version, out_dir)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+        written.append(path)
+        print(f"{model} ({version}): {n} rows, {len(shards)} attribution shards in {time.perf_counter() - started:.1f}s -> {path}")
+    return written
+
+
+# --- Serving ---
+def load_insights(model: str, version: str, out_dir: str = INSIGHTS_DIR) -> Optional[Dict[str, Any]]:
+    """JSON-ready insights for one model version, or None if the job hasn't been run for it."""
+    path = insights_path(model, version, out_dir)
+    if not os.path.exists(path): return None
+    with np.load(path, allow_pickle=False) as archive:
+        features = archive["features"].tolist()
+        importance, mean_attribution = archive["importance"], archive["mean_attribution"]
+        return {
+            "model": model,
+            "version": version,
+            "rows": int(archive["rows"]),
+            "pd_rows": int(archive["pd_rows"]),
+            "attribution_method": str(archive["attribution_method"]),
+            "importance": sorted(({"feature": f, "mean_abs": float(a), "mean": float(m)}
+                                  for f, a, m in zip(features, importance, mean_attribution)), key=lambda x: -x["mean_abs"]),
+            "features": {f: {"grid": archive[f"grid_{f}"].tolist(), "pd": archive[f"pd_{f}"].tolist(),
+                             "ice": archive[f"ice_{f}"].astype(np.float32).round(4).tolist()} for f in features},
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Precompute PD/ICE curves and global attribution importance.")
+    parser.add_argument("--models", nargs="+", choices=["nn", "xgb"], default=["nn"])
+    parser.add_argument("--csv", default="cardio_train.csv")
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: CPU count)")
+    parser.add_argument("--pd-rows", type=int, default=0, help="Rows averaged for PD (default: all valid rows)")
+    parser.add_argument("--ice-rows", type=int, default=200)
+    parser.add_argument("--grid-points", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default=INSIGHTS_DIR)
+    parser.add_argument("--registry-dir", default=REGISTRY_DIR)
+    parser.add_argument("--bundle", default=BUNDLE_PATH)
+    args = parser.parse_args(argv)
+    run([f"cardio_{m}" for m in args.models], args.csv, args.workers, args.pd_rows, args.ice_rows, args.grid_points, args.seed, args.out_dir,
+        args.registry_dir, args.bundle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+def artifact_fingerprint(paths: Iterable[str]) -> str:
+    """Cheap version id for a set of artifact files (path, size, mtime). Missing files count too."""
+    h = hashlib.sha1()
+    for path in paths:
+        try:
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+        except OSError:
+            h.update(f"{path}:missing;".encode())
+    return h.hexdigest()[:16]
+
+
+def _sizeof(obj: Any) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_sizeof(v) for v in obj)
+    return size
+
+
+class PredictionCache:
+    """
+    Bounded LRU memo of model outputs keyed on (model, version, canonical feature vector).
+
+    Each model is registered with the artifact files it was loaded from; their fingerprint is
+    the version. When a fingerprint changes, every entry of the previous version is dropped.
+    Callers that hold a model object pass the version it was installed with and entries are keyed
+    on that version, not on the files on disk, which can change without the model being reloaded.
+    A result computed by a model that has since been re-registered (swapped out) is not stored.
+    """
+
+    def __init__(self, max_entries: int = 50000, max_bytes: int = 32 * 1024 * 1024, check_interval: float = 2.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, model: str, paths: List[str]):
+        with self._lock:
+            version = artifact_fingerprint(paths)
+            self._models[model] = {"paths": list(paths), "version": version, "loaded": version, "checked": time.monotonic()}
+
+    def version(self, model: str) -> Optional[str]:
+        """Current artifact version, re-checked on disk at most every check_interval seconds."""
+        info = self._models.get(model)
+        if info is None: return None
+        now = time.monotonic()
+        if now - info["checked"] >= self.check_interval:
+            info["checked"] = now
+            version = artifact_fingerprint(info["paths"])
+            if version != info["version"]:
+                print(f"Prediction cache: {model} artifacts changed, invalidating.")
+                info["version"] = version
+                self.invalidate(model)
+        return info["version"]
+
+    def invalidate(self, model: Optional[str] = None):
+        with self._lock:
+            for key in [k for k in self._entries if model is None or k[0] == model]:
+                _, size = self._entries.pop(key)
+                self.nbytes -= size
+
+    def get(self, model: str, features: Hashable, version: Optional[str] = None) -> Any:
+        key = (model, version or self.version(model), features)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, model: str, features: Hashable, value: Any, version: Optional[str] = None):
+        if version is None: version = self.version(model)
+        else:
+            info = self._models.get(model)
+            if info is not None and version != info["loaded"]: return  # computed by a replaced model
+        key = (model, version, features)
+        size = _sizeof(key) + _sizeof(value)
+        if size > self.max_bytes: return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None: self.nbytes -= old[1]
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def memoize(self, model: str, features: Hashable, compute: Callable[[], Any], version: Optional[str] = None) -> Any:
+        value = self.get(model, features, version)
+        if value is None:
+            value = compute()
+            self.put(model, features, value, version)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "versions": {m: info["version"] for m, info in self._models.items()},
+        }
+
+
+def canonical_features(values: Iterable[float], decimals: int = 6) -> Tuple[float, ...]:
+    """Hashable key for a model feature vector (rounded so float noise doesn't split entries)."""
+    return tuple(round(float(v), decimals) for v in values)
+
+
+# --- Request log (warmup source) ---
+class RequestLog:
+    """Append-only JSONL log of prediction payloads: {"endpoint": ..., "payload": {...}} per line."""
+
+    def __init__(self, path: str, enabled: bool = False):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, payload: Dict[str, Any]):
+        if not self.enabled: return
+        line = json.dumps({"endpoint": endpoint, "payload": payload}, sort_keys=True)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def most_frequent(self, limit: int) -> List[Tuple[str, Dict[str, Any], int]]:
+        """(endpoint, payload, count) for the most common payloads. Unrecognized lines are skipped."""
+        if not os.path.exists(self.path): return []
+        counts = Counter()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    counts[(entry["endpoint"], json.dumps(entry["payload"], sort_keys=True))] += 1
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return [(endpoint, json.loads(payload), n) for (endpoint, payload), n in counts.most_common(limit)]
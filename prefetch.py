@@ -0,0 +1,102 @@
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class SpeculativePrefetcher:
+    """
+    Runs likely follow-up computations in the background and keeps their results for a
+    short TTL. Work is only queued while the server is not busy (load_fn() <= max_load) and
+    the number of queued/running jobs stays within max_pending; queued jobs are cancelled
+    as soon as load rises above the limit.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, ttl: float = 60.0,
+                 max_entries: int = 1024, max_load: int = 8, load_fn: Optional[Callable[[], int]] = None):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_load = max_load
+        self.load_fn = load_fn or (lambda: 0)
+        self.stats = {"scheduled": 0, "skipped": 0, "cancelled": 0, "hits": 0, "joined": 0, "failed": 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._results: Dict[Hashable, Any] = {}  # key -> (expires_at, value)
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _overloaded(self) -> bool:
+        return self.load_fn() > self.max_load
+
+    def cancel_queued(self):
+        with self._lock:
+            for key, future in list(self._pending.items()):
+                if future.cancel():
+                    del self._pending[key]
+                    self.stats["cancelled"] += 1
+
+    def schedule(self, key: Hashable, fn: Callable[[], Any]) -> bool:
+        if self._overloaded():
+            self.cancel_queued()
+            self.stats["skipped"] += 1
+            return False
+        with self._lock:
+            entry = self._results.get(key)
+            if key in self._pending or (entry and entry[0] > time.monotonic()):
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.stats["skipped"] += 1
+                return False
+            future = self._executor.submit(self._run, key, fn)
+            self._pending[key] = future
+            self.stats["scheduled"] += 1
+            return True
+
+    def _run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        try:
+            value = fn()
+        except Exception as e:
+            print(f"Prefetch {key[0] if isinstance(key, tuple) else key} failed: {e}")
+            with self._lock:
+                self._pending.pop(key, None)
+                self.stats["failed"] += 1
+            raise
+        with self._lock:
+            self._pending.pop(key, None)
+            self._evict_expired()
+            if len(self._results) >= self.max_entries:
+                self._results.pop(next(iter(self._results)))
+            self._results[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._results.items() if expires <= now]:
+            del self._results[key]
+
+    def get(self, key: Hashable, join_timeout: float = 10.0) -> Any:
+        """
+        Prefetched value or None. A job that is already running is joined (up to join_timeout)
+        rather than recomputed; a job still queued is cancelled so the caller computes it now.
+        """
+        with self._lock:
+            entry = self._results.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.stats["hits"] += 1
+                return entry[1]
+            future = self._pending.get(key)
+            if future is not None and future.cancel():
+                del self._pending[key]
+                self.stats["cancelled"] += 1
+                return None
+        if future is None: return None
+        try:
+            value = future.result(timeout=join_timeout)
+            self.stats["joined"] += 1
+            return value
+        except (CancelledError, Exception):
+            return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "pending": len(self._pending), "cached": len(self._results), "load": self.load_fn()}
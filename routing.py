@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+POLICIES = ("quality", "latency")
+
+
+class BackendRouter:
+    """
+    Picks a backend per request for one task from the ones currently available.
+
+    Backends are listed best-first; each one's compute latency is tracked (EWMA plus a window for p95).
+    - With a latency SLO (ms), the best backend whose EWMA fits the SLO is used, else the fastest.
+    - Without one, the policy decides: "quality" takes the best available, "latency" the fastest.
+    - Under load (load_fn() > max_load), the fastest backend is used and the caller is told to
+      degrade (skip optional work such as prefetching explanations).
+    Backends with no measurement yet are assumed to fit an SLO and are ranked last by speed.
+    """
+
+    def __init__(self, backends: List[str], available: Callable[[str], bool], policy: str = "quality",
+                 max_load: int = 8, load_fn: Optional[Callable[[], int]] = None, alpha: float = 0.1, window: int = 256):
+        if policy not in POLICIES: raise ValueError(f"Unknown routing policy '{policy}' (use {', '.join(POLICIES)})")
+        self.backends = backends
+        self.available = available
+        self.policy = policy
+        self.max_load = max_load
+        self.load_fn = load_fn or (lambda: 0)
+        self.alpha = alpha
+        self._ewma: Dict[str, float] = {}
+        self._recent = {b: deque(maxlen=window) for b in backends}
+        self._chosen = {b: 0 for b in backends}
+        self._degraded = 0
+        self._lock = threading.Lock()
+
+    def record(self, backend: str, seconds: float):
+        ms = seconds * 1000
+        with self._lock:
+            previous = self._ewma.get(backend)
+            self._ewma[backend] = ms if previous is None else previous + self.alpha * (ms - previous)
+            self._recent[backend].append(ms)
+
+    def timed(self, backend: str, fn: Callable[[], Any]) -> Callable[[], Any]:
+        """fn wrapped so that every call is recorded as a latency sample for backend."""
+        def run():
+            started = time.perf_counter()
+            try:
+                return fn()
+            finally:
+                self.record(backend, time.perf_counter() - started)
+        return run
+
+    def calibrate(self, calls: Dict[str, Callable[[], Any]], repeats: int = 10):
+        for backend, call in calls.items():
+            call()  # first call pays one-off costs (lazy init, allocation)
+            for _ in range(repeats): self.timed(backend, call)()
+
+    def choose(self, slo_ms: Optional[float] = None) -> Tuple[str, bool]:
+        """(backend, degraded). Raises LookupError if no backend is available."""
+        candidates = [b for b in self.backends if self.available(b)]
+        if not candidates: raise LookupError("No backend available")
+        fastest = min(candidates, key=lambda b: self._ewma.get(b, float("inf")))
+        degraded = self.load_fn() > self.max_load
+        if degraded:
+            backend = fastest
+        elif slo_ms is not None:
+            backend = next((b for b in candidates if self._ewma.get(b, 0.0) <= slo_ms), fastest)
+        else:
+            backend = candidates[0] if self.policy == "quality" else fastest
+        with self._lock:
+            self._chosen[backend] += 1
+            self._degraded += degraded
+        return backend, degraded
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "max_load": self.max_load,
+                "load": self.load_fn(),
+                "degraded": self._degraded,
+                "backends": {
+                    b: {"available": bool(self.available(b)), "chosen": self._chosen[b],
+                        "ewma_ms": round(self._ewma[b], 4) if b in self._ewma else None,
+                        "p95_ms": round(float(np.percentile(self._recent[b], 95)), 4) if self._recent[b] else None}
+                    for b in self.backends
+                },
+            }
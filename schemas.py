@@ -31,10 +31,47 @@ class CardioInput(BaseModel):
             }
         }
 
+class PredictionUncertainty(BaseModel):
+    model: str
+    passes: int
+    mean: float
+    std: float
+    level: float
+    interval: List[float]
+
+class WhatIfGrid(BaseModel):
+    feature: str = Field(..., description="CardioInput field to sweep (raw units, age in days)")
+    values: List[float] = Field(..., min_length=1, max_length=1000, description="Values to evaluate")
+
+class WhatIfInput(BaseModel):
+    base: CardioInput
+    grids: List[WhatIfGrid] = Field(..., min_length=1, max_length=2, description="One or two feature grids")
+    model: str = Field("auto", description="auto, nn, xgb or ensemble")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "base": {"age": 18393, "gender": 2, "height": 168, "weight": 82.0, "ap_hi": 150, "ap_lo": 90,
+                         "cholesterol": 2, "gluc": 1, "smoke": 0, "alco": 0, "active": 1},
+                "grids": [{"feature": "ap_hi", "values": [110, 120, 130, 140, 150]},
+                          {"feature": "weight", "values": [70, 75, 80, 82]}],
+            }
+        }
+
+class TrajectoryInput(BaseModel):
+    base: CardioInput
+    years: int = Field(10, ge=5, le=20, description="Projection horizon in years")
+    scenarios: List[str] = Field(["baseline", "quit_smoking", "become_active"], min_length=1, max_length=3)
+    samples: int = Field(2000, ge=100, le=20000, description="Simulated trajectories per scenario")
+    seed: int = Field(0, description="Random seed (same seed, same bands)")
+    model: str = Field("auto", description="auto, nn, xgb or ensemble")
+
 class CardioPrediction(BaseModel):
     probability: float
     prediction: int
     message: str
+    uncertainty: Optional[PredictionUncertainty] = None
+    percentile: Optional[Dict[str, Any]] = None
 
 # --- New Models ---
 
@@ -87,7 +124,7 @@ class CBCInput(BaseModel):
         }
 
 class IdiopathicInput(BaseModel):
-    age: int = Field(..., description="Age in years")
+    age: int = Field(..., ge=0, le=120, description="Age in years")
     gender: str = Field(..., description="'Male' or 'Female'")
     smoking_history: str = Field(..., description="'Ever' or 'Never'")
 
@@ -100,8 +137,42 @@ class IdiopathicInput(BaseModel):
             }
         }
 
+class ScreenInput(BaseModel):
+    age_years: float = Field(..., ge=0, le=120, description="Age in years")
+    sex: Union[str, int] = Field(..., description="'male', 'female' or 'other' (M/F and cardio codes 1/2 also accepted)")
+    smoking: Optional[Union[str, int]] = Field(None, description="Any vocabulary: never/former/current/ever/not current, Ever/Never, yes/no, 0/1")
+    height: Optional[float] = Field(None, description="Height in cm")
+    weight: Optional[float] = Field(None, description="Weight in kg")
+    bmi: Optional[float] = Field(None, description="Body Mass Index (derived from height/weight if omitted)")
+    ap_hi: Optional[int] = Field(None, description="Systolic blood pressure")
+    ap_lo: Optional[int] = Field(None, description="Diastolic blood pressure")
+    cholesterol: Optional[int] = Field(None, description="Cholesterol (1: normal, 2: above normal, 3: well above normal)")
+    gluc: Optional[int] = Field(None, description="Glucose (1: normal, 2: above normal, 3: well above normal)")
+    alco: Optional[int] = Field(None, description="Alcohol intake (0: no, 1: yes)")
+    active: Optional[int] = Field(None, description="Physical activity (0: no, 1: yes)")
+    hypertension: Optional[int] = Field(None, description="0: No, 1: Yes")
+    heart_disease: Optional[int] = Field(None, description="0: No, 1: Yes")
+    HbA1c_level: Optional[float] = Field(None, description="Hemoglobin A1c level (3.5-9.0)")
+    blood_glucose_level: Optional[int] = Field(None, description="Blood glucose level (80-300)")
+    cbc: Optional[Dict[str, float]] = Field(None, description="CBC values (CBCInput fields without sex)")
+    models: Optional[List[str]] = Field(None, description="Subset of cardiovascular, diabetes, idiopathic, cbc (default: all)")
+    timeout_ms: Optional[int] = Field(None, ge=10, le=30000, description="Per-model timeout (default SCREEN_TIMEOUT_MS)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "age_years": 58, "sex": "male", "smoking": "former", "height": 175, "weight": 88.0,
+                "ap_hi": 140, "ap_lo": 90, "cholesterol": 2, "gluc": 1, "alco": 0, "active": 1,
+                "hypertension": 1, "heart_disease": 0, "HbA1c_level": 6.1, "blood_glucose_level": 130,
+                "cbc": {"hemoglobin": 13.1, "wbc": 7.2, "platelets": 250},
+            }
+        }
+
 class TextAnalysisInput(BaseModel):
     text: str = Field(..., description="Medical text to analyze (e.g., masked sentence)")
+    top_k: int = Field(5, ge=1, le=50, description="Number of candidates returned per [MASK]")
+    candidates: Optional[List[str]] = Field(None, description="Restrict predictions to these terms (e.g. a drug list)")
+    full_vocabulary: bool = Field(False, description="Ignore the server's configured candidate vocabulary")
     
     class Config:
         json_schema_extra = {
@@ -110,6 +181,23 @@ class TextAnalysisInput(BaseModel):
             }
         }
 
+class TextBatchAnalysisInput(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=256, description="Masked sentences scored as one padded batch")
+    top_k: int = Field(5, ge=1, le=50, description="Number of candidates returned per [MASK]")
+    candidates: Optional[List[str]] = Field(None, description="Restrict predictions to these terms (e.g. a drug list)")
+    full_vocabulary: bool = Field(False, description="Ignore the server's configured candidate vocabulary")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "texts": [
+                    "The patient was prescribed [MASK] for hypertension.",
+                    "Chest pain radiating to the left [MASK]."
+                ],
+                "top_k": 5
+            }
+        }
+
 class ChatInput(BaseModel):
     message: str = Field(..., description="Question for the medical AI")
     history: Optional[List[Dict[str, str]]] = Field(default=[], description="Chat history")
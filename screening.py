@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from starlette.concurrency import run_in_threadpool
+
+# Every smoking vocabulary used by the models/forms, mapped onto the diabetes one (the richest)
+SMOKING_ALIASES = {
+    "never": "never", "no": "never", "0": "never", "false": "never", "non-smoker": "never",
+    "former": "former", "ex": "former", "quit": "former",
+    "current": "current", "yes": "current", "1": "current", "true": "current", "smoker": "current",
+    "ever": "ever", "not current": "not current", "no info": "No Info", "unknown": "No Info",
+}
+SEX_ALIASES = {"male": "male", "m": "male", "man": "male", "2": "male",
+               "female": "female", "f": "female", "woman": "female", "1": "female", "other": "other"}
+
+
+def normalize_smoking(value: Union[str, int, None]) -> str:
+    if value is None: return "No Info"
+    key = str(value).strip().lower()
+    if key not in SMOKING_ALIASES: raise ValueError(f"Unknown smoking value '{value}'")
+    return SMOKING_ALIASES[key]
+
+
+def normalize_sex(value: Union[str, int]) -> str:
+    key = str(value).strip().lower()
+    if key not in SEX_ALIASES: raise ValueError(f"Unknown sex '{value}'")
+    return SEX_ALIASES[key]
+
+
+def derive_shared(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields every model needs in some form, computed once: age in years, sex, smoking, BMI."""
+    bmi = data.get("bmi")
+    if bmi is None and data.get("height") and data.get("weight"):
+        bmi = round(data["weight"] / (data["height"] / 100) ** 2, 2)
+    return {"age_years": float(data["age_years"]), "sex": normalize_sex(data["sex"]),
+            "smoking": normalize_smoking(data.get("smoking")), "bmi": bmi}
+
+
+def _require(data: Dict[str, Any], fields) -> Optional[str]:
+    missing = [f for f in fields if data.get(f) is None]
+    return f"missing {', '.join(missing)}" if missing else None
+
+
+def model_inputs(data: Dict[str, Any], shared: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """Per-model payloads built from the combined form, plus the reason for every model that can't run."""
+    inputs, skipped = {}, {}
+    sex, smoking = shared["sex"], shared["smoking"]
+
+    reason = _require(data, ["height", "weight", "ap_hi", "ap_lo", "cholesterol", "gluc", "alco", "active"])
+    if reason is None and sex == "other": reason = "model only has male/female"
+    if reason is None and smoking == "No Info": reason = "missing smoking"
+    if reason: skipped["cardiovascular"] = reason
+    else:
+        inputs["cardiovascular"] = {
+            "age": round(shared["age_years"] * 365.25), "gender": 2 if sex == "male" else 1,
+            "smoke": int(smoking in ("current", "ever")),
+            **{f: data[f] for f in ("height", "weight", "ap_hi", "ap_lo", "cholesterol", "gluc", "alco", "active")},
+        }
+
+    reason = _require({**data, "bmi": shared["bmi"]}, ["hypertension", "heart_disease", "bmi", "HbA1c_level", "blood_glucose_level"])
+    if reason: skipped["diabetes"] = reason
+    else:
+        inputs["diabetes"] = {
+            "age": shared["age_years"], "gender": sex.title(), "smoking_history": smoking, "bmi": shared["bmi"],
+            **{f: data[f] for f in ("hypertension", "heart_disease", "HbA1c_level", "blood_glucose_level")},
+        }
+
+    if sex == "other": skipped["idiopathic"] = "model only has male/female"
+    elif smoking == "No Info": skipped["idiopathic"] = "missing smoking"
+    else:
+        inputs["idiopathic"] = {"age": int(shared["age_years"]), "gender": sex.title(),
+                                "smoking_history": "Never" if smoking == "never" else "Ever"}
+
+    if data.get("cbc"): inputs["cbc"] = {"sex": sex, **data["cbc"]}
+    else: skipped["cbc"] = "missing cbc"
+    return inputs, skipped
+
+
+async def run_concurrently(calls: Dict[str, Callable[[], Any]], timeout: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs every call on the threadpool at once, each with its own timeout. A call that times out keeps
+    running in its thread (it can't be interrupted) but its result is dropped.
+    """
+    async def one(name: str, call: Callable[[], Any]) -> Tuple[str, Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            outcome = {"status": "ok", "result": await asyncio.wait_for(run_in_threadpool(call), timeout)}
+        except asyncio.TimeoutError:
+            outcome = {"status": "timeout"}
+        except Exception as e:
+            outcome = {"status": "error", "error": str(getattr(e, "detail", e))}
+        return name, {**outcome, "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    return dict(await asyncio.gather(*(one(name, call) for name, call in calls.items())))
@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+
+class ShadowEvaluator:
+    """
+    Compares a candidate model with the primary on live traffic.
+
+    route() decides per request: "canary" (the candidate serves the response), "shadow" (the primary
+    serves and the candidate is scored in the background) or "primary" (no comparison). In both
+    compared modes the model that did not serve is run on a single background thread, so the response
+    never waits for it; when more than max_pending comparisons are queued, new ones are dropped.
+    """
+
+    def __init__(self, sample_rate: float = 0.1, canary_rate: float = 0.0, max_pending: int = 32,
+                 thresholds: Sequence[float] = (0.3, 0.7), window: int = 1024, seed: Optional[int] = None):
+        self.sample_rate = sample_rate
+        self.canary_rate = canary_rate
+        self.max_pending = max_pending
+        self.thresholds = thresholds
+        self.window = window
+        self._random = random.Random(seed)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {"compared": 0, "dropped": 0, "errors": 0, "canary": 0, "shadow": 0}
+            self._sums = {"abs_diff": 0.0, "diff": 0.0, "max_abs_diff": 0.0, "category_agree": 0, "label_agree": 0}
+            self._diffs = deque(maxlen=self.window)
+            self._latency = {"primary": deque(maxlen=self.window), "candidate": deque(maxlen=self.window)}
+
+    def route(self) -> str:
+        u = self._random.random()
+        if u < self.canary_rate: return "canary"
+        if u < self.canary_rate + self.sample_rate: return "shadow"
+        return "primary"
+
+    def submit(self, served_prob: float, served_by: str, served_ms: Optional[float], other: Callable[[], float],
+               served_forward: Optional[Callable[[], Any]] = None) -> bool:
+        """
+        Scores `other` (the model that did not serve) off the response path and records the pair.
+        If the served answer may have come from a cache, pass an uncached pass of the served model as
+        served_forward: it is timed off the response path too, instead of using served_ms.
+        """
+        with self._lock:
+            self.counts["canary" if served_by == "candidate" else "shadow"] += 1
+            if self._pending >= self.max_pending:
+                self.counts["dropped"] += 1
+                return False
+            self._pending += 1
+        self._executor.submit(self._compare, served_prob, served_by, served_ms, other, served_forward)
+        return True
+
+    def _compare(self, served_prob: float, served_by: str, served_ms: Optional[float], other: Callable[[], float],
+                 served_forward: Optional[Callable[[], Any]] = None):
+        try:
+            started = time.perf_counter()
+            other_prob = float(other())
+            other_ms = (time.perf_counter() - started) * 1000
+            if served_forward is not None:
+                started = time.perf_counter()
+                served_forward()
+                served_ms = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            print(f"Shadow comparison failed: {e}")
+            with self._lock:
+                self.counts["errors"] += 1
+                self._pending -= 1
+            return
+        primary, candidate = (served_prob, other_prob) if served_by == "primary" else (other_prob, served_prob)
+        primary_ms, candidate_ms = (served_ms, other_ms) if served_by == "primary" else (other_ms, served_ms)
+        diff = candidate - primary
+        with self._lock:
+            self._pending -= 1
+            self.counts["compared"] += 1
+            self._sums["abs_diff"] += abs(diff)
+            self._sums["diff"] += diff
+            self._sums["max_abs_diff"] = max(self._sums["max_abs_diff"], abs(diff))
+            self._sums["category_agree"] += int(np.digitize(primary, self.thresholds) == np.digitize(candidate, self.thresholds))
+            self._sums["label_agree"] += int((primary > 0.5) == (candidate > 0.5))
+            self._diffs.append(abs(diff))
+            self._latency["primary"].append(primary_ms)
+            self._latency["candidate"].append(candidate_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self.counts["compared"]
+            latency = {name: {"mean_ms": round(float(np.mean(v)), 4), "p95_ms": round(float(np.percentile(v, 95)), 4)} if v else None
+                       for name, v in self._latency.items()}
+            return {
+                "sample_rate": self.sample_rate,
+                "canary_rate": self.canary_rate,
+                **self.counts,
+                "pending": self._pending,
+                "mean_abs_diff": self._sums["abs_diff"] / n if n else None,
+                "mean_diff": self._sums["diff"] / n if n else None,  # candidate - primary
+                "max_abs_diff": self._sums["max_abs_diff"] if n else None,
+                "p95_abs_diff": float(np.percentile(self._diffs, 95)) if self._diffs else None,
+                "category_agreement": self._sums["category_agree"] / n if n else None,
+                "label_agreement": self._sums["label_agree"] / n if n else None,
+                "latency": latency,
+            }
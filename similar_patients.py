@@ -0,0 +1,64 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from batch_scoring import CARDIO_NN_ORDER, cardio_matrix
+from columnar import CARDIO_COLUMNS, validate_columns
+
+
+class SimilarPatientIndex:
+    """
+    k-nearest historical patients in the scaled feature space of the NN scaler (Euclidean distance,
+    i.e. every feature measured in training standard deviations). Rows live in numpy arrays and the
+    search is a KD-tree, so a query is O(log n) and memory is ~100 bytes per row.
+    """
+
+    def __init__(self, features: np.ndarray, ids: np.ndarray, outcomes: np.ndarray, scaler, leafsize: int = 32):
+        self.features = features.astype(np.float32)  # raw values, CARDIO_COLUMNS order
+        self.ids = ids.astype(np.int64)
+        self.outcomes = outcomes.astype(np.int8)
+        self.scaler = scaler
+        self.tree = cKDTree(self._scale(self.features.astype(np.float64)), leafsize=leafsize, balanced_tree=False)
+
+    @classmethod
+    def from_csv(cls, path: str, scaler, chunk_rows: int = 500_000) -> "SimilarPatientIndex":
+        """Reads the valid rows of a cardio_train-style CSV in chunks (bounded parse memory for large files)."""
+        with open(path, "rb") as f:
+            sep = ";" if b";" in f.readline() else ","
+        parts = []
+        for frame in pd.read_csv(path, sep=sep, usecols=CARDIO_COLUMNS + ["id", "cardio"], chunksize=chunk_rows):
+            columns = {c: frame[c].to_numpy() for c in frame.columns}
+            valid = validate_columns(columns)
+            parts.append((np.column_stack([columns[c][valid] for c in CARDIO_COLUMNS]).astype(np.float32),
+                          columns["id"][valid], columns["cardio"][valid]))
+        features, ids, outcomes = (np.concatenate(p) for p in zip(*parts))
+        return cls(features, ids, outcomes, scaler)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _scale(self, rows: np.ndarray) -> np.ndarray:
+        X = cardio_matrix({c: rows[:, i] for i, c in enumerate(CARDIO_COLUMNS)}, CARDIO_NN_ORDER)
+        return (X - self.scaler.mean_) / self.scaler.scale_
+
+    def query(self, patient: Dict[str, float], k: int = 10) -> Dict[str, Any]:
+        k = min(k, len(self))
+        point = self._scale(np.array([[patient[c] for c in CARDIO_COLUMNS]], dtype=np.float64))[0]
+        distances, idx = self.tree.query(point, k=k)
+        distances, idx = np.atleast_1d(distances), np.atleast_1d(idx)
+        outcomes = self.outcomes[idx]
+        weights = 1.0 / (distances + 1e-3)
+        neighbors: List[Dict[str, Any]] = [
+            {"id": int(self.ids[i]), "distance": round(float(d), 4), "cardio": int(self.outcomes[i]),
+             "features": dict(zip(CARDIO_COLUMNS, self.features[i].tolist()))}
+            for d, i in zip(distances, idx)
+        ]
+        return {
+            "k": k,
+            "reference_rows": len(self),
+            "outcome_rate": float(outcomes.mean()),
+            "weighted_outcome_rate": float((weights * outcomes).sum() / weights.sum()),
+            "neighbors": neighbors,
+        }
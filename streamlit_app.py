@@ -34,6 +34,25 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Repeat predictions are revalidated against the server's ETag (GET by input hash) instead of recomputed
+def post_prediction(path, payload):
+    cache = st.session_state.setdefault("prediction_cache", {})
+    key = (path, json.dumps(payload, sort_keys=True))
+    cached = cache.get(key)
+    if cached:
+        res = requests.get(f"{API_URL}{cached['location']}", headers={"If-None-Match": cached["etag"]})
+        if res.status_code == 304:
+            return cached["response"]
+    else:
+        res = requests.post(f"{API_URL}{path}", json=payload)
+    if res.status_code == 200 and res.headers.get("ETag") and res.headers.get("Content-Location"):
+        cache[key] = {"etag": res.headers["ETag"], "location": res.headers["Content-Location"], "response": res}
+    elif cached and res.status_code == 404:
+        # Server forgot the hash (e.g. restart): fall back to a fresh POST
+        cache.pop(key, None)
+        return post_prediction(path, payload)
+    return res
+
 st.title("🏥 MedAssist AI Dashboard")
 st.markdown(f"**Backend Status**: Connecting to `{API_URL}`...")
 
@@ -78,7 +97,7 @@ with tabs[0]:
         }
         try:
             # 1. Result
-            res = requests.post(f"{API_URL}/predict/cardiovascular/result", json=payload)
+            res = post_prediction("/predict/cardiovascular/result", payload)
             if res.status_code == 200:
                 data = res.json()
                 st.subheader("Results")
@@ -90,13 +109,15 @@ with tabs[0]:
                 
                 # 2. Explanation (Optional)
                 try:
-                    res2 = requests.post(f"{API_URL}/predict/cardiovascular/explanation", json=payload)
+                    res2 = post_prediction("/predict/cardiovascular/explanation", payload)
                     if res2.status_code == 200 and res2.json().get('explanations'):
                         expl_data = res2.json()['explanations']
                         st.write("### Top Risk Factors")
                         if 'top_factors' in expl_data:
                             for factor in expl_data['top_factors']:
                                 st.info(f"**{factor['feature']}**: {factor['impact']} risk")
+                except Exception as e:
+                    st.warning(f"Explanation unavailable: {e}")
                 if 'explanations' in data and data['explanations']:
                     st.write("### Top Risk Factors")
                     for factor in data['explanations']['explanations'][:3]:
@@ -136,7 +157,7 @@ with tabs[1]:
             "smoking_history": d_smoke, "bmi": d_bmi, "HbA1c_level": d_hba1c, "blood_glucose_level": int(d_gluc)
         }
         try:
-            res = requests.post(f"{API_URL}/predict/diabetes", json=payload)
+            res = post_prediction("/predict/diabetes", payload)
             if res.status_code == 200:
                 data = res.json()
                 st.metric("Diabetes Risk", f"{data['risk_probability']*100:.1f}%", data['risk_category'])
@@ -159,7 +180,7 @@ with tabs[2]:
     if st.button("Analyze IPF Risk"):
         payload = {"age": i_age, "gender": i_gender, "smoking_history": i_smoke}
         try:
-            res = requests.post(f"{API_URL}/predict/idiopathic", json=payload)
+            res = post_prediction("/predict/idiopathic", payload)
             if res.status_code == 200:
                 data = res.json()
                 res_col1, res_col2 = st.columns(2)
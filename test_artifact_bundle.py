@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from artifact_bundle import ArtifactBundle, is_bundle, write_bundle
+from batch_scoring import CardioNNNumpy, bundle_cardio_nn, load_cardio_nn, predict_cardio_nn_batch
+from idiopathic_table import bundle_idiopathic, load_idiopathic_table
+
+
+def test_arrays_are_aligned_views_of_the_file(tmp_path):
+    path = str(tmp_path / "a.bundle")
+    sections = {"m": {"arrays": {"w": np.arange(12, dtype=np.float32).reshape(3, 4), "ids": np.array([3, 1], dtype=np.int64)},
+                      "metadata": {"classes": ["a", "b"]}}}
+    header = write_bundle(path, sections)
+    bundle = ArtifactBundle(path)
+    arrays = bundle.arrays("m")
+    assert np.array_equal(arrays["w"], sections["m"]["arrays"]["w"]) and arrays["ids"].tolist() == [3, 1]
+    assert all(a.ctypes.data % 64 == 0 and not a.flags.owndata for a in arrays.values())
+    assert bundle.metadata("m") == {"classes": ["a", "b"]} and bundle.version == header["version"]
+    assert write_bundle(path, sections)["models"]["m"]["version"] == bundle.model_version("m")  # content-addressed
+    assert is_bundle(path) and not is_bundle("cardio_model.pth")
+    with pytest.raises(KeyError): bundle.arrays("other")
+
+
+def test_bundled_models_match_the_separate_files(tmp_path):
+    path = str(tmp_path / "a.bundle")
+    write_bundle(path, {"cardio_nn": bundle_cardio_nn("cardio_model.pth", "scaler.pkl"),
+                        "idiopathic": bundle_idiopathic("idiopathic_model.pth", "idiopathic_scaler.pkl", "idiopathic_encoders.pkl")})
+    X = np.random.default_rng(0).uniform([1, 150, 50, 100, 60, 1, 1, 0, 0, 0, 40], [2, 190, 110, 170, 100, 3, 3, 1, 1, 1, 65], (200, 11))
+    (model, scaler), (bundled, bundled_scaler) = load_cardio_nn(), load_cardio_nn(path)
+    assert np.array_equal(predict_cardio_nn_batch(model, scaler, X), predict_cardio_nn_batch(bundled, bundled_scaler, X))
+    assert np.allclose(CardioNNNumpy(bundled, bundled_scaler).predict(X), predict_cardio_nn_batch(model, scaler, X), atol=1e-5)
+    table = load_idiopathic_table("idiopathic_model.pth", "idiopathic_scaler.pkl", "idiopathic_encoders.pkl", version="v")
+    from_bundle = load_idiopathic_table(path, version="v")
+    assert np.array_equal(table.risk, from_bundle.risk) and from_bundle.lookup(60, "male", "Ever") == table.lookup(60, "male", "Ever")
+
+
+def test_sections_older_than_their_sources_are_stale(tmp_path):
+    import os
+    source = tmp_path / "weights.bin"
+    source.write_bytes(b"1")
+    path = str(tmp_path / "a.bundle")
+    write_bundle(path, {"m": {"arrays": {"w": np.zeros(2)}, "metadata": {"sources": [str(source), str(tmp_path / "gone.bin")]}}})
+    built = os.path.getmtime(path)
+    os.utime(source, (built - 10, built - 10))
+    assert ArtifactBundle(path).stale("m") == []
+    os.utime(source, (built + 10, built + 10))
+    assert ArtifactBundle(path).stale("m") == [str(source)]
@@ -0,0 +1,48 @@
+import json
+import os
+
+import numpy as np
+
+from batch_score import run
+
+
+def write_sample(tmp_path, rows=600):
+    with open("cardio_train.csv", "rb") as f:
+        lines = [f.readline() for _ in range(rows + 1)]
+    path = tmp_path / "sample.csv"
+    path.write_bytes(b"".join(lines))
+    return str(path)
+
+
+def test_batch_score_resumes_from_completed_shards(tmp_path):
+    sample = write_sample(tmp_path)
+    output = str(tmp_path / "scores.npz")
+    first = run([sample], output, workers=1, shard_rows=200, keep_parts=True)
+    assert first["rows"] == 600 and first["shards"] >= 3 and first["shards_resumed"] == 0
+    assert set(first["stage_seconds"]) >= {"load", "shard_read", "shard_infer", "merge"}
+    with np.load(output) as archive:
+        expected = archive["risk_probability"]
+        assert archive["row"].tolist() == list(range(600))
+
+    # Simulate an interruption: the last shard never finished
+    parts = sorted(p for p in os.listdir(output + ".parts") if p.startswith("shard-"))
+    os.remove(os.path.join(output + ".parts", parts[-1]))
+    second = run([sample], output, workers=1, shard_rows=200)
+    assert second["shards_resumed"] == first["shards"] - 1
+    assert not os.path.exists(output + ".parts")
+    with np.load(output) as archive:
+        np.testing.assert_array_equal(archive["risk_probability"], expected)
+    with open(output + ".summary.json") as f:
+        assert json.load(f)["rows"] == 600
+
+
+def test_unparseable_cells_mark_the_row_invalid(tmp_path):
+    sample = write_sample(tmp_path, rows=10)
+    with open(sample, "rb") as f: lines = f.readlines()
+    lines[3] = lines[3].replace(b";1;", b";x;", 1)
+    with open(sample, "wb") as f: f.writelines(lines)
+    output = str(tmp_path / "scores.npz")
+    summary = run([sample], output, workers=1)
+    assert summary["rows"] == 10 and summary["invalid_rows"] >= 1
+    with np.load(output) as archive:
+        assert archive["valid"][2] == 0 and np.isnan(archive["risk_probability"][2])
@@ -0,0 +1,49 @@
+import numpy as np
+import torch
+
+from batch_scoring import CardioNNNumpy, load_cardio_nn, mc_summary, predict_cardio_nn_batch, predict_cardio_nn_grid, predict_cardio_nn_mc
+
+X = np.array([[2, 168, 62, 110, 80, 1, 1, 0, 0, 1, 50.3], [1, 156, 85, 140, 90, 3, 1, 0, 0, 1, 55.4]])
+
+
+def test_mc_dropout_is_deterministic_and_matches_train_mode():
+    model, scaler = load_cardio_nn()
+    samples = predict_cardio_nn_mc(model, scaler, X, passes=2000, max_rows=1000)
+    assert samples.shape == (2, 2000)
+    np.testing.assert_array_equal(samples, predict_cardio_nn_mc(model, scaler, X, passes=2000, max_rows=1000))
+    assert not model.training
+
+    model.train()
+    try:
+        with torch.no_grad():
+            scaled = torch.from_numpy(((np.repeat(X, 2000, axis=0) - scaler.mean_) / scaler.scale_).astype(np.float32))
+            reference = torch.sigmoid(model(scaled)).numpy().reshape(2, 2000)
+    finally:
+        model.eval()
+    np.testing.assert_allclose(samples.mean(axis=1), reference.mean(axis=1), atol=0.01)
+    np.testing.assert_allclose(samples.std(axis=1), reference.std(axis=1), atol=0.01)
+
+
+def test_mc_summary_interval_brackets_mean():
+    model, scaler = load_cardio_nn()
+    summary = mc_summary(predict_cardio_nn_mc(model, scaler, X, passes=50), level=0.9)
+    assert np.all(summary["lower"] <= summary["mean"]) and np.all(summary["mean"] <= summary["upper"])
+    assert np.all(summary["std"] > 0)
+    assert np.all(np.abs(summary["mean"] - predict_cardio_nn_batch(model, scaler, X)) < 0.1)
+
+
+def test_grid_reuses_first_layer_and_matches_full_batch():
+    model, scaler = load_cardio_nn()
+    base = np.array([2, 168, 62, 150, 80, 3, 1, 0, 0, 1, 50.3])
+    ap_hi, weight = np.linspace(90, 200, 30), np.linspace(40, 150, 20)
+    grid = predict_cardio_nn_grid(model, scaler, base, [(3, ap_hi), (2, weight)])
+    assert grid.shape == (30, 20)
+    X = np.tile(base, (600, 1))
+    A, W = np.meshgrid(ap_hi, weight, indexing="ij")
+    X[:, 3], X[:, 2] = A.ravel(), W.ravel()
+    np.testing.assert_allclose(grid, predict_cardio_nn_batch(model, scaler, X).reshape(30, 20), atol=1e-5)
+
+
+def test_numpy_backend_matches_torch_model():
+    model, scaler = load_cardio_nn()
+    np.testing.assert_allclose(CardioNNNumpy(model, scaler).predict(X), predict_cardio_nn_batch(model, scaler, X), atol=1e-6)
@@ -0,0 +1,139 @@
+import pytest
+import torch
+from transformers import BertConfig, BertForMaskedLM, BertTokenizerFast
+
+from bert_serving import ClinicalBertServer
+
+WORDS = ["the", "patient", "was", "prescribed", "for", "hypertension", "chest", "pain",
+         "aspirin", "insulin", "heart", "left", "arm", "has", "."]
+
+
+def build_tiny_bert(tmp_path):
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS))
+    tokenizer = BertTokenizerFast(str(vocab))
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=tokenizer.vocab_size, hidden_size=32, num_hidden_layers=2,
+                        num_attention_heads=2, intermediate_size=64, max_position_embeddings=64)
+    return BertForMaskedLM(config), tokenizer
+
+
+def test_lazy_server_does_not_load_on_construction():
+    server = ClinicalBertServer(model_name="not-a-real/model")
+    assert not server.loaded
+
+
+def test_batched_matches_single_sentence(tmp_path):
+    model, tokenizer = build_tiny_bert(tmp_path)
+    server = ClinicalBertServer(model=model, tokenizer=tokenizer, quantize=False, top_k=3)
+    texts = ["the patient was prescribed [MASK] for hypertension .", "chest [MASK] ."]
+
+    batched = server.fill_mask(texts)
+    single = [server.fill_mask([t])[0] for t in texts]
+
+    for b, s in zip(batched, single):
+        assert [r["token"] for r in b] == [r["token"] for r in s]
+        for rb, rs in zip(b, s):
+            assert abs(rb["score"] - rs["score"]) < 1e-5
+
+
+def test_quantized_and_multi_mask(tmp_path):
+    model, tokenizer = build_tiny_bert(tmp_path)
+    server = ClinicalBertServer(model=model, tokenizer=tokenizer, quantize=True, top_k=2)
+    result = server.fill_mask(["the [MASK] has [MASK] pain ."])[0]
+
+    assert len(result) == 2
+    assert all(len(candidates) == 2 for candidates in result)
+    assert {"score", "token", "token_str", "sequence"} <= set(result[0][0])
+
+
+def test_long_note_windows_cover_every_mask(tmp_path):
+    model, tokenizer = build_tiny_bert(tmp_path)
+    server = ClinicalBertServer(model=model, tokenizer=tokenizer, quantize=False, max_length=34,
+                                max_batch=2, window_stride=8)
+    note = " ".join(["the patient has chest pain ."] * 20 + ["prescribed [MASK] ."] + ["the heart ."] * 10 + ["[MASK] arm"])
+
+    assert server.is_long(note)
+    result = server.fill_mask_long(note, top_k=3)
+
+    assert result["n_windows"] > 1
+    assert [m["mask_index"] for m in result["masks"]] == [0, 1]
+    assert all(len(m["candidates"]) == 3 for m in result["masks"])
+
+
+def test_long_mode_matches_short_mode_for_short_text(tmp_path):
+    model, tokenizer = build_tiny_bert(tmp_path)
+    server = ClinicalBertServer(model=model, tokenizer=tokenizer, quantize=False, top_k=3)
+    text = "the patient was prescribed [MASK] for hypertension ."
+
+    short = server.fill_mask([text])[0]
+    long = server.fill_mask_long(text)["masks"][0]["candidates"]
+
+    assert [r["token"] for r in short] == [r["token"] for r in long]
+
+
+def test_restricted_vocab_matches_full_vocab_ranking(tmp_path):
+    model, tokenizer = build_tiny_bert(tmp_path)
+    server = ClinicalBertServer(model=model, tokenizer=tokenizer, quantize=True, top_k=len(WORDS) + 5)
+    text = "the patient was prescribed [MASK] for hypertension ."
+    drugs = ["aspirin", "insulin", "heart", "not-a-single-token", "metformin"]
+
+    vocab = server.candidate_vocab(drugs)
+    restricted = server.fill_mask([text], top_k=3, vocab=vocab)[0]
+    full = server.fill_mask([text])[0]
+
+    assert vocab["skipped"] == ["not-a-single-token", "metformin"]
+    drug_ids = set(vocab["ids"].tolist())
+    assert [r["token"] for r in restricted] == [r["token"] for r in full if r["token"] in drug_ids]
+    assert abs(sum(r["score"] for r in restricted) - 1.0) < 1e-5
+
+
+def test_configured_vocab_file_is_default(tmp_path):
+    model, tokenizer = build_tiny_bert(tmp_path)
+    vocab_file = tmp_path / "drugs.txt"
+    vocab_file.write_text("# drugs\naspirin\ninsulin\n")
+    server = ClinicalBertServer(model=model, tokenizer=tokenizer, quantize=False, vocab_file=str(vocab_file))
+
+    assert len(server.resolve_vocab()["ids"]) == 2
+    assert server.resolve_vocab(full_vocabulary=True) is None
+    assert len(server.resolve_vocab(["heart"])["ids"]) == 1
+    with pytest.raises(ValueError, match="metformin"):
+        server.resolve_vocab(["heart", "metformin"])
+
+
+def test_batch_sends_long_texts_through_windows(tmp_path):
+    model, tokenizer = build_tiny_bert(tmp_path)
+    server = ClinicalBertServer(model=model, tokenizer=tokenizer, quantize=False, max_length=34, window_stride=8, top_k=3)
+    short = "chest [MASK] ."
+    long = " ".join(["the patient has chest pain ."] * 20 + ["prescribed [MASK] ."])
+
+    assert server.fill_mask([long])[0] == []  # truncated away
+    results = server.fill_mask_auto([short, long, short])
+    assert results[0] == results[2] == server.fill_mask([short])[0]
+    assert results[1] == server.fill_mask_long(long, top_k=3) and len(results[1]["masks"][0]["candidates"]) == 3
+
+
+def test_vocab_cache_is_bounded_lru(tmp_path):
+    model, tokenizer = build_tiny_bert(tmp_path)
+    server = ClinicalBertServer(model=model, tokenizer=tokenizer, quantize=False)
+    first = server.candidate_vocab(["aspirin"])
+    for word in WORDS:
+        for terms in ([word], [word, "heart"]):
+            server.candidate_vocab(["aspirin"])  # recently used, so never evicted
+            server.candidate_vocab(terms)
+    assert len(server._vocab_cache) == 16 and server.candidate_vocab(["aspirin"]) is first
+
+
+def test_auto_routing_tokenizes_each_text_once(tmp_path):
+    model, tokenizer = build_tiny_bert(tmp_path)
+    server = ClinicalBertServer(model=model, tokenizer=tokenizer, quantize=False, max_length=34, window_stride=8, top_k=3)
+    short = "chest [MASK] ."
+    long = " ".join(["the patient has chest pain ."] * 20 + ["prescribed [MASK] ."])
+    expected = [server.fill_mask([short])[0], server.fill_mask_long(long)]
+
+    calls = []
+    original = server._token_ids
+    server._token_ids = lambda texts: calls.append(list(texts)) or original(texts)
+    server._encode = lambda texts: pytest.fail("short texts must reuse the routing tokenization")
+    assert server.fill_mask_auto([short, long]) == expected
+    assert calls == [[short, long]]
@@ -0,0 +1,121 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+
+import json
+
+import pytest
+
+from columnar import (CARDIO_COLUMNS, ColumnarError, CSVRowChunker, PayloadTooLarge, detect_format, format_stream_chunk, maybe_decompress,
+                      read_columns, validate_columns, write_results)
+
+ROWS = pd.DataFrame({
+    "id": [0, 1, 2],
+    "age": [18393, 20228, 18857],
+    "gender": [2, 1, 3],  # row 2 has an invalid gender code
+    "height": [168, 156, 165],
+    "weight": [62.0, 85.0, 64.0],
+    "ap_hi": [110, 140, 130],
+    "ap_lo": [80, 90, 70],
+    "cholesterol": [1, 3, 3],
+    "gluc": [1, 1, 1],
+    "smoke": [0, 0, 0],
+    "alco": [0, 0, 0],
+    "active": [1, 1, 0],
+    "cardio": [0, 1, 1],
+})
+
+
+def test_csv_in_cardio_train_layout():
+    body = ROWS.to_csv(sep=";", index=False).encode()
+    assert detect_format(body, "text/csv") == "csv"
+    columns = read_columns(body, "csv")
+    assert set(columns) == set(CARDIO_COLUMNS) | {"id"}
+    assert validate_columns(columns).tolist() == [True, True, False]
+
+
+def test_csv_bad_cell_invalidates_only_its_row():
+    body = ROWS.astype({"age": object}).assign(age=["abc", 20228, 18857]).to_csv(sep=";", index=False).encode()
+    columns = read_columns(body, "csv")
+    assert columns["id"].tolist() == [0, 1, 2]
+    assert validate_columns(columns).tolist() == [False, True, False]
+
+
+def test_gzip_npy_detected_by_magic():
+    buf = io.BytesIO()
+    np.save(buf, ROWS[CARDIO_COLUMNS].to_numpy(np.float64))
+    body, compressed = maybe_decompress(gzip.compress(buf.getvalue()))
+    assert compressed
+    assert detect_format(body) == "npy"
+    columns = read_columns(body, "npy")
+    assert columns["ap_hi"].tolist() == [110, 140, 130]
+
+
+def test_validation_flags_out_of_range_and_nan():
+    columns = {c: ROWS[c].to_numpy(np.float64, copy=True) for c in CARDIO_COLUMNS}
+    columns["ap_hi"][0] = 16020
+    columns["weight"][1] = np.nan
+    assert validate_columns(columns).tolist() == [False, False, False]
+
+
+def test_results_round_trip_npz():
+    results = {"risk_probability": np.array([0.2, np.nan], dtype=np.float32), "valid": np.array([1, 0], dtype=np.int8)}
+    body = write_results("npz", results)
+    assert detect_format(body) == "npz"
+    with np.load(io.BytesIO(body)) as archive:
+        assert archive["valid"].tolist() == [1, 0]
+
+
+def test_results_npy_keeps_every_column():
+    results = {"id": np.array(["a", "b"], dtype=object), "risk_probability": np.array([0.2, np.nan]), "valid": np.array([1, 0], dtype=np.int8)}
+    array = np.load(io.BytesIO(write_results("npy", results)), allow_pickle=False)
+    assert array.dtype.names == ("id", "risk_probability", "valid")
+    assert array["id"].tolist() == ["a", "b"] and array["valid"].tolist() == [1, 0]
+
+
+def test_decompression_stops_at_the_limit():
+    bomb = gzip.compress(b"0" * 10_000_000)
+    with pytest.raises(PayloadTooLarge): maybe_decompress(bomb, max_bytes=1_000_000)
+    body = b"age;gender\n" * 10
+    assert maybe_decompress(gzip.compress(body[:50]) + gzip.compress(body[50:]), max_bytes=len(body)) == (body, True)
+
+
+def test_chunker_handles_arbitrary_splits():
+    body = ROWS.to_csv(sep=";", index=False).replace("\n", "\r\n").encode()
+    chunker = CSVRowChunker(chunk_rows=2, gzip=True)
+    stream = gzip.compress(body)
+    chunks = []
+    for i in range(0, len(stream), 7):
+        chunks += chunker.feed(stream[i:i + 7])
+    chunks += chunker.close()
+    assert [len(c["age"]) for c in chunks] == [2, 1]
+    assert chunker.rows == 3
+    assert np.concatenate([validate_columns(c) for c in chunks]).tolist() == [True, True, False]
+
+
+def test_chunker_rejects_missing_columns_and_coerces_bad_cells():
+    with pytest.raises(ColumnarError):
+        CSVRowChunker().feed(b"id;age;gender\n1;2;3\n")
+    chunker = CSVRowChunker()
+    chunker.feed(ROWS.to_csv(sep=";", index=False).encode().replace(b";168;", b";abc;"))
+    columns = chunker.close()[0]
+    assert validate_columns(columns).tolist() == [False, True, False]
+
+
+def test_stream_chunk_formats():
+    results = {"row": np.array([0, 1]), "risk_probability": np.array([0.25, np.nan], dtype=np.float32)}
+    lines = format_stream_chunk("ndjson", results).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [{"row": 0, "risk_probability": 0.25}, {"row": 1, "risk_probability": None}]
+    assert format_stream_chunk("csv", results, header=True).decode().splitlines() == ["row;risk_probability", "0;0.25", "1;"]
+
+
+def test_chunker_inflates_in_bounded_pieces():
+    chunker = CSVRowChunker(chunk_rows=1000, gzip=True, max_inflate_bytes=4096)
+    line = ROWS.to_csv(sep=";", index=False, header=False).splitlines()[0] + "\n"
+    stream = gzip.compress((ROWS.to_csv(sep=";", index=False) + line * 20000).encode())
+    chunks = chunker.feed_iter(stream[:len(stream) // 2] + stream[len(stream) // 2:] + gzip.compress(line.encode() * 5))
+    first = next(chunks)
+    assert len(first["age"]) == 1000 and len(chunker._partial) < 4096  # the rest is still compressed
+    assert sum(len(c["age"]) for c in chunks) + sum(len(c["age"]) for c in chunker.close()) == 20008 - 1000
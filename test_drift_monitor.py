@@ -0,0 +1,53 @@
+import numpy as np
+
+from drift_monitor import DriftMonitor, NumericStats, build_reference, load_or_build_reference, psi
+
+rng = np.random.default_rng(0)
+REFERENCE_COLUMNS = {
+    "ap_hi": rng.normal(125, 15, 5000).round(),
+    "smoke": rng.integers(0, 2, 5000),
+}
+
+
+def test_welford_single_and_batch_updates_agree_with_numpy():
+    x = rng.normal(50, 10, 1000)
+    single, batch = NumericStats([40, 50, 60]), NumericStats([40, 50, 60])
+    for v in x: single.add(float(v))
+    batch.add_many(x[:300])
+    batch.add_many(x[300:])
+    for stats in (single, batch):
+        assert np.isclose(stats.mean, x.mean()) and np.isclose(stats.std(), x.std(ddof=1))
+    assert single.counts == batch.counts and sum(single.counts) == 1000
+    assert abs(single.quantile(0.5) - np.median(x)) < 1.0
+
+
+def test_drift_report_flags_shifted_inputs():
+    reference = build_reference(REFERENCE_COLUMNS, ["ap_hi"], ["smoke"], {"cardio_nn": rng.uniform(0, 1, 5000)})
+    reference["source"] = "test"
+    monitor = DriftMonitor(reference, min_samples=100)
+    assert monitor.report()["status"] == "insufficient_data"
+
+    monitor.observe_batch({k: v[:2000] for k, v in REFERENCE_COLUMNS.items()}, {"cardio_nn": rng.uniform(0, 1, 2000)})
+    report = monitor.report()
+    assert report["status"] == "stable" and report["max_psi"] < 0.1
+
+    monitor.reset()
+    for _ in range(200):
+        monitor.observe({"ap_hi": 170, "smoke": 1}, {"cardio_nn": 0.95})
+    report = monitor.report()
+    assert report["status"] == "significant"
+    assert report["features"]["ap_hi"]["mean_shift_std"] > 2
+    assert report["predictions"]["cardio_nn"]["histogram"][-1] == 200
+
+
+def test_psi_and_reference_cache(tmp_path):
+    assert psi([0.5, 0.5], [50, 50]) == 0.0
+    assert psi([0.5, 0.5], [0, 0]) is None
+    source = tmp_path / "data.csv"
+    source.write_text("x")
+    calls = []
+    build = lambda: calls.append(1) or {"rows": 1}
+    path = str(tmp_path / "reference.json")
+    load_or_build_reference(path, [str(source)], build)
+    assert load_or_build_reference(path, [str(source)], build)["rows"] == 1
+    assert len(calls) == 1
@@ -0,0 +1,24 @@
+import time
+
+import numpy as np
+import pytest
+
+from ensemble import CardioEnsemble, parse_weights
+
+
+def test_parse_weights_normalizes():
+    assert parse_weights("nn=3, xgb=1") == {"cardio_nn": 0.75, "cardio_xgb": 0.25}
+    for bad in ("", "nn=0", "nn=1,xgb=-1"):
+        with pytest.raises(ValueError): parse_weights(bad)
+    with pytest.raises(ValueError, match="'lgbm'"): parse_weights("nn=1,lgbm=1")
+
+
+def test_members_run_concurrently_and_disagreement_is_spread():
+    ensemble = CardioEnsemble({"cardio_nn": 0.75, "cardio_xgb": 0.25})
+    slow = lambda probs: (lambda: time.sleep(0.2) or np.array(probs))
+    started = time.perf_counter()
+    out = ensemble.score({"cardio_nn": slow([0.2, 0.9]), "cardio_xgb": slow([0.6, 0.8])})
+    assert time.perf_counter() - started < 0.35  # close to one member, not the sum
+    np.testing.assert_allclose(out["risk_probability"], [0.3, 0.875])
+    np.testing.assert_allclose(out["disagreement"], [0.4, 0.1])
+    assert set(out["members"]) == {"cardio_nn", "cardio_xgb"}
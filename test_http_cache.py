@@ -0,0 +1,31 @@
+from http_cache import PayloadStore, etag_matches, input_hash, make_etag
+
+
+def test_input_hash_ignores_key_order():
+    assert input_hash({"age": 65, "gender": "Male"}) == input_hash({"gender": "Male", "age": 65})
+    assert input_hash({"age": 65}) != input_hash({"age": 66})
+
+
+def test_etag_changes_with_model_version():
+    h = input_hash({"age": 65})
+    assert make_etag("/predict", h, "v1") == make_etag("/predict", h, "v1")
+    assert make_etag("/predict", h, "v1") != make_etag("/predict", h, "v2")
+    assert make_etag("/predict", h, "v1", "body-a") != make_etag("/predict", h, "v1", "body-b")
+    assert make_etag("/predict", h, "v1").startswith('W/"')
+
+
+def test_etag_matches_lists_and_wildcard():
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches(None, '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert etag_matches('"b"', 'W/"b"') and etag_matches('W/"b"', 'W/"b"')  # weak comparison
+
+
+def test_payload_store_is_bounded():
+    store = PayloadStore(max_entries=2)
+    first = store.put({"age": 1})
+    store.put({"age": 2})
+    store.put({"age": 3})
+    assert store.get(first) is None
+    assert store.get(input_hash({"age": 3})) == {"age": 3}
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import torch
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from idiopathic_table import IdiopathicTable
+from model_utils import IdiopathicNN
+
+
+def _table():
+    torch.manual_seed(0)
+    model = IdiopathicNN(input_dim=3).eval()
+    scaler = StandardScaler().fit(np.array([[50.0], [60.0], [70.0]]))
+    encoders = {"sex": LabelEncoder().fit(["female", "male"]), "smoking": LabelEncoder().fit(["Ever", "Never"])}
+    return model, scaler, encoders, IdiopathicTable.build(model, scaler, encoders, "v1")
+
+
+def test_lookup_matches_model_and_attributions_add_up():
+    model, scaler, encoders, table = _table()
+    for age, gender, smoking in [(0, "Male", "Ever"), (63, " female", "never"), (120, "male", "Never")]:
+        out = table.lookup(age, gender, smoking)
+        x = [scaler.transform([[age]])[0][0], encoders["sex"].transform([gender.strip().lower()])[0],
+             encoders["smoking"].transform([smoking.strip().title()])[0]]
+        with torch.no_grad():
+            expected = 1.0 - model(torch.FloatTensor([x])).item()
+        assert out["risk_probability"] == pytest.approx(expected, abs=1e-6)
+        assert sum(out["attributions"].values()) + out["base_value"] == pytest.approx(out["risk_probability"])
+
+
+def test_shapley_of_reference_age_and_unknown_inputs():
+    _, _, _, table = _table()
+    assert table.lookup(60, "male", "Ever")["attributions"]["age"] == pytest.approx(0.0)  # 60 is the mean age
+    with pytest.raises(KeyError): table.lookup(60, "other", "Ever")
+    with pytest.raises(IndexError): table.lookup(121, "male", "Ever")
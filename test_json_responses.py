@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+
+import json_responses
+from json_responses import dumps, shape_content, shaped
+
+EXPLANATION = {
+    "prediction": 1,
+    "input_data": {"age": 50},
+    "explanations": {
+        "explanations": [{"feature": "age", "shap_value": 0.4}, {"feature": "gender", "shap_value": 0.1}],
+        "top_factors": [{"feature": "age", "shap_value": 0.4}],
+    },
+}
+
+
+def test_dumps_serializes_numpy_natively():
+    body = json.loads(dumps({"p": np.float32(0.25), "n": np.int64(3), "v": np.arange(3), "m": np.eye(2)[:, :1]}))
+    assert body == {"p": 0.25, "n": 3, "v": [0, 1, 2], "m": [[1.0], [0.0]]}
+
+
+def test_compact_drops_echoes_and_full_explanation_lists():
+    compact = shape_content(EXPLANATION, compact=True)
+    assert compact == {"prediction": 1, "explanations": {"top_factors": [{"feature": "age", "shap_value": 0.4}]}}
+
+
+def test_fields_selects_dotted_paths_and_list_items():
+    assert shape_content(EXPLANATION, fields="prediction,explanations.top_factors") == {
+        "prediction": 1, "explanations": {"top_factors": [{"feature": "age", "shap_value": 0.4}]}}
+    assert shape_content([{"a": 1, "b": 2}, {"a": 3}], fields="a") == [{"a": 1}, {"a": 3}]
+
+
+def test_shaped_follows_the_request_options():
+    assert shaped(EXPLANATION) is EXPLANATION
+    token = json_responses._shape.set(("prediction", False))
+    try:
+        assert shaped(EXPLANATION) == {"prediction": 1}
+    finally:
+        json_responses._shape.reset(token)
@@ -0,0 +1,53 @@
+import pytest
+
+from model_registry import HotSwapper, ModelRegistry, RegistryError
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_publish_activate_and_rollback(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    v1 = registry.publish("toy", [write(tmp_path / "weights.txt", "1")], ["a", "b"], {"auc": 0.7}, activate=True)
+    v2 = registry.publish("toy", [write(tmp_path / "weights.txt", "2")], metrics={"auc": 0.8})
+    assert (v1, v2) == ("v1", "v2") and registry.versions("toy") == ["v1", "v2"]
+    assert registry.current("toy") == "v1" and registry.manifest("toy", "v1")["feature_schema"] == ["a", "b"]
+    registry.activate("toy", "v2")
+    assert registry.state("toy") == {"current": "v2", "history": ["v1"]}
+    assert open(registry.paths("toy", "v2")[0]).read() == "2"
+    assert registry.rollback("toy") == "v1" and registry.current("toy") == "v1"
+    with pytest.raises(RegistryError): registry.rollback("toy")
+
+
+def test_tampered_version_is_rejected(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.publish("toy", [write(tmp_path / "weights.txt", "1")], activate=True)
+    registry.publish("toy", [write(tmp_path / "weights.txt", "2")])
+    write(tmp_path / "registry" / "toy" / "v2" / "weights.txt", "tampered")
+    with pytest.raises(RegistryError): registry.activate("toy", "v2")
+    assert registry.current("toy") == "v1"
+
+
+def test_failed_warmup_keeps_serving_the_old_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.publish("toy", [write(tmp_path / "weights.txt", "1")], activate=True)
+    served = {}
+
+    def warmup(value):
+        if value < 0: raise ValueError("NaN output")
+
+    swapper = HotSwapper(registry, {"toy": (lambda paths: int(open(paths[0]).read()), warmup,
+                                            lambda version, paths, value: served.update(toy=value))})
+    swapper.sync_all()
+    assert served == {"toy": 1} and swapper.loaded == {"toy": "v1"}
+
+    registry.publish("toy", [write(tmp_path / "weights.txt", "-1")], activate=True)
+    with pytest.raises(ValueError): swapper.sync("toy")
+    assert served == {"toy": 1} and swapper.status()["toy"]["served"] == "v1"
+    assert swapper.status()["toy"]["error"].startswith("v2:")
+
+    registry.publish("toy", [write(tmp_path / "weights.txt", "3")], activate=True)
+    swapper.sync_all()
+    assert served == {"toy": 3} and swapper.loaded == {"toy": "v3"} and swapper.status()["toy"]["error"] is None
@@ -0,0 +1,37 @@
+import numpy as np
+import torch
+
+from batch_scoring import CARDIO_NN_ORDER, cardio_matrix, load_cardio_nn
+from columnar import read_columns, validate_columns
+from nn_attributions import cardio_nn_attributions
+
+
+def sample_rows(n=200):
+    with open("cardio_train.csv", "rb") as f:
+        body = b"".join(f.readline() for _ in range(n + 1))
+    columns = read_columns(body, "csv")
+    valid = validate_columns(columns)
+    return cardio_matrix({c: v[valid] for c, v in columns.items()}, CARDIO_NN_ORDER)
+
+
+def logits(model, scaler, X):
+    with torch.no_grad():
+        return model(torch.from_numpy(((X - scaler.mean_) / scaler.scale_).astype(np.float32))).numpy().ravel()
+
+
+def test_integrated_gradients_complete_to_logit_difference():
+    model, scaler = load_cardio_nn()
+    X = sample_rows()
+    attributions = cardio_nn_attributions(model, scaler, X, steps=64, max_rows=1000)
+    assert attributions.shape == X.shape
+    expected = logits(model, scaler, X) - logits(model, scaler, scaler.mean_[None, :])
+    assert np.abs(attributions.sum(axis=1) - expected).mean() < 0.05
+
+
+def test_gradient_x_input_is_exact_for_linear_model():
+    model, scaler = load_cardio_nn()
+    linear = torch.nn.Linear(11, 1)
+    X = sample_rows(20)
+    attributions = cardio_nn_attributions(linear, scaler, X, method="gradient_x_input")
+    expected = ((X - scaler.mean_) / scaler.scale_) * linear.weight.detach().numpy()
+    np.testing.assert_allclose(attributions, expected, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+
+from percentile_index import PercentileIndex, PercentileIndexStore
+
+YEAR = 365.25
+
+
+def _reference(n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    age_days = rng.uniform(40, 60, n) * YEAR
+    gender = rng.integers(1, 3, n)
+    probs = rng.random(n)
+    return age_days, gender, probs
+
+
+def test_rank_matches_brute_force_within_stratum():
+    age_days, gender, probs = _reference()
+    index = PercentileIndex.build(age_days, gender, probs, "v1", band_years=5)
+    for prob, age, sex in [(0.5, 52 * YEAR, 2), (0.05, 41 * YEAR, 1), (0.99, 58 * YEAR, 1)]:
+        bands = (age_days / YEAR // 5).astype(int)
+        peers = probs[(bands == int(age / YEAR // 5)) & (gender == sex)]
+        out = index.rank(prob, age, sex)
+        assert out["stratum"] == "age_band_gender" and out["stratum_size"] == len(peers)
+        assert abs(out["percentile"] - (peers < prob).mean() * 100) < 1e-3
+        assert abs(out["population_percentile"] - (probs < prob).mean() * 100) < 1e-3
+    assert index.rank(0.5, 52 * YEAR, 2)["age_band"] == "50-54"
+
+
+def test_small_or_unknown_strata_fall_back_to_population():
+    age_days, gender, probs = _reference()
+    index = PercentileIndex.build(np.append(age_days, 80 * YEAR), np.append(gender, 1), np.append(probs, 0.5), "v1")
+    for age in (80 * YEAR, 20 * YEAR, 95 * YEAR):  # one-row band, below and above the reference ages
+        out = index.rank(0.5, age, 1)
+        assert out["stratum"] == "all" and out["percentile"] == out["population_percentile"]
+
+
+def test_store_reuses_file_and_rebuilds_on_version_change(tmp_path):
+    age_days, gender, probs = _reference()
+    builds = []
+
+    def build(model, version):
+        builds.append(version)
+        return PercentileIndex.build(age_days, gender, probs, version)
+
+    store = PercentileIndexStore(lambda model: str(tmp_path / f"{model}.npz"), build)
+    store.load_or_build("m", "v1")
+    assert PercentileIndexStore(store.path_fn, build).load_or_build("m", "v1").version == "v1" and builds == ["v1"]
+
+    assert store.get("m", "v1") is not None
+    assert store.get("m", "v2") is None  # stale: rebuilt in the background
+    deadline = time.time() + 10
+    while store.get("m", "v2") is None and time.time() < deadline: time.sleep(0.01)
+    assert store.get("m", "v2").version == "v2" and builds == ["v1", "v2"]
+
+
+def test_failed_build_backs_off_until_timeout_or_new_version(tmp_path):
+    age_days, gender, probs = _reference()
+    builds = []
+
+    def build(model, version):
+        builds.append(version)
+        if version == "bad": raise OSError("reference data missing")
+        return PercentileIndex.build(age_days, gender, probs, version)
+
+    def settle():
+        deadline = time.time() + 10
+        while store._building and time.time() < deadline: time.sleep(0.01)
+
+    store = PercentileIndexStore(lambda model: str(tmp_path / f"{model}.npz"), build, retry_after=60)
+    assert store.get("m", "bad") is None
+    settle()
+    for _ in range(5):
+        assert store.get("m", "bad") is None
+    settle()
+    assert builds == ["bad"]
+
+    store._failed["m"] = ("bad", time.monotonic() - 61)  # the back-off has elapsed
+    store.get("m", "bad")
+    settle()
+    assert builds == ["bad", "bad"]
+
+    store.get("m", "v2")  # a new version is tried at once
+    settle()
+    assert store.get("m", "v2").version == "v2" and builds == ["bad", "bad", "v2"] and "m" not in store._failed
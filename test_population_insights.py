@@ -0,0 +1,41 @@
+import numpy as np
+
+from population_insights import feature_grid, load_insights, model_version, run, served_artifacts
+
+
+def test_insights_job_writes_versioned_curves(tmp_path):
+    sample = tmp_path / "sample.csv"
+    with open("cardio_train.csv", "rb") as f:
+        sample.write_bytes(b"".join(f.readline() for _ in range(301)))
+    paths = run(["cardio_nn"], str(sample), workers=1, pd_rows=0, ice_rows=1000, grid_points=5, out_dir=str(tmp_path))
+    version = model_version("cardio_nn")
+    assert paths == [str(tmp_path / f"cardio_nn-{version}.npz")]
+
+    data = load_insights("cardio_nn", version, str(tmp_path))
+    assert data["attribution_method"] == "integrated_gradients"
+    assert [i["mean_abs"] for i in data["importance"]] == sorted((i["mean_abs"] for i in data["importance"]), reverse=True)
+    ap_hi = data["features"]["ap_hi"]
+    assert len(ap_hi["grid"]) == len(ap_hi["pd"]) <= 5
+    # Every row is an ICE row here, so PD is the mean of the ICE curves
+    np.testing.assert_allclose(np.mean(ap_hi["ice"], axis=0), ap_hi["pd"], atol=2e-3)
+    assert data["features"]["gender"]["grid"] == [1.0, 2.0]
+    assert load_insights("cardio_nn", "other-version", str(tmp_path)) is None
+
+
+def test_feature_grid_uses_codes_for_categoricals():
+    assert feature_grid(np.array([3, 1, 1, 2]), "cholesterol", 20).tolist() == [1, 2, 3]
+    assert len(feature_grid(np.arange(1000.0), "weight", 10)) == 10
+
+
+def test_served_artifacts_follow_the_server_precedence(tmp_path):
+    from artifact_bundle import write_bundle
+    from model_registry import ModelRegistry
+    from prediction_cache import artifact_fingerprint
+    registry, bundle = str(tmp_path / "registry"), str(tmp_path / "a.bundle")
+    assert served_artifacts("cardio_nn", registry, bundle) == ["cardio_model.pth", "scaler.pkl"]
+    write_bundle(bundle, {"cardio_nn": {"arrays": {"w": np.zeros(2)}, "metadata": {}}})
+    assert served_artifacts("cardio_nn", registry, bundle) == [bundle]
+    ModelRegistry(registry).publish("cardio_nn", ["cardio_model.pth", "scaler.pkl"], activate=True)
+    paths = served_artifacts("cardio_nn", registry, bundle)
+    assert paths == ModelRegistry(registry).paths("cardio_nn", "v1")
+    assert model_version("cardio_nn", paths) == artifact_fingerprint(paths) != model_version("cardio_nn", ["cardio_model.pth", "scaler.pkl"])
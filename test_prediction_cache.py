@@ -0,0 +1,83 @@
+import os
+import time
+
+from prediction_cache import PredictionCache, RequestLog, canonical_features
+
+
+def test_lru_eviction_and_memory_accounting():
+    cache = PredictionCache(max_entries=2)
+    cache.put("m", (1.0,), 0.1)
+    cache.put("m", (2.0,), 0.2)
+    assert cache.get("m", (1.0,)) == 0.1  # (1.0,) is now most recent
+    cache.put("m", (3.0,), 0.3)
+
+    assert cache.get("m", (2.0,)) is None
+    assert cache.get("m", (1.0,)) == 0.1
+    assert cache.stats()["entries"] == 2
+    assert cache.nbytes > 0
+
+    cache.invalidate()
+    assert cache.nbytes == 0
+
+
+def test_byte_budget_evicts():
+    cache = PredictionCache(max_entries=1000, max_bytes=2000)
+    for i in range(100):
+        cache.put("m", canonical_features([i, i + 0.5]), float(i))
+    assert cache.nbytes <= 2000
+    assert 0 < cache.stats()["entries"] < 100
+
+
+def test_artifact_change_invalidates(tmp_path):
+    artifact = tmp_path / "model.pth"
+    artifact.write_bytes(b"v1")
+    cache = PredictionCache(check_interval=0)
+    cache.register("m", [str(artifact)])
+    cache.put("m", (1.0,), 0.5)
+    assert cache.get("m", (1.0,)) == 0.5
+
+    artifact.write_bytes(b"version2")
+    os.utime(artifact, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert cache.get("m", (1.0,)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_results_of_a_replaced_model_are_not_stored(tmp_path):
+    old, new = tmp_path / "v1.pth", tmp_path / "v2.pth"
+    old.write_bytes(b"v1")
+    new.write_bytes(b"v2")
+    cache = PredictionCache()
+    cache.register("m", [str(old)])
+    pinned = cache.version("m")
+    cache.register("m", [str(new)])  # swapped while a request was still computing with the old model
+    assert cache.memoize("m", (1.0,), lambda: 0.1, version=pinned) == 0.1
+    assert cache.get("m", (1.0,)) is None and cache.stats()["entries"] == 0
+    assert cache.memoize("m", (1.0,), lambda: 0.2, version=cache.version("m")) == 0.2
+    assert cache.get("m", (1.0,)) == 0.2
+
+
+def test_request_log_most_frequent_skips_foreign_lines(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    path.write_text('{"request_id": "x", "title": "not a payload"}\n')
+    log = RequestLog(str(path), enabled=True)
+    for _ in range(3): log.record("/predict", {"age": 18393, "gender": 2})
+    log.record("/predict/idiopathic", {"age": 65})
+
+    top = log.most_frequent(5)
+    assert top[0] == ("/predict", {"age": 18393, "gender": 2}, 3)
+    assert len(top) == 2
+
+
+def test_touched_artifact_does_not_disable_pinned_memoization(tmp_path):
+    artifact = tmp_path / "model.pth"
+    artifact.write_bytes(b"v1")
+    cache = PredictionCache(check_interval=0)
+    cache.register("m", [str(artifact)])
+    served = cache.version("m")
+
+    os.utime(artifact, ns=(time.time_ns(), time.time_ns() + 10**9))  # changed on disk, not reloaded
+    assert cache.version("m") != served
+    calls = []
+    for _ in range(3):
+        assert cache.memoize("m", (1.0,), lambda: calls.append(1) or 0.5, version=served) == 0.5
+    assert len(calls) == 1 and cache.stats()["hits"] == 2
@@ -0,0 +1,40 @@
+import threading
+import time
+
+from prefetch import SpeculativePrefetcher
+
+
+def test_prefetched_value_is_served_then_expires():
+    prefetcher = SpeculativePrefetcher(ttl=0.2)
+    assert prefetcher.schedule(("report", "a"), lambda: {"report": "ok"})
+    time.sleep(0.05)
+    assert prefetcher.get(("report", "a")) == {"report": "ok"}
+    time.sleep(0.25)
+    assert prefetcher.get(("report", "a")) is None
+
+
+def test_running_job_is_joined_not_recomputed():
+    calls = []
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+    prefetcher = SpeculativePrefetcher()
+    prefetcher.schedule("k", slow)
+    time.sleep(0.05)
+    assert prefetcher.get("k") == 42
+    assert len(calls) == 1
+
+
+def test_budget_and_load_limits():
+    release = threading.Event()
+    load = {"active": 0}
+    prefetcher = SpeculativePrefetcher(max_workers=1, max_pending=2, max_load=4, load_fn=lambda: load["active"])
+    assert prefetcher.schedule("a", release.wait)
+    assert prefetcher.schedule("b", lambda: 1)  # queued behind "a"
+    assert not prefetcher.schedule("c", lambda: 1)  # over budget
+
+    load["active"] = 10
+    assert not prefetcher.schedule("d", lambda: 1)
+    assert prefetcher.snapshot()["cancelled"] == 1  # "b" was dropped from the queue
+    release.set()
@@ -0,0 +1,27 @@
+import pytest
+
+from routing import BackendRouter
+
+
+def _router(policy="quality", load=0, available=("xgb", "nn", "numpy")):
+    router = BackendRouter(["xgb", "nn", "numpy"], available=lambda b: b in available, policy=policy, max_load=4, load_fn=lambda: load)
+    for backend, ms in (("xgb", 2.0), ("nn", 0.4), ("numpy", 0.02)):
+        router.record(backend, ms / 1000)
+    return router
+
+
+def test_policy_and_slo_choose_backend():
+    assert _router().choose() == ("xgb", False)
+    assert _router("latency").choose() == ("numpy", False)
+    assert _router().choose(slo_ms=1.0) == ("nn", False)    # best backend within the SLO
+    assert _router().choose(slo_ms=0.001) == ("numpy", False)  # nothing fits: fastest
+    assert _router(available=("nn", "numpy")).choose() == ("nn", False)
+
+
+def test_overload_degrades_to_fastest_and_stats_count_choices():
+    router = _router(load=5)
+    assert router.choose(slo_ms=10) == ("numpy", True)
+    stats = router.stats()
+    assert stats["degraded"] == 1 and stats["backends"]["numpy"]["chosen"] == 1
+    assert stats["backends"]["xgb"]["ewma_ms"] == 2.0
+    with pytest.raises(LookupError): _router(available=()).choose()
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+import pytest
+
+from screening import derive_shared, model_inputs, normalize_smoking, run_concurrently
+
+FORM = {"age_years": 58, "sex": "M", "smoking": "Ever", "height": 175, "weight": 88.0, "ap_hi": 140, "ap_lo": 90,
+        "cholesterol": 2, "gluc": 1, "alco": 0, "active": 1, "hypertension": 1, "heart_disease": 0,
+        "HbA1c_level": 6.1, "blood_glucose_level": 130, "cbc": {"hemoglobin": 13.0}}
+
+
+def test_shared_fields_are_mapped_to_every_vocabulary():
+    shared = derive_shared(FORM)
+    assert shared == {"age_years": 58.0, "sex": "male", "smoking": "ever", "bmi": 28.73}
+    inputs, skipped = model_inputs(FORM, shared)
+    assert not skipped
+    assert inputs["cardiovascular"]["age"] == round(58 * 365.25) and inputs["cardiovascular"]["gender"] == 2 and inputs["cardiovascular"]["smoke"] == 1
+    assert inputs["diabetes"]["gender"] == "Male" and inputs["diabetes"]["smoking_history"] == "ever" and inputs["diabetes"]["bmi"] == 28.73
+    assert inputs["idiopathic"] == {"age": 58, "gender": "Male", "smoking_history": "Ever"}
+    assert inputs["cbc"] == {"sex": "male", "hemoglobin": 13.0}
+    assert [normalize_smoking(v) for v in (0, "Never", "yes", "No Info", None)] == ["never", "never", "current", "No Info", "No Info"]
+    with pytest.raises(ValueError): normalize_smoking("sometimes")
+
+
+def test_missing_fields_skip_only_the_models_that_need_them():
+    form = {"age_years": 40, "sex": "female", "smoking": "never", "cbc": {"wbc": 6.0}}
+    inputs, skipped = model_inputs(form, derive_shared(form))
+    assert set(inputs) == {"idiopathic", "cbc"}
+    assert skipped["cardiovascular"].startswith("missing height") and "bmi" in skipped["diabetes"]
+
+
+def test_run_concurrently_returns_partial_results_on_timeout():
+    def boom(): raise ValueError("bad input")
+    calls = {"fast": lambda: 1, "slow": lambda: time.sleep(0.5) or 2, "broken": boom}
+    started = time.perf_counter()
+    out = asyncio.run(run_concurrently(calls, timeout=0.1))
+    assert time.perf_counter() - started < 0.45
+    assert out["fast"]["status"] == "ok" and out["fast"]["result"] == 1
+    assert out["slow"]["status"] == "timeout"
+    assert out["broken"] == {"status": "error", "error": "bad input", "elapsed_ms": out["broken"]["elapsed_ms"]}
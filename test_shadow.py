@@ -0,0 +1,45 @@
+import time
+
+from shadow import ShadowEvaluator
+
+
+def _wait(evaluator):
+    deadline = time.time() + 5
+    while evaluator.stats()["pending"] and time.time() < deadline: time.sleep(0.01)
+
+
+def test_comparisons_run_off_the_response_path():
+    evaluator = ShadowEvaluator(sample_rate=1.0)
+    started = time.perf_counter()
+    assert evaluator.submit(0.2, "primary", 1.0, lambda: time.sleep(0.2) or 0.4)
+    assert time.perf_counter() - started < 0.05
+    evaluator.submit(0.8, "candidate", 2.0, lambda: 0.75)  # canary: candidate served, primary shadowed
+    _wait(evaluator)
+    stats = evaluator.stats()
+    assert stats["compared"] == 2 and stats["shadow"] == 1 and stats["canary"] == 1
+    assert abs(stats["mean_diff"] - (0.2 + 0.05) / 2) < 1e-9 and abs(stats["max_abs_diff"] - 0.2) < 1e-9
+    assert stats["category_agreement"] == 0.5 and stats["label_agreement"] == 1.0  # Low vs Medium, both below 0.5
+    assert stats["latency"]["candidate"]["mean_ms"] > 1.0
+
+
+def test_routes_follow_rates_and_overflow_is_dropped():
+    evaluator = ShadowEvaluator(sample_rate=0.3, canary_rate=0.1, max_pending=1, seed=0)
+    routes = [evaluator.route() for _ in range(10000)]
+    assert abs(routes.count("canary") / 10000 - 0.1) < 0.02 and abs(routes.count("shadow") / 10000 - 0.3) < 0.02
+    evaluator.submit(0.1, "primary", 1.0, lambda: time.sleep(0.2) or 0.1)
+    assert not evaluator.submit(0.1, "primary", 1.0, lambda: 0.1)
+    _wait(evaluator)
+    assert evaluator.stats()["dropped"] == 1
+    evaluator.submit(0.1, "primary", 1.0, lambda: 1 / 0)
+    _wait(evaluator)
+    assert evaluator.stats()["errors"] == 1
+    evaluator.reset()
+    assert evaluator.stats()["compared"] == 0
+
+
+def test_cached_primary_answers_do_not_skew_primary_latency():
+    evaluator = ShadowEvaluator(sample_rate=1.0)
+    for _ in range(5):  # the same payload: the served primary answer is a cache hit every time
+        evaluator.submit(0.2, "primary", 0.001, lambda: 0.25, served_forward=lambda: time.sleep(0.02))
+    _wait(evaluator)
+    assert evaluator.stats()["latency"]["primary"]["mean_ms"] >= 20
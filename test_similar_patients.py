@@ -0,0 +1,39 @@
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from batch_scoring import CARDIO_NN_ORDER, cardio_matrix
+from columnar import CARDIO_COLUMNS
+from similar_patients import SimilarPatientIndex
+
+
+def _rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(14000, 23000, n), rng.integers(1, 3, n), rng.uniform(150, 190, n), rng.uniform(50, 110, n),
+        rng.uniform(100, 170, n), rng.uniform(60, 100, n), rng.integers(1, 4, n), rng.integers(1, 4, n),
+        rng.integers(0, 2, n), rng.integers(0, 2, n), rng.integers(0, 2, n),
+    ]).astype(np.float32)
+
+
+def test_query_matches_brute_force_in_scaled_space():
+    rows = _rows(3000)
+    matrix = cardio_matrix({c: rows[:, i].astype(np.float64) for i, c in enumerate(CARDIO_COLUMNS)}, CARDIO_NN_ORDER)
+    scaler = StandardScaler().fit(matrix)
+    outcomes = (np.arange(3000) % 3 == 0).astype(np.int8)
+    index = SimilarPatientIndex(rows, np.arange(3000) + 100, outcomes, scaler)
+
+    patient = dict(zip(CARDIO_COLUMNS, _rows(1, seed=1)[0].tolist()))
+    out = index.query(patient, k=7)
+    query = scaler.transform(cardio_matrix({c: np.array([patient[c]]) for c in CARDIO_COLUMNS}, CARDIO_NN_ORDER))[0]
+    expected = np.argsort(np.linalg.norm(scaler.transform(matrix) - query, axis=1))[:7]
+    assert [n["id"] for n in out["neighbors"]] == (expected + 100).tolist()
+    assert out["outcome_rate"] == outcomes[expected].mean() and out["reference_rows"] == 3000
+
+
+def test_exact_match_comes_first_and_k_is_capped():
+    rows = _rows(20)
+    scaler = StandardScaler().fit(cardio_matrix({c: rows[:, i].astype(np.float64) for i, c in enumerate(CARDIO_COLUMNS)}, CARDIO_NN_ORDER))
+    index = SimilarPatientIndex(rows, np.arange(20), np.ones(20), scaler)
+    out = index.query(dict(zip(CARDIO_COLUMNS, rows[5].tolist())), k=50)
+    assert out["k"] == 20 and out["neighbors"][0]["id"] == 5 and out["neighbors"][0]["distance"] == 0.0
+    assert out["weighted_outcome_rate"] == 1.0
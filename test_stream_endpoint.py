@@ -0,0 +1,88 @@
+"""End-to-end checks of /predict/cardiovascular/stream against a real uvicorn server."""
+import gzip
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+HEADER = b"id;age;gender;height;weight;ap_hi;ap_lo;cholesterol;gluc;smoke;alco;active\n"
+
+
+def rows(start, count):
+    return b"".join(b"%d;%d;%d;168;62;%d;80;1;1;0;0;1\n" % (i, 14000 + i % 9000, 1 + i % 2, 100 + i % 60) for i in range(start, start + count))
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    tmp = tmp_path_factory.mktemp("stream")
+    env = {**os.environ, "MODEL_REGISTRY_DIR": str(tmp / "registry"), "ARTIFACT_BUNDLE": str(tmp / "none.bundle"),
+           "STREAM_CHUNK_ROWS": "1000", "GZIP_MIN_BYTES": "1"}
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(240):
+            if proc.poll() is not None: pytest.fail("server exited during startup")
+            try:
+                if requests.get(url + "/health", timeout=1).ok: break
+            except requests.ConnectionError:
+                time.sleep(0.5)
+        else:
+            pytest.fail("server did not start")
+        yield port
+    finally:
+        proc.terminate()
+        proc.wait(30)
+
+
+def test_results_arrive_while_the_upload_is_still_open(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server, timeout=60)
+    conn.putrequest("POST", "/predict/cardiovascular/stream")
+    conn.putheader("Transfer-Encoding", "chunked")
+    conn.putheader("Accept-Encoding", "gzip")
+    conn.endheaders()
+
+    def send(data):
+        conn.send(b"%x\r\n%s\r\n" % (len(data), data))
+
+    send(HEADER + rows(0, 2500))
+    response = conn.getresponse()
+    assert response.status == 200 and response.getheader("Content-Encoding") is None
+    first = json.loads(response.readline())
+    assert first["row"] == 0 and first["id"] == 0  # answered before the rest of the body exists
+
+    for start in range(2500, 20000, 2500):
+        send(rows(start, 2500))
+    conn.send(b"0\r\n\r\n")
+    lines = [first] + [json.loads(line) for line in response.read().splitlines()]
+    assert [line["row"] for line in lines] == list(range(20000))
+    assert [line["id"] for line in lines] == list(range(20000))
+    assert all(line["valid"] == 1 and 0 <= line["risk_probability"] <= 1 for line in lines)
+
+
+def test_gzip_upload_with_content_length(server):
+    body = gzip.compress(HEADER + rows(0, 5000) + b"5000;abc;1;168;62;120;80;1;1;0;0;1\n")
+    response = requests.post(f"http://127.0.0.1:{server}/predict/cardiovascular/stream?output=csv",
+                             data=body, headers={"Content-Encoding": "gzip", "Accept-Encoding": "gzip"})
+    assert response.status_code == 200 and "Content-Encoding" not in response.headers
+    assert response.headers["X-Chunk-Rows"] == "1000"
+    lines = response.text.splitlines()
+    assert lines[0] == "row;id;risk_probability;valid" and len(lines) == 5002
+    assert lines[-1].startswith("5000;5000;") and lines[-1].endswith(";0")
+
+
+def test_bad_header_is_a_400(server):
+    response = requests.post(f"http://127.0.0.1:{server}/predict/cardiovascular/stream", data=b"id;age\n1;2\n")
+    assert response.status_code == 400 and "Missing columns" in response.json()["detail"]
+    response = requests.post(f"http://127.0.0.1:{server}/predict/cardiovascular/stream?output=xml", data=HEADER)
+    assert response.status_code == 400
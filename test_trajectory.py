@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from columnar import CARDIO_RANGES
+from trajectory import project, simulate
+
+BASE = {"age": 18393, "gender": 2, "height": 168, "weight": 82.0, "ap_hi": 140, "ap_lo": 90,
+        "cholesterol": 2, "gluc": 1, "smoke": 1, "alco": 0, "active": 0}
+
+
+def test_simulation_is_deterministic_and_applies_interventions():
+    baseline = simulate(BASE, 10, 500, "baseline", seed=3)
+    np.testing.assert_array_equal(baseline["ap_hi"], simulate(BASE, 10, 500, "baseline", seed=3)["ap_hi"])
+    assert len(baseline["age"]) == 11 * 500
+    assert baseline["age"].reshape(11, 500)[10, 0] == BASE["age"] + 10 * 365.25
+
+    quit_smoking = simulate(BASE, 10, 500, "quit_smoking", seed=3)
+    active = simulate(BASE, 10, 500, "become_active", seed=3)
+    assert quit_smoking["smoke"].reshape(11, 500)[1:].max() == 0
+    assert active["active"].reshape(11, 500)[1:].min() == 1
+    # Same random numbers: the activity scenario only shifts BP down
+    assert np.all(active["ap_hi"].reshape(11, 500)[1] <= baseline["ap_hi"].reshape(11, 500)[1])
+    for c, (low, high) in CARDIO_RANGES.items():
+        assert baseline[c].min() >= low and baseline[c].max() <= high
+    assert np.all(baseline["ap_lo"] < baseline["ap_hi"])
+
+
+def test_project_scores_one_batch_and_returns_bands():
+    calls = []
+    def score(columns):
+        calls.append(len(columns["ap_hi"]))
+        return np.clip((columns["ap_hi"] - 90) / 100, 0, 1)
+
+    result = project(BASE, 5, 200, ["baseline", "become_active"], score, percentiles=(5, 50, 95))
+    assert calls == [2 * 6 * 200]
+    bands = result["baseline"]["percentiles"]
+    assert len(bands["50"]) == 6 and bands["5"][0] == bands["95"][0] == pytest.approx(0.5)
+    assert all(lo <= mid <= hi for lo, mid, hi in zip(bands["5"], bands["50"], bands["95"]))
+    assert result["become_active"]["mean"][-1] < result["baseline"]["mean"][-1]
+
+    with pytest.raises(ValueError):
+        project(BASE, 5, 10, ["retire"], score)
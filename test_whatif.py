@@ -0,0 +1,23 @@
+import numpy as np
+
+from whatif import minimal_change, risk_codes
+
+THRESHOLDS, CATEGORIES = [0.3, 0.7], ["Low", "Medium", "High"]
+
+
+def test_minimal_change_picks_closest_lower_bucket():
+    ap_hi = np.array([110.0, 130.0, 150.0])
+    weight = np.array([70.0, 80.0])
+    probs = np.array([[0.2, 0.75], [0.6, 0.75], [0.8, 0.9]])
+    base = {"ap_hi": 150.0, "weight": 80.0, "probability": 0.9}
+    change = minimal_change(probs, ["ap_hi", "weight"], [ap_hi, weight], base, {"ap_hi": 20.0, "weight": 10.0}, THRESHOLDS, CATEGORIES)
+    # (150, 70) is 1 std away but still High; (130, 70) is 2 std away and Medium
+    assert change["changes"] == {"ap_hi": {"from": 150.0, "to": 130.0}, "weight": {"from": 80.0, "to": 70.0}}
+    assert change["risk_category"] == "Medium" and change["distance_std"] == 2.0
+
+
+def test_minimal_change_none_when_already_low_or_unreachable():
+    values = [np.array([1.0, 2.0])]
+    assert minimal_change(np.array([0.1, 0.2]), ["x"], values, {"x": 1.0, "probability": 0.1}, {"x": 1.0}, THRESHOLDS, CATEGORIES) is None
+    assert minimal_change(np.array([0.8, 0.9]), ["x"], values, {"x": 1.0, "probability": 0.8}, {"x": 1.0}, THRESHOLDS, CATEGORIES) is None
+    assert risk_codes(np.array([0.29, 0.3, 0.69, 0.7]), THRESHOLDS).tolist() == [0, 1, 1, 2]
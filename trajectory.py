@@ -0,0 +1,84 @@
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from columnar import CARDIO_COLUMNS, CARDIO_RANGES
+
+SCENARIOS = ("baseline", "quit_smoking", "become_active")
+
+# Yearly dynamics. These are population-level heuristics (age-related drift plus random-walk noise),
+# not fitted to longitudinal data; they make the bands plausible, not calibrated.
+DRIFT = {"ap_hi": 0.6, "ap_lo": 0.25, "weight": 0.2}      # mean change per year
+NOISE = {"ap_hi": 4.0, "ap_lo": 2.5, "weight": 1.5}       # sd of the yearly change
+CHOLESTEROL_UP, CHOLESTEROL_DOWN = 0.04, 0.02              # yearly probability of moving one level
+ACTIVE_START, ACTIVE_STOP = 0.05, 0.08
+QUIT_RATE = 0.03                                           # spontaneous smoking cessation per year
+
+# Intervention effects, applied from year 1
+QUIT_WEIGHT_GAIN = 1.5      # kg in each of the first two years after quitting
+ACTIVE_AP_HI_DROP = 4.0     # one-off systolic / diastolic reduction (mmHg)
+ACTIVE_AP_LO_DROP = 2.5
+ACTIVE_WEIGHT_DRIFT = -0.3  # added to the yearly weight drift
+
+
+def simulate(base: Dict[str, float], years: int, samples: int, scenario: str, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Raw CardioInput columns for `samples` trajectories over years 0..years, flattened year-major
+    ((years + 1) * samples rows). Every scenario draws the same random numbers for the same seed,
+    so differences between scenarios come from the intervention only.
+    """
+    if scenario not in SCENARIOS: raise ValueError(f"Unknown scenario '{scenario}' (use {', '.join(SCENARIOS)})")
+    rng = np.random.default_rng(seed)
+    state = {c: np.full(samples, float(base[c])) for c in CARDIO_COLUMNS}
+    was_smoker = state["smoke"] == 1
+    out = {c: np.empty((years + 1, samples)) for c in state}
+    for c in state: out[c][0] = state[c]
+
+    for year in range(1, years + 1):
+        noise = {c: rng.standard_normal(samples) for c in NOISE}
+        u_chol, u_active, u_smoke = rng.random(samples), rng.random(samples), rng.random(samples)
+
+        state["age"] = state["age"] + 365.25
+        for c in NOISE:
+            drift = DRIFT[c] + (ACTIVE_WEIGHT_DRIFT if c == "weight" and scenario == "become_active" else 0.0)
+            state[c] = state[c] + drift + NOISE[c] * noise[c]
+        state["cholesterol"] = np.clip(state["cholesterol"] + (u_chol < CHOLESTEROL_UP) - (u_chol > 1 - CHOLESTEROL_DOWN), 1, 3)
+
+        if scenario == "become_active":
+            state["active"] = np.ones(samples)
+            if year == 1:
+                state["ap_hi"] = state["ap_hi"] - ACTIVE_AP_HI_DROP
+                state["ap_lo"] = state["ap_lo"] - ACTIVE_AP_LO_DROP
+        else:
+            start, stop = (state["active"] == 0) & (u_active < ACTIVE_START), (state["active"] == 1) & (u_active < ACTIVE_STOP)
+            state["active"] = np.where(start, 1.0, np.where(stop, 0.0, state["active"]))
+
+        if scenario == "quit_smoking":
+            if year <= 2: state["weight"] = state["weight"] + QUIT_WEIGHT_GAIN * was_smoker
+            state["smoke"] = np.zeros(samples)
+        else:
+            state["smoke"] = np.where(u_smoke < QUIT_RATE, 0.0, state["smoke"])
+
+        # Keep values inside the validated ranges and diastolic below systolic
+        for c, (low, high) in CARDIO_RANGES.items():
+            state[c] = np.clip(state[c], low, high)
+        state["ap_lo"] = np.minimum(state["ap_lo"], state["ap_hi"] - 10)
+        for c in state: out[c][year] = state[c]
+    return {c: v.ravel() for c, v in out.items()}
+
+
+def project(base: Dict[str, float], years: int, samples: int, scenarios: Sequence[str], score: Callable[[Dict[str, np.ndarray]], np.ndarray],
+            percentiles: Sequence[float] = (5, 25, 50, 75, 95), seed: int = 0, high_threshold: float = 0.7) -> Dict[str, Dict[str, List]]:
+    """Simulates every scenario, scores all trajectories in one batch and summarises them per year."""
+    simulated = [simulate(base, years, samples, s, seed) for s in scenarios]
+    batch = {c: np.concatenate([sim[c] for sim in simulated]) for c in simulated[0]}
+    probs = np.asarray(score(batch)).reshape(len(scenarios), years + 1, samples)
+    bands = np.percentile(probs, percentiles, axis=2)  # (percentiles, scenarios, years + 1)
+    return {
+        s: {
+            "mean": probs[i].mean(axis=1).tolist(),
+            "percentiles": {str(p): bands[k, i].tolist() for k, p in enumerate(percentiles)},
+            "share_high": (probs[i] >= high_threshold).mean(axis=1).tolist(),
+        }
+        for i, s in enumerate(scenarios)
+    }
@@ -0,0 +1,35 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def risk_codes(probs: np.ndarray, thresholds: Sequence[float]) -> np.ndarray:
+    """Vectorized get_risk_category: 0 (Low), 1 (Medium), 2 (High)."""
+    return np.digitize(probs, thresholds)
+
+
+def minimal_change(probs: np.ndarray, features: List[str], values: List[np.ndarray], base: Dict[str, float],
+                   scales: Dict[str, float], thresholds: Sequence[float], categories: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """
+    Smallest grid move (L1 distance in training standard deviations) that lands in a lower risk
+    category than the base point. None if the base is already in the lowest bucket or no grid
+    point gets there.
+    """
+    base_code = int(risk_codes(np.array([base["probability"]]), thresholds)[0])
+    if base_code == 0: return None
+    distance = np.zeros(probs.shape)
+    for k, (feature, axis) in enumerate(zip(features, values)):
+        view = [1] * len(features)
+        view[k] = len(axis)
+        distance = distance + (np.abs(axis - base[feature]) / scales[feature]).reshape(view)
+    candidates = risk_codes(probs, thresholds) < base_code
+    if not candidates.any(): return None
+    best = np.unravel_index(np.argmin(np.where(candidates, distance, np.inf)), probs.shape)
+    point = {feature: float(axis[i]) for feature, axis, i in zip(features, values, best)}
+    prob = float(probs[best])
+    return {
+        "changes": {f: {"from": base[f], "to": v} for f, v in point.items() if v != base[f]},
+        "probability": prob,
+        "risk_category": categories[int(risk_codes(np.array([prob]), thresholds)[0])],
+        "distance_std": float(distance[best]),
+    }